@@ -1,9 +1,18 @@
+import uuid
+
 import streamlit as st
 
-from backend.extractor import process_pdf
-from backend.planner import generate_full_care_plan
-from backend.rag import add_to_rag, query_rag
+from backend.extractor import open_pdf_source
+from backend.hospital_registry import city_centres
+from backend.journal import sha256_of_stream
+from backend.pipeline import run_pipeline
+from backend.result_store import get_result_store
+from backend.timeline import PatientTimeline
 from backend.pdf_builder import build_treatment_plan_pdf
+from backend.report_model import treatment_sections
+from backend.uploads import spooled_upload
+from backend import llm_metrics, mem_profiler
+from backend.warmup import warm_up
 
 
 # =====================================================
@@ -16,6 +25,17 @@ st.set_page_config(
 )
 
 
+# =====================================================
+# WARM-UP (ONCE PER PROCESS)
+# =====================================================
+@st.cache_resource(show_spinner="Starting up...")
+def _warm_up() -> dict:
+    return warm_up()
+
+
+_warm_up()
+
+
 # =====================================================
 # GLOBAL STYLES (GREEN HEADERS + BLUE CARDS + GAP)
 # =====================================================
@@ -92,48 +112,155 @@ st.markdown('<div class="section-title">Upload Diagnosis Report</div>', unsafe_a
 
 st.markdown("""
 <div class="blue-card">
-Upload the patient’s diagnosis report. Once uploaded, the system automatically:
+Upload the patient’s diagnosis reports (one or several, over time). The system automatically:
 <ul>
-<li>Extracts clinical information</li>
+<li>Extracts clinical information, once per report</li>
+<li>Merges reports into one patient timeline</li>
 <li>Summarizes the diagnosis</li>
 <li>Generates treatment, cost, and appointment plans</li>
 </ul>
 </div>
 """, unsafe_allow_html=True)
 
-uploaded_file = st.file_uploader(
-    "Upload PDF Diagnosis Report",
+# Patient location → nearest registered hospitals in the appointment plan
+with st.expander("Patient location (optional, suggests nearby hospitals)"):
+    centres = city_centres()
+    location_mode = st.radio("Location", ["Not provided", "City", "Coordinates"], horizontal=True)
+    location = None
+    if location_mode == "City" and centres:
+        city = st.selectbox("City", sorted(centres), format_func=str.title)
+        location = centres[city]
+    elif location_mode == "Coordinates":
+        default_lat, default_lon = next(iter(centres.values()), (0.0, 0.0))
+        col_lat, col_lon = st.columns(2)
+        latitude = col_lat.number_input("Latitude", -90.0, 90.0, default_lat, format="%.4f")
+        longitude = col_lon.number_input("Longitude", -180.0, 180.0, default_lon, format="%.4f")
+        location = (latitude, longitude)
+
+uploaded_files = st.file_uploader(
+    "Upload PDF Diagnosis Reports",
     type=["pdf"],
+    accept_multiple_files=True,
     label_visibility="collapsed"
 )
 
-if not uploaded_file:
+if not uploaded_files:
     st.stop()
 
 
 # =====================================================
 # AUTOMATIC PIPELINE (NO BUTTONS)
 # =====================================================
-with st.spinner("Analyzing diagnosis report..."):
-    extraction = process_pdf(uploaded_file.read())
+def analyze_upload(pdf_source, pdf_sha256: str, location=None) -> dict:
+    """
+    Stored result for a known PDF, else run the pipeline and store it.
 
-patient = extraction["details"]
-summary = extraction["summary_data"]
+    "plan_location" is the location the returned plan was made for;
+    stored plans with hospital suggestions have an unknown one (False),
+    so the timeline rebuilds them for the current location.
+    """
 
-# Automatically add to RAG
-add_to_rag(extraction["text"], summary.get("final_diagnosis", ""))
+    store = get_result_store()
+    stored = store.lookup(pdf_sha256) if store is not None else None
+
+    if stored is not None:
+        has_hospitals = "nearby_hospitals" in stored["plan"].get("appointment", {})
+        return {
+            "extraction": stored["extraction"],
+            "plan": stored["plan"],
+            "plan_location": False if has_hospitals else None,
+            "degraded": [],
+        }
+
+    # Extraction → RAG → care plan, each stage time-limited;
+    # LLM usage is attributed to this session and report
+    session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex)
+    with llm_metrics.session_scope(session_id), llm_metrics.report_scope(pdf_sha256):
+        result = run_pipeline(pdf_source, location=location, pdf_sha256=pdf_sha256)
+    result["plan_location"] = location
+    if store is not None and not result["degraded"]:
+        store.save(pdf_sha256, result["extraction"], result["plan"])
+    return result
+
+
+# One timeline per session; each document is analyzed once, documents
+# from a degraded run again on the next rerun
+timeline = st.session_state.setdefault("timeline", PatientTimeline(location))
+timeline.set_location(location)
+upload_hashes = st.session_state.setdefault("upload_hashes", {})
+current = set()
+
+with st.spinner("Analyzing diagnosis reports..."):
+    for uploaded_file in uploaded_files:
+        upload_key = getattr(uploaded_file, "file_id", None) or (uploaded_file.name, uploaded_file.size)
+        pdf_sha256 = upload_hashes.get(upload_key)
+        if pdf_sha256 in timeline and not timeline.needs_analysis(pdf_sha256):
+            current.add(pdf_sha256)
+            continue
+
+        try:
+            with mem_profiler.request(), spooled_upload(uploaded_file) as pdf_source:
+                with open_pdf_source(pdf_source) as stream:
+                    pdf_sha256 = sha256_of_stream(stream)
+                upload_hashes[upload_key] = pdf_sha256
+                current.add(pdf_sha256)
+
+                if timeline.needs_analysis(pdf_sha256):
+                    result = analyze_upload(pdf_source, pdf_sha256, location)
+                    timeline.add_document(
+                        pdf_sha256,
+                        result["extraction"],
+                        plan=result["plan"],
+                        file_name=uploaded_file.name,
+                        degraded=result["degraded"],
+                        plan_location=result["plan_location"],
+                    )
+        except ValueError as e:
+            st.error(f"{uploaded_file.name}: {e}")
+
+    # Reports removed from the uploader leave the timeline
+    for pdf_sha256 in list(timeline.documents):
+        if pdf_sha256 not in current:
+            timeline.remove_document(pdf_sha256)
+
+if not len(timeline):
+    st.stop()
 
-# Retrieve context and generate care plan
-context_docs = query_rag(summary.get("final_diagnosis", ""))
-plan = generate_full_care_plan(
-    patient=patient,
-    summary=summary,
-    context_docs=context_docs
-)
+patient = timeline.patient
+summary = timeline.summary
+plan = timeline.plan
+
+for doc in timeline.documents.values():
+    if doc.degraded:
+        st.warning(
+            f"{doc.file_name}: some steps took too long and were simplified: "
+            + ", ".join(stage.replace("_", " ") for stage in doc.degraded)
+        )
+
+names = timeline.distinct_values("name")
+if len(names) > 1:
+    st.warning("Reports mention different patient names: " + ", ".join(names))
 
 st.session_state["care_plan"] = plan
 
 
+# =====================================================
+# PATIENT TIMELINE (MULTIPLE REPORTS)
+# =====================================================
+if len(timeline) > 1:
+    st.markdown('<div class="section-title">Patient Timeline</div>', unsafe_allow_html=True)
+
+    rows = "<br>".join(
+        f"<b>{i}. {doc.file_name}</b> — "
+        + (", ".join(
+            name.replace("_", " ") for name, value in timeline.fields.items()
+            if value.source == doc.pdf_sha256
+        ) or "no current fields")
+        for i, doc in enumerate(timeline.documents.values(), start=1)
+    )
+    st.markdown(f'<div class="blue-result">{rows}</div>', unsafe_allow_html=True)
+
+
 # =====================================================
 # DIAGNOSTIC SUMMARY (INFO + RESULT)
 # =====================================================
@@ -146,6 +273,9 @@ quickly understand the patient’s condition.
 </div>
 """, unsafe_allow_html=True)
 
+code = plan.get("diagnosis_code")
+icd10_line = f"<br><br><b>ICD-10:</b> {code['code']} — {code['name']}" if code else ""
+
 st.markdown(f"""
 <div class="blue-result">
 <b>Patient Name:</b> {patient.get("name")}<br>
@@ -157,6 +287,7 @@ st.markdown(f"""
 
 <b>Final Diagnosis:</b><br>
 {summary.get("final_diagnosis", "Not mentioned")}
+{icd10_line}
 </div>
 """, unsafe_allow_html=True)
 
@@ -193,7 +324,7 @@ clinical_section(
 # =====================================================
 # TREATMENT PLAN
 # =====================================================
-for section, steps in plan["treatment_plan"]["treatment_sections"].items():
+for section, steps in treatment_sections(plan).items():
     clinical_section(
         section.replace("_", " ").title(),
         "<br>".join(steps)
@@ -221,6 +352,10 @@ clinical_section(
 # APPOINTMENT RECOMMENDATION
 # =====================================================
 appt = plan["appointment"]
+nearby_line = (
+    f"<br><br>Nearby Hospitals: {appt['nearby_hospitals']}"
+    if appt.get("nearby_hospitals") else ""
+)
 
 clinical_section(
     "Appointment Recommendation",
@@ -229,6 +364,7 @@ clinical_section(
     Specialist: {appt.get("specialist")}<br><br>
     Timeline: {appt.get("recommended_timeline")}<br><br>
     Follow-up Frequency: {appt.get("follow_up_frequency")}
+    {nearby_line}
     """
 )
 
@@ -239,11 +375,12 @@ clinical_section(
 st.markdown('<div class="section-title">Download Treatment Report</div>', unsafe_allow_html=True)
 
 if st.button("📄 Download Treatment Plan PDF"):
-    pdf_file = build_treatment_plan_pdf(
-        patient,
-        summary,
-        plan
-    )
+    with mem_profiler.stage("render_pdf"):
+        pdf_file = build_treatment_plan_pdf(
+            patient,
+            summary,
+            plan
+        )
 
     with open(pdf_file, "rb") as f:
         st.download_button(
@@ -252,3 +389,11 @@ if st.button("📄 Download Treatment Plan PDF"):
             file_name=pdf_file,
             mime="application/pdf"
         )
+
+
+# =====================================================
+# DEBUG: MEMORY PROFILE (MEMORY_PROFILING=1 ONLY)
+# =====================================================
+if mem_profiler.is_enabled():
+    with st.sidebar.expander("Memory profile", expanded=False):
+        st.json(mem_profiler.memory_report())
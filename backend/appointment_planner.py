@@ -13,18 +13,84 @@ DESIGN PRINCIPLES
 - Easy to understand and explain
 """
 
-from typing import Dict
+from typing import Dict, Optional, Tuple
 
+from backend.hospital_registry import find_nearest_hospitals
 
-def recommend_appointment(problem: str) -> Dict[str, str]:
+
+def recommend_appointment(
+    problem: str,
+    location: Optional[Tuple[float, float]] = None,
+    tier: Optional[str] = None,
+    radius_km: Optional[float] = None,
+) -> Dict[str, str]:
     """
     Recommend specialist and appointment timeline.
 
     Args:
         problem (str): Identified disease / medical condition
+        location (tuple): Optional patient (latitude, longitude)
+        tier (str): Optional hospital tier for nearby options
+        radius_km (float): Optional search radius for nearby options
 
     Returns:
-        dict: Appointment recommendation
+        dict: Appointment recommendation (with "nearby_hospitals"
+        when a location is given)
+    """
+
+    appointment = _recommend_specialist(problem)
+
+    if location is not None:
+        appointment["nearby_hospitals"] = suggest_nearby_hospitals(
+            appointment["specialist"],
+            location,
+            tier=tier,
+            radius_km=radius_km,
+        )
+
+    return appointment
+
+
+def suggest_nearby_hospitals(
+    specialist: str,
+    location: Tuple[float, float],
+    k: int = 3,
+    tier: Optional[str] = None,
+    radius_km: Optional[float] = None,
+) -> str:
+    """
+    Human-readable list of the nearest hospitals offering the specialist.
+
+    "Endocrinologist / General Physician" matches hospitals offering
+    either specialist; the first listed specialist is tried first.
+    """
+
+    latitude, longitude = location
+    hospitals = []
+
+    for option in (s.strip() for s in specialist.split("/")):
+        hospitals = find_nearest_hospitals(
+            latitude,
+            longitude,
+            k=k,
+            tier=tier,
+            specialist=option,
+            radius_km=radius_km,
+        )
+        if hospitals:
+            break
+
+    if not hospitals:
+        return "No registered hospital found nearby"
+
+    return "; ".join(
+        f"{h['display_name']} ({h['distance_km']} km)" for h in hospitals
+    )
+
+
+def _recommend_specialist(problem: str) -> Dict[str, str]:
+    """
+    Rule-based specialist and timeline for the identified problem.
     """
 
     p = problem.lower()
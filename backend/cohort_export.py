@@ -0,0 +1,332 @@
+"""
+cohort_export.py
+
+ROLE
+----
+Columnar export of processed reports for cohort analytics.
+
+Pipeline outputs (process_pdf extraction + generate_full_care_plan)
+are nested dicts of display strings. This module flattens them into
+one row per report with a STABLE schema:
+
+- patient age / gender (name only when include_names=True)
+- summary_data fields
+- identified_problem, its canonical condition and ICD-10 code
+- numeric cost ranges: "₹1,50,000 – ₹3,00,000 per day" becomes
+  cost_<item>_min_inr / _max_inr / _unit
+- appointment urgency, specialist and timeline
+
+Rows are written in batches to Parquet (or Arrow IPC for ".arrow"
+paths) so exports of any size stream with bounded memory.
+
+USAGE
+-----
+    python -m backend.cohort_export cohort.parquet
+    python -m backend.cohort_export cohort.parquet --db data/results.db --since 2026-01-01
+
+NOTE
+----
+pyarrow is imported lazily; flatten_record() works without it.
+"""
+
+import argparse
+import re
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Tuple
+
+from backend.planner import canonical_condition
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+DEFAULT_BATCH_ROWS = 10_000
+
+COST_ITEMS = (
+    "consultation",
+    "investigations",
+    "medications",
+    "follow_up_cost",
+    "emergency_care",
+    "procedures",
+    "icu_charges",
+)
+
+SUMMARY_FIELDS = ("chief_complaint", "final_diagnosis", "ecg_findings", "risk_factors")
+
+APPOINTMENT_FIELDS = ("urgency", "specialist", "recommended_timeline")
+
+_AMOUNT = re.compile(r"₹\s*([\d,]+(?:\.\d+)?)")
+_UNIT = re.compile(r"\bper\s+(\w+)", re.I)
+_AGE = re.compile(r"\d{1,3}")
+
+
+# =====================================================
+# FLATTENING (NO PYARROW NEEDED)
+# =====================================================
+def parse_cost_range(value) -> Tuple[Optional[int], Optional[int], Optional[str]]:
+    """
+    Parse a rupee range such as "₹500 – ₹1,200 per month".
+
+    Returns:
+        (min_inr, max_inr, unit): None where the text has no amount
+        (e.g. "Depends on confirmed diagnosis"); unit is "month",
+        "visit", "day" or None for one-off costs
+    """
+
+    text = str(value or "")
+    amounts = [int(float(a.replace(",", ""))) for a in _AMOUNT.findall(text)]
+    if not amounts:
+        return None, None, None
+
+    unit = _UNIT.search(text)
+    return min(amounts), max(amounts), unit.group(1).lower() if unit else None
+
+
+def _parse_age(value) -> Optional[int]:
+    match = _AGE.search(str(value or ""))
+    return int(match.group()) if match else None
+
+
+def flatten_record(
+    extraction: dict,
+    plan: dict,
+    pdf_sha256: Optional[str] = None,
+    created_at: Optional[float] = None,
+    include_names: bool = False
+) -> dict:
+    """
+    Flatten one report into a row matching cohort_schema().
+
+    Args:
+        extraction (dict): process_pdf() output
+        plan (dict): generate_full_care_plan() output
+        pdf_sha256 (str): content hash, when known
+        created_at (float): unix timestamp of the analysis
+        include_names (bool): keep the patient name column filled
+
+    Returns:
+        dict: flat row
+    """
+
+    details = extraction.get("details", {})
+    summary = extraction.get("summary_data", {})
+    problem = plan.get("identified_problem", "")
+    cost = plan.get("estimated_cost", {})
+    appointment = plan.get("appointment", {})
+
+    row = {
+        "pdf_sha256": pdf_sha256,
+        "created_at": (
+            datetime.fromtimestamp(created_at, tz=timezone.utc) if created_at else None
+        ),
+        "patient_name": str(details.get("name", "")) if include_names else None,
+        "age": _parse_age(details.get("age")),
+        "gender": str(details.get("gender", "")),
+    }
+
+    for name in SUMMARY_FIELDS:
+        row[name] = str(summary.get(name, ""))
+
+    row["identified_problem"] = str(problem)
+    row["condition"] = canonical_condition(problem)
+
+    code = plan.get("diagnosis_code") or {}
+    row["icd10_code"] = code.get("code")
+    row["icd10_confidence"] = code.get("confidence")
+
+    for item in COST_ITEMS:
+        low, high, unit = parse_cost_range(cost.get(item))
+        row[f"cost_{item}_min_inr"] = low
+        row[f"cost_{item}_max_inr"] = high
+        row[f"cost_{item}_unit"] = unit
+
+    for name in APPOINTMENT_FIELDS:
+        row[name] = str(appointment.get(name, ""))
+
+    return row
+
+
+# =====================================================
+# SCHEMA / WRITER (PYARROW)
+# =====================================================
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "Cohort export needs pyarrow. Install it with: pip install pyarrow"
+        ) from e
+    return pyarrow
+
+
+def cohort_schema():
+    """
+    Arrow schema of flatten_record() rows (column order is fixed).
+
+    Low-cardinality text columns stay plain strings: Parquet
+    dictionary-encodes them on disk, and Arrow IPC files cannot
+    change a dictionary between batches.
+    """
+
+    pa = _pyarrow()
+    fields = [
+        pa.field("pdf_sha256", pa.string()),
+        pa.field("created_at", pa.timestamp("ms", tz="UTC")),
+        pa.field("patient_name", pa.string()),
+        pa.field("age", pa.int16()),
+        pa.field("gender", pa.string()),
+    ]
+    fields += [pa.field(name, pa.string()) for name in SUMMARY_FIELDS]
+    fields += [
+        pa.field("identified_problem", pa.string()),
+        pa.field("condition", pa.string()),
+        pa.field("icd10_code", pa.string()),
+        pa.field("icd10_confidence", pa.float32()),
+    ]
+    for item in COST_ITEMS:
+        fields += [
+            pa.field(f"cost_{item}_min_inr", pa.int64()),
+            pa.field(f"cost_{item}_max_inr", pa.int64()),
+            pa.field(f"cost_{item}_unit", pa.string()),
+        ]
+    fields += [pa.field(name, pa.string()) for name in APPOINTMENT_FIELDS]
+    return pa.schema(fields)
+
+
+class CohortWriter:
+    """
+    Batched Parquet / Arrow IPC writer for flattened rows.
+
+    Use as a context manager; rows are buffered and written as one
+    record batch (Parquet row group) every `batch_rows` rows.
+    """
+
+    def __init__(self, path: str, batch_rows: int = DEFAULT_BATCH_ROWS):
+        pa = _pyarrow()
+        self.path = path
+        self.batch_rows = batch_rows
+        self.schema = cohort_schema()
+        self.rows_written = 0
+        self._rows: List[dict] = []
+
+        if path.endswith((".arrow", ".feather", ".ipc")):
+            self._writer = pa.ipc.new_file(path, self.schema)
+        else:
+            self._writer = pa.parquet.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, row: dict) -> None:
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_rows:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._rows:
+            return
+        pa = _pyarrow()
+        batch = pa.RecordBatch.from_pylist(self._rows, schema=self.schema)
+        self._writer.write_batch(batch)
+        self.rows_written += len(self._rows)
+        self._rows = []
+
+    def close(self) -> None:
+        self._flush()
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+# =====================================================
+# EXPORTS
+# =====================================================
+def export_records(
+    records: Iterable[dict],
+    path: str,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    include_names: bool = False
+) -> int:
+    """
+    Export an iterable of {"extraction", "plan"[, "pdf_sha256",
+    "created_at"]} dicts (e.g. ResultStore rows).
+
+    Returns:
+        int: rows written
+    """
+
+    with CohortWriter(path, batch_rows) as writer:
+        for record in records:
+            writer.write(flatten_record(
+                record["extraction"],
+                record["plan"],
+                pdf_sha256=record.get("pdf_sha256"),
+                created_at=record.get("created_at"),
+                include_names=include_names,
+            ))
+    return writer.rows_written
+
+
+def export_result_store(
+    path: str,
+    store=None,
+    since: Optional[float] = None,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    include_names: bool = False
+) -> int:
+    """
+    Stream every stored result (optionally since a unix timestamp)
+    into a columnar file.
+    """
+
+    if store is None:
+        from backend.result_store import get_result_store
+        store = get_result_store()
+    if store is None:
+        raise ValueError("Result store is disabled (RESULT_STORE_PATH is not set)")
+
+    return export_records(
+        store.iter_results(since=since),
+        path,
+        batch_rows=batch_rows,
+        include_names=include_names,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export analyzed reports for cohort analytics")
+    parser.add_argument("output", help=".parquet (default) or .arrow file")
+    parser.add_argument("--db", help="result store path (default: RESULT_STORE_PATH)")
+    parser.add_argument("--since", help="only reports analyzed on/after this ISO date")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS)
+    parser.add_argument("--include-names", action="store_true", help="keep patient names")
+    args = parser.parse_args()
+
+    store = None
+    if args.db:
+        from backend.result_store import ResultStore
+        store = ResultStore(args.db)
+
+    since = None
+    if args.since:
+        since_dt = datetime.fromisoformat(args.since)
+        if since_dt.tzinfo is None:
+            since_dt = since_dt.replace(tzinfo=timezone.utc)
+        since = since_dt.timestamp()
+
+    rows = export_result_store(
+        args.output,
+        store=store,
+        since=since,
+        batch_rows=args.batch_rows,
+        include_names=args.include_names,
+    )
+    print(f"Wrote {rows} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+deadline.py
+
+ROLE
+----
+Request-level time budget split across pipeline stages.
+
+DESIGN
+------
+- A Deadline owns the total budget for one request
+- Each stage gets a share of whatever time is LEFT, so time saved
+  by a fast stage rolls over to the later ones
+- Stages run on a shared worker pool and are abandoned (not killed)
+  when they overrun; Python threads cannot be interrupted, so a
+  timed-out stage finishes in the background and its result is
+  discarded
+
+SATURATION
+----------
+An abandoned stage keeps its worker until it really finishes. Each
+submitted stage holds one of STAGE_WORKERS slots until then; when all
+slots are taken, run_with_timeout raises StageTimeout immediately
+instead of queueing behind stuck work, so the caller degrades within
+its budget. saturation() reports slot usage.
+"""
+
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Dict, Optional
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+DEFAULT_REQUEST_BUDGET_S = 20.0
+
+# Relative share of the remaining budget per stage
+STAGE_SHARES: Dict[str, float] = {
+    "extraction": 0.55,
+    "rag_write": 0.05,
+    "rag_query": 0.10,
+    "care_plan": 0.30,
+}
+
+STAGE_WORKERS = 16
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=STAGE_WORKERS, thread_name_prefix="stage")
+
+# One slot per worker, released when the stage actually finishes
+_SLOTS = threading.BoundedSemaphore(STAGE_WORKERS)
+_IN_FLIGHT = [0]
+_IN_FLIGHT_LOCK = threading.Lock()
+
+
+class StageTimeout(TimeoutError):
+    """Raised when a stage does not finish within its time slice."""
+
+
+class Deadline:
+    """
+    Time budget for one request.
+    """
+
+    def __init__(
+        self,
+        budget_s: float = DEFAULT_REQUEST_BUDGET_S,
+        shares: Optional[Dict[str, float]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.budget_s = budget_s
+        self._clock = clock
+        self._started = clock()
+        self._pending = dict(shares if shares is not None else STAGE_SHARES)
+
+    def elapsed(self) -> float:
+        return self._clock() - self._started
+
+    def remaining(self) -> float:
+        return max(0.0, self.budget_s - self.elapsed())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def stage_timeout(self, stage: str) -> float:
+        """
+        Seconds available for `stage`: its share of the remaining
+        budget relative to the stages that have not run yet.
+        """
+
+        share = self._pending.pop(stage, 0.0)
+        total = share + sum(self._pending.values())
+        if total <= 0:
+            return self.remaining()
+        return self.remaining() * share / total
+
+
+def run_with_timeout(fn: Callable, timeout: float, *args, **kwargs):
+    """
+    Run fn on the stage pool and wait at most `timeout` seconds.
+
+    Exceptions raised by fn propagate unchanged.
+
+    Raises:
+        StageTimeout if fn has not finished in time, or at once when
+        every worker is busy (see SATURATION).
+    """
+
+    if timeout <= 0:
+        raise StageTimeout("no time left in request budget")
+
+    if not _SLOTS.acquire(blocking=False):
+        raise StageTimeout("stage pool saturated")
+
+    with _IN_FLIGHT_LOCK:
+        _IN_FLIGHT[0] += 1
+
+    def release(_future):
+        with _IN_FLIGHT_LOCK:
+            _IN_FLIGHT[0] -= 1
+        _SLOTS.release()
+
+    # Copy contextvars (e.g. LLM report / session scopes) into the worker
+    future = _EXECUTOR.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+    future.add_done_callback(release)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        future.cancel()
+        raise StageTimeout(f"stage exceeded {timeout:.2f}s") from None
+
+
+def saturation() -> dict:
+    """
+    Stage pool usage: {"in_flight", "workers"}.
+    """
+    with _IN_FLIGHT_LOCK:
+        return {"in_flight": _IN_FLIGHT[0], "workers": STAGE_WORKERS}
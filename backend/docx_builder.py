@@ -0,0 +1,67 @@
+"""
+docx_builder.py
+
+ROLE
+----
+Render the format-neutral treatment plan report (report_model.py)
+to a Word document with python-docx.
+"""
+
+from docx import Document
+from docx.shared import Pt, RGBColor
+
+from backend.report_model import ItemGroup, KeyValues, ReportDocument, TextBlock
+
+HEADING_COLOR = RGBColor(0x00, 0x33, 0x66)
+
+
+def render_docx(document: ReportDocument, file_name: str) -> str:
+    """
+    Render a report model to DOCX.
+
+    Returns:
+        str: generated DOCX filename
+    """
+
+    doc = Document()
+    doc.styles["Normal"].font.size = Pt(10)
+
+    title = doc.add_heading(document.title, level=0)
+    title.alignment = 1   # centered
+    _color(title)
+
+    generated = doc.add_paragraph()
+    generated.add_run("Generated on: ").bold = True
+    generated.add_run(document.generated_on.strftime("%d %B %Y, %I:%M %p"))
+
+    for section in document.sections:
+        _color(doc.add_heading(section.title, level=1))
+
+        for block in section.blocks:
+            if isinstance(block, KeyValues) and block.as_table:
+                table = doc.add_table(rows=0, cols=2)
+                table.style = "Table Grid"
+                for label, value in block.rows:
+                    cells = table.add_row().cells
+                    cells[0].text = label
+                    cells[1].text = value
+            elif isinstance(block, KeyValues):
+                for label, value in block.rows:
+                    p = doc.add_paragraph()
+                    p.add_run(f"{label}: ").bold = True
+                    p.add_run(value)
+            elif isinstance(block, ItemGroup):
+                doc.add_heading(block.title, level=2)
+                for item in block.items:
+                    doc.add_paragraph(item, style="List Bullet")
+            elif isinstance(block, TextBlock):
+                p = doc.add_paragraph()
+                p.add_run(block.text).italic = block.italic
+
+    doc.save(file_name)
+    return file_name
+
+
+def _color(heading) -> None:
+    for run in heading.runs:
+        run.font.color.rgb = HEADING_COLOR
@@ -16,34 +16,139 @@ FEATURES
   • Chief complaint
   • Final diagnosis
   • ECG findings
+  • Risk factors
 - Raises clean warning for scanned PDFs
+- Pluggable text engines, fastest first (see pdf_engines.py)
+- Caches extracted text per page (see page_cache.py)
 """
 
 import re
 import io
+import logging
+import mmap
+import os
+import time
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional, Union
+
 from pypdf import PdfReader
 
+from backend.page_cache import get_page_cache, page_hash
+from backend.pdf_engines import engine_chain
+from backend.prompts import find_relevant_spans
+
+logger = logging.getLogger(__name__)
+
+
+# =====================================================
+# PDF SOURCES (BYTES, PATHS, FILE OBJECTS)
+# =====================================================
+PdfSource = Union[bytes, bytearray, str, os.PathLike, BinaryIO]
+
+
+@contextmanager
+def open_pdf_source(source: PdfSource) -> Iterator[BinaryIO]:
+    """
+    Yield a seekable binary stream for any supported PDF source
+    without copying the document:
+    - bytes are wrapped in a BytesIO
+    - paths are memory-mapped
+    - file-like objects are rewound and used directly
+    """
+
+    if isinstance(source, (bytes, bytearray)):
+        yield io.BytesIO(source)
+        return
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield f
+                return
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield mapped
+            finally:
+                mapped.close()
+        return
+
+    source.seek(0)
+    yield source
+
 
 # =====================================================
 # TEXT EXTRACTION (DIGITAL PDFs ONLY)
 # =====================================================
-def extract_text(pdf_bytes: bytes) -> str:
+def _extract_with_engine(engine, stream: BinaryIO, reader, hashes: list) -> Optional[str]:
     """
-    Extract text from a digitally generated PDF.
-    OCR is intentionally NOT used (Streamlit Cloud safe).
+    Extract all pages with one engine, using the page cache.
+
+    Returns None when the engine fails on any page: partial text is
+    discarded so the next engine in the chain gets the document.
     """
-    text = ""
+    cache = get_page_cache()
+    parts = []
+    document = None
+    i = 0
 
     try:
-        reader = PdfReader(io.BytesIO(pdf_bytes))
-        for page in reader.pages:
-            page_text = page.extract_text()
+        for i, h in enumerate(hashes):
+            key = f"{engine.name}:{h}"
+            page_text = cache.get(key)
+            if page_text is None:
+                if document is None:
+                    document = engine.open(stream, reader)
+                page_text = document.page_text(i)
+                cache.put(key, page_text)
             if page_text:
-                text += page_text + "\n"
+                parts.append(page_text + "\n")
     except Exception:
-        pass
+        logger.warning(
+            "PDF engine %s failed on page %d; trying the next engine",
+            engine.name, i + 1, exc_info=True,
+        )
+        return None
+    finally:
+        if document is not None:
+            document.close()
+
+    return "".join(parts).strip()
+
+
+def extract_text(source: PdfSource, document_type: str = "default") -> str:
+    """
+    Extract text from a digitally generated PDF.
+    OCR is intentionally NOT used (Streamlit Cloud safe).
+
+    source may be bytes, a file path or a binary file object; the
+    readers work from it directly (see open_pdf_source).
+
+    Engines are tried in the order configured for the document type
+    (pdf_engines.ENGINE_CHAINS): the fast engine first, slower
+    engines only when no clinical section headers are found or the
+    previous engine failed. Pages already seen (same content hash)
+    are served from the page cache, so re-uploads of amended bundles
+    only parse the new or changed pages.
+    """
+    with open_pdf_source(source) as stream:
+        try:
+            reader = PdfReader(stream)
+            memo = {}
+            hashes = [page_hash(page, memo) for page in reader.pages]
+        except Exception:
+            return ""
+
+        best = ""
+        for engine in engine_chain(document_type):
+            text = _extract_with_engine(engine, stream, reader, hashes)
+            if text is None:
+                continue
+            if find_relevant_spans(text):
+                return text
+            if len(text) > len(best):
+                best = text
 
-    return text.strip()
+        return best
 
 
 # =====================================================
@@ -96,18 +201,36 @@ def extract_ecg_findings(text: str) -> str:
     return m.group(2).strip() if m else "Not mentioned"
 
 
+def extract_risk_factors(text: str) -> str:
+    m = re.search(
+        r"(Risk Factors|Past History|Comorbidities)\s*[:\-]?\s*(.*?)(\n\n|$)",
+        text,
+        re.I | re.S
+    )
+    return m.group(2).strip() if m else "Not mentioned"
+
+
 # =====================================================
 # MAIN PIPELINE FUNCTION
 # =====================================================
-def process_pdf(pdf_bytes: bytes) -> dict:
+def process_pdf(source: PdfSource, document_type: str = "default") -> dict:
     """
     Main entry point for PDF processing.
 
+    source may be bytes, a file path or a binary file object.
+
+    document_type selects the text engine chain (pdf_engines.py).
+
+    The result carries "timings": {"pdf_text", "structured"} so PDF
+    parsing and structured extraction can be reported separately.
+
     Raises:
         ValueError if PDF appears to be scanned.
     """
 
-    text = extract_text(pdf_bytes)
+    started = time.perf_counter()
+    text = extract_text(source, document_type)
+    pdf_text_s = time.perf_counter() - started
 
     # 🚨 HYBRID DETECTION LOGIC
     if len(text.strip()) < 100:
@@ -116,12 +239,28 @@ def process_pdf(pdf_bytes: bytes) -> dict:
             "Please upload a text-based (digitally generated) diagnostic report."
         )
 
+    started = time.perf_counter()
+    extraction = process_text(text)
+    extraction["timings"] = {
+        "pdf_text": pdf_text_s,
+        "structured": time.perf_counter() - started,
+    }
+    return extraction
+
+
+def process_text(text: str) -> dict:
+    """
+    Structured extraction from already-extracted report text
+    (used by process_pdf and by journal replay).
+    """
+
     patient_details = extract_patient_details(text)
 
     summary_data = {
         "chief_complaint": extract_chief_complaint(text),
         "final_diagnosis": extract_final_diagnosis(text),
         "ecg_findings": extract_ecg_findings(text),
+        "risk_factors": extract_risk_factors(text),
         "clinical_summary": text[:2000]
     }
 
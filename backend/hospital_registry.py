@@ -6,8 +6,13 @@ Purpose:
 - Support city-based selection
 - Provide booking websites, OPD fee, Google Maps links
 - Enable cost alignment via hospital tier
+- Answer nearest-hospital queries from local coordinates (KD-tree)
 """
 
+import heapq
+import math
+from typing import Dict, List, Optional, Tuple
+
 # =====================================================
 # HOSPITAL REGISTRY DATA
 # =====================================================
@@ -17,6 +22,9 @@ HOSPITAL_REGISTRY = {
             "display_name": "Apollo Hospitals, Bangalore",
             "tier": "premium",
             "cost_multiplier": 1.25,
+            "latitude": 12.8958,
+            "longitude": 77.5984,
+            "specialists": ["Cardiologist", "Endocrinologist", "General Physician"],
             "opd_fee": "₹800 – ₹1,200",
             "logo": "https://upload.wikimedia.org/wikipedia/commons/5/5c/Apollo_Hospitals_Logo.svg",
             "google_maps": "https://www.google.com/maps/search/Apollo+Hospitals+Bangalore",
@@ -31,6 +39,9 @@ HOSPITAL_REGISTRY = {
             "display_name": "Fortis Hospital, Bangalore",
             "tier": "premium",
             "cost_multiplier": 1.15,
+            "latitude": 12.8944,
+            "longitude": 77.5986,
+            "specialists": ["Cardiologist", "Endocrinologist", "General Physician"],
             "opd_fee": "₹700 – ₹1,000",
             "logo": "https://upload.wikimedia.org/wikipedia/en/8/8a/Fortis_Healthcare_logo.svg",
             "google_maps": "https://www.google.com/maps/search/Fortis+Hospital+Bangalore",
@@ -44,6 +55,9 @@ HOSPITAL_REGISTRY = {
             "display_name": "Manipal Hospital, Bangalore",
             "tier": "standard",
             "cost_multiplier": 1.0,
+            "latitude": 12.9591,
+            "longitude": 77.6484,
+            "specialists": ["Cardiologist", "Endocrinologist", "General Physician"],
             "opd_fee": "₹500 – ₹800",
             "logo": "https://upload.wikimedia.org/wikipedia/commons/3/3c/Manipal_Hospitals_logo.png",
             "google_maps": "https://www.google.com/maps/search/Manipal+Hospital+Bangalore",
@@ -57,6 +71,9 @@ HOSPITAL_REGISTRY = {
             "display_name": "Narayana Health, Bangalore",
             "tier": "standard",
             "cost_multiplier": 0.9,
+            "latitude": 12.8121,
+            "longitude": 77.6936,
+            "specialists": ["Cardiologist", "General Physician"],
             "opd_fee": "₹400 – ₹700",
             "logo": "https://upload.wikimedia.org/wikipedia/en/3/3f/Narayana_Health_logo.svg",
             "google_maps": "https://www.google.com/maps/search/Narayana+Health+Bangalore",
@@ -112,3 +129,222 @@ def get_fallback_hospitals(city: str, limit: int = 2):
     city = city.lower()
     hospitals = list(HOSPITAL_REGISTRY.get(city, {}).values())
     return hospitals[:limit]
+
+
+def city_centres() -> Dict[str, Tuple[float, float]]:
+    """
+    Mean hospital coordinates per registry city, used as the patient
+    location when only a city is known.
+
+    Returns:
+        dict: city → (latitude, longitude)
+    """
+    centres = {}
+    for city, hospitals in HOSPITAL_REGISTRY.items():
+        points = [
+            (h["latitude"], h["longitude"])
+            for h in hospitals.values()
+            if "latitude" in h and "longitude" in h
+        ]
+        if points:
+            centres[city] = (
+                round(sum(p[0] for p in points) / len(points), 4),
+                round(sum(p[1] for p in points) / len(points), 4),
+            )
+    return centres
+
+
+# =====================================================
+# SPATIAL INDEX (NEAREST HOSPITAL SEARCH)
+# =====================================================
+EARTH_RADIUS_KM = 6371.0088
+
+
+def _to_unit_vector(latitude: float, longitude: float) -> Tuple[float, float, float]:
+    """
+    Project latitude / longitude onto the unit sphere.
+
+    Straight-line (chord) distance between unit vectors grows
+    monotonically with great-circle distance, so a plain Euclidean
+    KD-tree in 3D returns the geographically nearest hospitals.
+    """
+    lat = math.radians(latitude)
+    lon = math.radians(longitude)
+    return (
+        math.cos(lat) * math.cos(lon),
+        math.cos(lat) * math.sin(lon),
+        math.sin(lat),
+    )
+
+
+def _chord_to_km(chord: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def _km_to_chord(km: float) -> float:
+    return 2 * math.sin(min(math.pi, km / EARTH_RADIUS_KM) / 2)
+
+
+class _KDNode:
+    __slots__ = ("point", "hospital", "axis", "left", "right")
+
+    def __init__(self, point, hospital, axis, left, right):
+        self.point = point
+        self.hospital = hospital
+        self.axis = axis
+        self.left = left
+        self.right = right
+
+
+def _build_kdtree(items: List[Tuple[Tuple[float, float, float], dict]], depth: int = 0):
+    if not items:
+        return None
+
+    axis = depth % 3
+    items.sort(key=lambda item: item[0][axis])
+    mid = len(items) // 2
+
+    return _KDNode(
+        point=items[mid][0],
+        hospital=items[mid][1],
+        axis=axis,
+        left=_build_kdtree(items[:mid], depth + 1),
+        right=_build_kdtree(items[mid + 1:], depth + 1),
+    )
+
+
+class HospitalIndex:
+    """
+    KD-tree over every hospital in the registry that has coordinates.
+
+    Built once from local data; queries never touch the network.
+    """
+
+    def __init__(self, registry: Dict[str, Dict[str, dict]]):
+        items = []
+        for city, hospitals in registry.items():
+            for key, data in hospitals.items():
+                if "latitude" not in data or "longitude" not in data:
+                    continue
+                hospital = dict(data, key=key, city=city)
+                point = _to_unit_vector(data["latitude"], data["longitude"])
+                items.append((point, hospital))
+
+        self.size = len(items)
+        self._root = _build_kdtree(items)
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int = 3,
+        tier: Optional[str] = None,
+        specialist: Optional[str] = None,
+        radius_km: Optional[float] = None,
+    ) -> List[dict]:
+        """
+        Return the k nearest hospitals matching the filters.
+
+        Args:
+            latitude (float): Patient latitude
+            longitude (float): Patient longitude
+            k (int): Maximum number of hospitals to return
+            tier (str): Restrict to a hospital tier ("premium", "standard")
+            specialist (str): Restrict to hospitals offering this specialist
+            radius_km (float): Ignore hospitals further than this
+
+        Returns:
+            list: Hospital metadata dicts (nearest first), each with an
+            added "distance_km" field
+        """
+        if k <= 0 or self._root is None:
+            return []
+
+        target = _to_unit_vector(latitude, longitude)
+        tier = tier.lower() if tier else None
+        specialist = specialist.lower() if specialist else None
+        bound = _km_to_chord(radius_km) if radius_km is not None else math.inf
+
+        # Max-heap of (-distance, tie-breaker, hospital) holding the best k
+        best: List[Tuple[float, int, dict]] = []
+
+        def accepts(hospital: dict) -> bool:
+            if tier and hospital.get("tier", "").lower() != tier:
+                return False
+            if specialist and not any(
+                specialist in s.lower() for s in hospital.get("specialists", [])
+            ):
+                return False
+            return True
+
+        def search(node: Optional[_KDNode]) -> None:
+            nonlocal bound
+            if node is None:
+                return
+
+            dist = math.dist(target, node.point)
+            if dist <= bound and accepts(node.hospital):
+                heapq.heappush(best, (-dist, id(node), node.hospital))
+                if len(best) > k:
+                    heapq.heappop(best)
+                if len(best) == k:
+                    bound = min(bound, -best[0][0])
+
+            diff = target[node.axis] - node.point[node.axis]
+            near, far = (node.left, node.right) if diff < 0 else (node.right, node.left)
+
+            search(near)
+            if abs(diff) <= bound:
+                search(far)
+
+        search(self._root)
+
+        results = []
+        for neg_dist, _, hospital in sorted(best, key=lambda item: -item[0]):
+            results.append(dict(hospital, distance_km=round(_chord_to_km(-neg_dist), 2)))
+        return results
+
+
+_HOSPITAL_INDEX: Optional[HospitalIndex] = None
+
+
+def get_hospital_index() -> HospitalIndex:
+    """
+    Return the shared spatial index, building it on first use.
+    """
+    global _HOSPITAL_INDEX
+    if _HOSPITAL_INDEX is None:
+        _HOSPITAL_INDEX = HospitalIndex(HOSPITAL_REGISTRY)
+    return _HOSPITAL_INDEX
+
+
+def find_nearest_hospitals(
+    latitude: float,
+    longitude: float,
+    k: int = 3,
+    tier: Optional[str] = None,
+    specialist: Optional[str] = None,
+    radius_km: Optional[float] = None,
+) -> List[dict]:
+    """
+    Find the k nearest hospitals of a tier offering a specialist.
+
+    Args:
+        latitude (float): Patient latitude
+        longitude (float): Patient longitude
+        k (int): Number of hospitals to return
+        tier (str): Optional hospital tier filter
+        specialist (str): Optional specialist filter
+        radius_km (float): Optional search radius in km
+
+    Returns:
+        list: Hospital metadata with "distance_km", nearest first
+    """
+    return get_hospital_index().nearest(
+        latitude,
+        longitude,
+        k=k,
+        tier=tier,
+        specialist=specialist,
+        radius_km=radius_km,
+    )
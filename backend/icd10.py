@@ -0,0 +1,469 @@
+"""
+icd10.py
+
+ROLE
+----
+Normalize free-text diagnoses to ICD-10 codes.
+
+final_diagnosis is free text ("Acute anterior wall STEMI",
+"T2DM - uncontrolled"). normalize_diagnosis() maps it to a local
+ICD-10 code table (data/icd10_codes.tsv) and returns
+(code, canonical name, confidence, method).
+
+MATCHING (first hit wins)
+-------------------------
+1. exact  : whole text equals a code name / synonym     confidence 1.0
+2. trie   : longest name / synonym contained in the text,
+            via a token-level prefix trie                0.70 – 0.95
+3. fuzzy  : single-edit typos in long tokens ("infraction",
+            "diabetis") corrected against the vocabulary, then
+            the exact phrase map and the trie again         0.80 – 0.90
+
+Fuzzy correction is deliberately narrow: only tokens of at least
+MIN_FUZZY_TOKEN_LEN characters, one edit (insert, delete, substitute
+or transpose) away from a vocabulary word, and never ordinary report
+words (_COMMON_WORDS: "impression", "progression", section headers).
+Fuzzy matches below MIN_FUZZY_CONFIDENCE are dropped, not reported.
+
+NEGATION
+--------
+Steps 2 and 3 skip negated spans (NegEx-style): tokens within
+NEGATION_WINDOW tokens after a trigger ("no", "denies", "negative
+for", "no evidence of", "ruled out", "without", ...) or before a
+post-trigger ("... was ruled out", "... excluded") cannot match.
+Scopes end at clause breaks (. ; : newline, "but", "however").
+"No evidence of myocardial infarction" therefore maps to nothing,
+while "T2DM, no retinopathy" still maps to E11.9. Exact matches run
+first, so code names such as "... without complications" still hit.
+
+INDEX
+-----
+The TSV is compiled into a pickle (data/icd10_index.pickle) holding
+the phrase map, trie, token index and vocabulary. It is reused while
+the TSV hash matches and rebuilt automatically when the table changes.
+Lookups are memoized (lru_cache), so repeated diagnoses cost a dict
+hit; uncached trie lookups take microseconds.
+"""
+
+import difflib
+import hashlib
+import itertools
+import os
+import pickle
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+ICD10_TABLE = os.path.join("data", "icd10_codes.tsv")
+ICD10_INDEX = os.path.join("data", "icd10_index.pickle")
+
+INDEX_VERSION = 1
+
+FUZZY_TOKEN_CUTOFF = 0.8      # difflib ratio for correction candidates
+MIN_FUZZY_TOKEN_LEN = 6       # short tokens / abbreviations are never "corrected"
+MIN_FUZZY_CONFIDENCE = 0.8    # weaker fuzzy matches return None
+MAX_FUZZY_VARIANTS = 16       # corrected token combinations tried
+MAX_MEMOIZED_CORRECTIONS = 50_000
+
+_STOPWORDS = {
+    "a", "an", "and", "the", "of", "with", "without", "in", "on", "to",
+    "for", "due", "likely", "known", "case", "secondary", "h", "o",
+}
+
+# Report vocabulary that is one or two edits from a disease term
+# ("impression" / "depression") and must never be corrected
+_COMMON_WORDS = {
+    "impression", "impressions", "regression", "progression", "expression",
+    "suppression", "compression", "digression", "procession", "profession",
+    "history", "findings", "finding", "diagnosis", "diagnoses", "summary",
+    "examination", "investigation", "investigations", "complaint", "complaints",
+    "treatment", "medication", "medications", "advice", "discharge", "admission",
+    "remarks", "report", "reports", "patient", "clinical", "pending", "review",
+    "reviewed", "notes", "normal", "abnormal", "stable", "improved", "follow",
+    "disease", "condition", "present", "absent", "positive", "negative",
+    "hypertensive", "diabetic", "cardiac", "respiratory", "infection",
+}
+
+_NO_DIAGNOSIS = {"", "not mentioned", "pending", "n/a", "na", "nil"}
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+NEGATION_WINDOW = 6   # tokens in a trigger's scope
+
+_PRE_NEGATION = {
+    ("no",), ("not",), ("denies",), ("denied",), ("denying",), ("without",),
+    ("negative", "for"), ("no", "evidence", "of"), ("no", "signs", "of"),
+    ("no", "sign", "of"), ("absence", "of"), ("free", "of"), ("ruled", "out"),
+}
+_POST_NEGATION = {("ruled", "out"), ("excluded",), ("unlikely",)}
+# Look like triggers but do not negate ("MI not ruled out")
+_PSEUDO_NEGATION = {
+    ("not", "ruled", "out"), ("cannot", "be", "ruled", "out"), ("cannot", "rule", "out"),
+    ("not", "excluded"), ("no", "change"), ("no", "increase"), ("not", "only"),
+}
+_MAX_TRIGGER = max(len(t) for t in _PRE_NEGATION | _POST_NEGATION | _PSEUDO_NEGATION)
+
+_CLAUSE_BREAK = re.compile(r"[.;:\n]+|\b(?:but|however|although|except)\b", re.I)
+
+_END = None   # trie key marking a complete phrase
+
+
+class DiagnosisCode(NamedTuple):
+    code: str
+    name: str
+    confidence: float
+    method: str   # "exact" | "trie" | "fuzzy"
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _NON_WORD.split((text or "").lower()) if t]
+
+
+def _trigger_at(tokens: List[str], i: int, triggers: set) -> int:
+    """
+    Length of the longest trigger starting at tokens[i] (0 if none).
+    """
+    for n in range(min(_MAX_TRIGGER, len(tokens) - i), 0, -1):
+        if tuple(tokens[i:i + n]) in triggers:
+            return n
+    return 0
+
+
+def scope_negations(text: str) -> List[Optional[str]]:
+    """
+    Tokens of text with negated tokens (and triggers) replaced by
+    None; clauses are separated by None so no phrase spans them.
+    """
+
+    scoped: List[Optional[str]] = []
+    for clause in _CLAUSE_BREAK.split(text or ""):
+        tokens = tokenize(clause)
+        negated = [False] * len(tokens)
+        i = 0
+        while i < len(tokens):
+            n = _trigger_at(tokens, i, _PSEUDO_NEGATION)
+            if n:
+                i += n
+                continue
+            n = _trigger_at(tokens, i, _POST_NEGATION)
+            if n:
+                for j in range(max(0, i - NEGATION_WINDOW), i + n):
+                    negated[j] = True
+                i += n
+                continue
+            n = _trigger_at(tokens, i, _PRE_NEGATION)
+            if n:
+                for j in range(i, min(len(tokens), i + n + NEGATION_WINDOW)):
+                    negated[j] = True
+                i += n
+                continue
+            i += 1
+        scoped.extend(None if neg else t for t, neg in zip(tokens, negated))
+        scoped.append(None)
+    return scoped
+
+
+def _single_edit(a: str, b: str) -> bool:
+    """
+    True when b is one insertion, deletion, substitution or adjacent
+    transposition away from a.
+    """
+
+    if a == b or abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        diff = [i for i in range(len(a)) if a[i] != b[i]]
+        if len(diff) == 1:
+            return True
+        return (
+            len(diff) == 2 and diff[1] == diff[0] + 1
+            and a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]]
+        )
+    short, long_ = (a, b) if len(a) < len(b) else (b, a)
+    i = 0
+    while i < len(short) and short[i] == long_[i]:
+        i += 1
+    return short[i:] == long_[i + 1:]
+
+
+# =====================================================
+# INDEX
+# =====================================================
+class Icd10Index:
+    """
+    Compiled ICD-10 lookup structures.
+
+    entries      : [(code, name)]
+    phrases      : normalized phrase → entry id
+    trie         : nested {token: {...}, None: (entry id, n_tokens)}
+    token_index  : token → (entry id, ...)
+    vocabulary   : sorted tokens (fuzzy correction candidates)
+    """
+
+    def __init__(self, entries, phrases, trie, token_index, vocabulary, source_sha256=""):
+        self.entries: List[Tuple[str, str]] = entries
+        self.phrases: Dict[str, int] = phrases
+        self.trie: dict = trie
+        self.token_index: Dict[str, Tuple[int, ...]] = token_index
+        self.vocabulary: List[str] = vocabulary
+        self.source_sha256 = source_sha256
+        self._vocabulary_set = set(vocabulary)
+        self._corrections: Dict[str, str] = {}
+
+    # ---------------- BUILD ----------------
+    @classmethod
+    def from_rows(cls, rows: List[Tuple[str, str, List[str]]], source_sha256: str = "") -> "Icd10Index":
+        entries = []
+        phrases: Dict[str, int] = {}
+        trie: dict = {}
+        token_index: Dict[str, set] = {}
+
+        for code, name, synonyms in rows:
+            entry = len(entries)
+            entries.append((code, name))
+
+            for phrase in [name] + synonyms:
+                tokens = tokenize(phrase)
+                if not tokens:
+                    continue
+                # First definition of a phrase wins (table order)
+                key = " ".join(tokens)
+                if key in phrases:
+                    continue
+                phrases[key] = entry
+
+                node = trie
+                for token in tokens:
+                    node = node.setdefault(token, {})
+                node[_END] = (entry, len(tokens))
+
+                for token in tokens:
+                    if token not in _STOPWORDS:
+                        token_index.setdefault(token, set()).add(entry)
+
+        return cls(
+            entries=entries,
+            phrases=phrases,
+            trie=trie,
+            token_index={t: tuple(sorted(ids)) for t, ids in token_index.items()},
+            vocabulary=sorted(token_index),
+            source_sha256=source_sha256,
+        )
+
+    # ---------------- LOOKUP ----------------
+    def _result(self, entry: int, confidence: float, method: str) -> DiagnosisCode:
+        code, name = self.entries[entry]
+        return DiagnosisCode(code, name, round(confidence, 3), method)
+
+    def _longest_match(self, tokens: List[Optional[str]]) -> Optional[Tuple[int, int]]:
+        """
+        Longest trie phrase contained in tokens → (entry, n_tokens).
+        None tokens (negated / clause breaks) never match. Ties go to
+        the earlier match.
+        """
+
+        best = None
+        for start in range(len(tokens)):
+            node = self.trie
+            for token in tokens[start:]:
+                if token is None:
+                    break
+                node = node.get(token)
+                if node is None:
+                    break
+                hit = node.get(_END)
+                if hit is not None and (best is None or hit[1] > best[1]):
+                    best = hit
+        return best
+
+    def _correct(self, token: Optional[str]) -> Tuple[Optional[str], ...]:
+        """
+        Vocabulary words one edit away from token ("diabetis" →
+        ("diabetic", "diabetes")), or (token,) when it is left as is.
+        """
+
+        if (
+            token is None
+            or token in self._vocabulary_set
+            or token in _COMMON_WORDS
+            or len(token) < MIN_FUZZY_TOKEN_LEN
+            or not token.isalpha()
+        ):
+            return (token,)
+
+        corrected = self._corrections.get(token)
+        if corrected is None:
+            candidates = difflib.get_close_matches(
+                token, self.vocabulary, n=3, cutoff=FUZZY_TOKEN_CUTOFF
+            )
+            corrected = tuple(c for c in candidates if _single_edit(token, c)) or (token,)
+            if len(self._corrections) < MAX_MEMOIZED_CORRECTIONS:
+                self._corrections[token] = corrected
+        return corrected
+
+    def lookup(self, text: str) -> Optional[DiagnosisCode]:
+        """
+        Map free text to an ICD-10 code (None when nothing matches).
+        """
+
+        tokens = tokenize(text)
+        if not tokens or " ".join(tokens) in _NO_DIAGNOSIS:
+            return None
+
+        # 1️⃣ Exact phrase
+        entry = self.phrases.get(" ".join(tokens))
+        if entry is not None:
+            return self._result(entry, 1.0, "exact")
+
+        # Negated spans take no part in partial matching
+        scoped = scope_negations(text)
+        kept = [t for t in scoped if t is not None]
+        if not kept:
+            return None
+        content = [t for t in kept if t not in _STOPWORDS] or kept
+
+        # 2️⃣ Longest contained phrase
+        hit = self._longest_match(scoped)
+        if hit is not None:
+            entry, matched = hit
+            coverage = min(1.0, matched / len(content))
+            return self._result(entry, 0.70 + 0.25 * coverage, "trie")
+
+        # 3️⃣ Single-edit typos corrected, then exact / trie again
+        options = [self._correct(t) for t in scoped]
+        if all(o == (t,) for o, t in zip(options, scoped)):
+            return None
+
+        best = None
+        for variant in itertools.islice(itertools.product(*options), MAX_FUZZY_VARIANTS):
+            entry = self.phrases.get(" ".join(filter(None, variant)))
+            if entry is not None:
+                return self._result(entry, 0.90, "fuzzy")
+            hit = self._longest_match(list(variant))
+            if hit is not None and (best is None or hit[1] > best[1]):
+                best = hit
+
+        if best is None:
+            return None
+        entry, matched = best
+        confidence = 0.65 + 0.20 * min(1.0, matched / len(content))
+        if confidence < MIN_FUZZY_CONFIDENCE:
+            return None
+        return self._result(entry, confidence, "fuzzy")
+
+
+# =====================================================
+# TABLE / PRECOMPILED INDEX
+# =====================================================
+def read_table(path: str) -> List[Tuple[str, str, List[str]]]:
+    """
+    Parse the code table: code <TAB> name <TAB> synonyms (|-separated).
+    Lines starting with "#" are comments.
+    """
+
+    rows = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            parts = line.split("\t")
+            code, name = parts[0].strip(), parts[1].strip()
+            synonyms = [s.strip() for s in parts[2].split("|")] if len(parts) > 2 else []
+            rows.append((code, name, [s for s in synonyms if s]))
+    return rows
+
+
+def _file_sha256(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_index(table_path: str = ICD10_TABLE, index_path: str = ICD10_INDEX) -> Icd10Index:
+    """
+    Load the precompiled index, rebuilding it when the table changed.
+    """
+
+    source_sha256 = _file_sha256(table_path)
+
+    try:
+        with open(index_path, "rb") as f:
+            version, data = pickle.load(f)
+        if version == INDEX_VERSION and data["source_sha256"] == source_sha256:
+            return Icd10Index(**data)
+    except (OSError, pickle.UnpicklingError, EOFError, KeyError, TypeError, ValueError):
+        pass
+
+    index = Icd10Index.from_rows(read_table(table_path), source_sha256)
+
+    data = {
+        "entries": index.entries,
+        "phrases": index.phrases,
+        "trie": index.trie,
+        "token_index": index.token_index,
+        "vocabulary": index.vocabulary,
+        "source_sha256": source_sha256,
+    }
+    try:
+        tmp = f"{index_path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump((INDEX_VERSION, data), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, index_path)
+    except OSError:
+        pass   # read-only deployment: keep the in-memory index
+
+    return index
+
+
+_INDEX: Optional[Icd10Index] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def configure_icd10(table_path: str = ICD10_TABLE, index_path: str = ICD10_INDEX) -> Icd10Index:
+    """
+    (Re)load the index from a table and clear memoized lookups.
+    """
+    global _INDEX
+    with _INDEX_LOCK:
+        _INDEX = load_index(table_path, index_path)
+        normalize_diagnosis.cache_clear()
+        return _INDEX
+
+
+def get_icd10_index() -> Icd10Index:
+    global _INDEX
+    if _INDEX is None:
+        with _INDEX_LOCK:
+            if _INDEX is None:
+                _INDEX = load_index()
+    return _INDEX
+
+
+# =====================================================
+# PUBLIC API
+# =====================================================
+@lru_cache(maxsize=16384)
+def normalize_diagnosis(text: str) -> Optional[DiagnosisCode]:
+    """
+    Map a free-text diagnosis to an ICD-10 code.
+
+    Args:
+        text (str): final_diagnosis / identified problem
+
+    Returns:
+        DiagnosisCode or None when nothing in the table matches
+    """
+
+    return get_icd10_index().lookup(text)
+
+
+def normalize_many(texts: List[str]) -> List[Optional[DiagnosisCode]]:
+    """
+    Batch form for backfills (shares the memo cache).
+    """
+
+    return [normalize_diagnosis(t or "") for t in texts]
@@ -0,0 +1,319 @@
+"""
+journal.py
+
+ROLE
+----
+Anonymized request journal for performance regression testing.
+
+Every pipeline run can append one JSON line with:
+- pdf_sha256 / text_sha256 : content hashes (no PDF is kept)
+- text_ref                 : extracted text with PHI scrubbed (see
+                             redact), stored once per text hash
+- summary / patient        : scrubbed summary fields, gender and an
+                             age band (no name, exact age or raw text)
+- problem, degraded stages and per-stage timings
+
+tools/replay.py re-runs a journal and diffs outputs and timings.
+
+CONFIGURATION
+-------------
+Disabled unless the JOURNAL_DIR environment variable is set (or
+configure_journal() is called). Writes are buffered and the JSONL
+file rotates at MAX_BYTES, keeping BACKUPS old files. Buffered
+records are written once FLUSH_EVERY are pending, and by a background
+daemon thread at most FLUSH_INTERVAL_S seconds after the last flush,
+so a quiet process does not hold records until exit.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+JOURNAL_FILE = "requests.jsonl"
+TEXT_DIR = "texts"
+
+FLUSH_EVERY = 20          # records
+FLUSH_INTERVAL_S = 5.0    # seconds since last flush
+MAX_BYTES = 10 * 1024 * 1024
+BACKUPS = 5
+
+REDACTED_NAME = "[PATIENT]"
+REDACTED_CLINICIAN = "[NAME]"
+
+# "N F" in this range is read as a temperature, not age and sex
+FAHRENHEIT_LOW = 93
+FAHRENHEIT_HIGH = 110
+
+_TITLE = r"mr|mrs|ms|miss|master|baby|smt|shri|sri"
+_CAPITALISED_NAME = r"[A-Z][A-Za-z'\-]*\.?(?:[ \t]+[A-Z][A-Za-z'\-]*\.?){0,3}"
+
+# Labelled values are scrubbed to the end of the value, wherever they
+# appear; the label itself is kept so the text stays parseable.
+_VALUE_END = r"(?=\s{2,}|\s*[|;,]|\s+(?:age|sex|gender|dob|mrn|uhid|id|ph|phone|mobile)\b|$)"
+
+_PHI_PATTERNS = [
+    # Emails
+    (re.compile(r"\b[\w.+-]+@[\w-]+(?:\.[\w-]+)+\b"), "[EMAIL]"),
+    # Names after a label ("Patient Name: John Doe  Age: 54")
+    (re.compile(
+        r"(\b(?:patient(?:'s)?\s+name|patient|name|pt\.?\s*name|guardian|attendant"
+        r"|next\s+of\s+kin|father(?:'s)?\s+name|husband(?:'s)?\s+name)\s*[:\-]\s*)"
+        r"(?:(?:" + _TITLE + r")\.?\s+)?[A-Za-z][A-Za-z .'\-]*?" + _VALUE_END,
+        re.I | re.M,
+    ), r"\1" + REDACTED_NAME),
+    # Unlabelled names after a title ("Patient Mrs Lakshmi Iyer presented",
+    # "Dr Arvind Kumar", "Consultant: Meena Rao"); the name itself must
+    # be capitalised so running text ("the patient was") is left alone
+    (re.compile(
+        r"(\b(?i:patient|pt)\.?\s+)(?i:" + _TITLE + r")\.?\s+" + _CAPITALISED_NAME
+    ), r"\1" + REDACTED_NAME),
+    (re.compile(
+        r"(\b(?i:dr|doctor|consultant|physician|surgeon|referred\s+by|attending)\b\.?\s*[:\-]?\s*)"
+        r"(?:(?i:" + _TITLE + r")\.?\s+)?" + _CAPITALISED_NAME
+    ), r"\1" + REDACTED_CLINICIAN),
+    # Addresses (rest of the line)
+    (re.compile(r"(\b(?:address|residence|addr)\s*[:\-]\s*).+$", re.I | re.M), r"\1[ADDRESS]"),
+    # Record / ID numbers
+    (re.compile(
+        r"(\b(?:mrn|uhid|mr\s*no|reg(?:istration)?\s*no|ip\s*no|op\s*no|patient\s*id"
+        r"|hospital\s*no|aadhaar(?:\s*no)?|id)\s*[:\-#.]?\s*)[A-Za-z0-9/\-]*\d[A-Za-z0-9/\-]*"
+        r"(?:[ \-]\d{3,}\b)*",   # grouped digits: "1234 5678 9012"
+        re.I,
+    ), r"\1[ID]"),
+    # Dates: 12/01/2026, 2026-01-12, 12 Jan 2026, Jan 12, 2026
+    (re.compile(
+        r"\b(?:\d{1,2}[/.\-]\d{1,2}[/.\-]\d{2,4}|\d{4}[/.\-]\d{1,2}[/.\-]\d{1,2}"
+        r"|\d{1,2}(?:st|nd|rd|th)?\s+(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?,?\s+\d{2,4}"
+        r"|(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{2,4})\b",
+        re.I,
+    ), "[DATE]"),
+    # Phone numbers (labelled or 10+ digit shapes)
+    (re.compile(r"(\b(?:phone|mobile|mob|tel|contact)(?:\s*no)?\s*[:\-.]?\s*)\+?[\d\s\-()]{6,}\d", re.I), r"\1[PHONE]"),
+    (re.compile(r"(?<![\w/])(?:\+\d{1,3}[\s\-]?)?\d{3,5}[\s\-]?\d{3,4}[\s\-]?\d{3,4}(?![\w/])"), "[PHONE]"),
+    # Any remaining long digit run (Aadhaar, card numbers)
+    (re.compile(r"(?<![\w.])\d{8,}(?![\w.])"), "[ID]"),
+    # Ages: "Age: 54 years", "54-year-old", "54 y/o"
+    (re.compile(r"(\bage\s*[:\-]?\s*)\d{1,3}(?:\s*(?:years?|yrs?|y)\b)?", re.I), r"\1[AGE]"),
+    (re.compile(r"\b\d{1,3}\s*(?:-\s*)?(?:years?|yrs?|yo|y/o)(?:[\s\-]*old)?\b", re.I), "[AGE]"),
+    # Age/sex shorthand ("62F", "62 M", "62/F"), but not "101 F" fevers
+    (re.compile(r"(?<![\d.])\b(\d{1,3})\s*/?\s*([MF])\b"), lambda m: (
+        m.group() if m.group(2) == "F" and FAHRENHEIT_LOW <= int(m.group(1)) <= FAHRENHEIT_HIGH
+        else "[AGE]"
+    )),
+]
+
+_SUMMARY_FIELDS = ("chief_complaint", "final_diagnosis", "ecg_findings", "risk_factors")
+
+
+def sha256_of_stream(stream) -> str:
+    """
+    Hash a seekable binary stream in chunks, then rewind it.
+    """
+
+    h = hashlib.sha256()
+    stream.seek(0)
+    for block in iter(lambda: stream.read(1024 * 1024), b""):
+        h.update(block)
+    stream.seek(0)
+    return h.hexdigest()
+
+
+def redact(text: str, name: str = "") -> str:
+    """
+    Scrub PHI from report text.
+
+    Pattern-based scrubbing (labelled and titled names, addresses,
+    record IDs, dates, phone numbers, emails, ages) always runs, so nothing
+    depends on the extractor having found the name; the extracted
+    name, when there is one, is removed as well.
+    """
+
+    name = (name or "").strip()
+    if name and name.lower() not in ("not mentioned", "pending"):
+        text = re.sub(re.escape(name), REDACTED_NAME, text, flags=re.I)
+
+    for pattern, replacement in _PHI_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def age_band(age) -> Optional[str]:
+    """
+    Decade band for an extracted age ("54" → "50-59"; 90 and over
+    collapse to "90+"), None when no age is known.
+    """
+
+    match = re.search(r"\d{1,3}", str(age or ""))
+    if not match:
+        return None
+    years = int(match.group())
+    if years >= 90:
+        return "90+"
+    low = years // 10 * 10
+    return f"{low}-{low + 9}"
+
+
+# =====================================================
+# BUFFERED, ROTATING WRITER
+# =====================================================
+class RequestJournal:
+    """
+    Thread-safe buffered JSONL journal with size-based rotation.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, JOURNAL_FILE)
+        self.text_dir = os.path.join(directory, TEXT_DIR)
+
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+        os.makedirs(self.text_dir, exist_ok=True)
+
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._flush_loop, name="journal-flush", daemon=True
+        )
+        self._flusher.start()
+
+    def store_text(self, text: str) -> str:
+        """
+        Store text once per content hash; returns its relative path.
+        """
+
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        relative = os.path.join(TEXT_DIR, digest + ".txt")
+        path = os.path.join(self.directory, relative)
+
+        if not os.path.exists(path):
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp, path)
+
+        return relative
+
+    def append(self, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= FLUSH_EVERY:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_loop(self) -> None:
+        while not self._closed.wait(FLUSH_INTERVAL_S / 2):
+            with self._lock:
+                due = (
+                    self._buffer
+                    and time.monotonic() - self._last_flush >= FLUSH_INTERVAL_S
+                )
+                if not due:
+                    continue
+                try:
+                    self._flush_locked()
+                except OSError:
+                    logger.exception("journal flush failed")
+
+    def close(self) -> None:
+        """
+        Stop the background flusher and write buffered records.
+        """
+        self._closed.set()
+        self.flush()
+
+    def _flush_locked(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+
+        data = "\n".join(self._buffer) + "\n"
+        self._buffer = []
+
+        if os.path.exists(self.path) and os.path.getsize(self.path) + len(data) > MAX_BYTES:
+            self._rotate()
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(data)
+
+    def _rotate(self) -> None:
+        for i in range(BACKUPS - 1, 0, -1):
+            older = f"{self.path}.{i}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+_JOURNAL: Optional[RequestJournal] = None
+
+
+def configure_journal(directory: Optional[str]) -> Optional[RequestJournal]:
+    """
+    Enable the journal in `directory` (None disables it).
+    """
+    global _JOURNAL
+    if _JOURNAL is not None:
+        _JOURNAL.close()
+    _JOURNAL = RequestJournal(directory) if directory else None
+    return _JOURNAL
+
+
+def get_journal() -> Optional[RequestJournal]:
+    return _JOURNAL
+
+
+def record_request(
+    pdf_sha256: str,
+    extraction: dict,
+    plan: dict,
+    degraded: List[str],
+    timings: dict
+) -> None:
+    """
+    Append one anonymized pipeline run (no-op when disabled).
+    """
+
+    journal = _JOURNAL
+    if journal is None:
+        return
+
+    details = extraction.get("details", {})
+    summary = extraction.get("summary_data", {})
+    name = details.get("name", "")
+    text = redact(extraction.get("text", ""), name)
+
+    journal.append({
+        "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "pdf_sha256": pdf_sha256,
+        "text_sha256": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        "text_ref": journal.store_text(text) if text else None,
+        "patient": {"age_band": age_band(details.get("age")), "gender": details.get("gender")},
+        "summary": {
+            k: redact(str(summary[k]), name) if summary.get(k) is not None else None
+            for k in _SUMMARY_FIELDS
+        },
+        "problem": plan.get("identified_problem"),
+        "degraded": list(degraded),
+        "timings": {k: round(v, 6) for k, v in timings.items()},
+    })
+
+
+configure_journal(os.environ.get("JOURNAL_DIR"))
+atexit.register(lambda: _JOURNAL.close() if _JOURNAL is not None else None)
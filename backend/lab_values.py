@@ -0,0 +1,188 @@
+"""
+lab_values.py
+
+ROLE
+----
+Extract numeric lab measurements from report text and evaluate
+clinical threshold rules on whole batches at once.
+
+MEASUREMENTS (normalized units)
+-------------------------------
+- glucose_mg_dl          : blood glucose (mmol/L converted to mg/dL);
+                           read only right after its label and a
+                           separator, or with an explicit unit
+- hba1c_pct              : HbA1c (mmol/mol converted to %)
+- bp_systolic            : systolic blood pressure, mmHg
+- bp_diastolic           : diastolic blood pressure, mmHg
+- troponin_ng_l          : troponin with an explicit unit (ng/mL,
+                           ug/L converted to ng/L)
+- troponin_unit_unknown  : troponin without a unit, as written; never
+                           rescaled and never used by rules, since
+                           0.5 may be ng/mL or ng/L
+
+DESIGN PRINCIPLES
+-----------------
+- Columnar: one float64 NumPy array per measurement, NaN = not found
+- Rules are vectorized comparisons over the whole batch
+- When a value is repeated, the most abnormal (highest) one is kept
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+# =====================================================
+# EXTRACTION PATTERNS
+# =====================================================
+_NUMBER = r"(\d+(?:\.\d+)?)"
+
+_GLUCOSE_UNIT = r"(mg\s*/\s*dl|mmol\s*/\s*l)"
+
+# "Fasting glucose: 182", "RBS (mg/dL) - 250", "Glucose 9.1 mmol/L";
+# not "Glucose tolerance test at 2 hours: 140"
+_GLUCOSE = re.compile(
+    r"(?:\b(?:(?:fasting|random|post[\s-]?prandial|plasma|serum|capillary)\s+)*"
+    r"(?:blood\s+(?:sugar|glucose)|glucose|sugar)\b|\bFBS\b|\bRBS\b|\bPPBS\b|\bFPG\b)"
+    r"\s*(?:\(\s*" + _GLUCOSE_UNIT + r"\s*\))?\s*([:=\-]?)\s*"
+    + _NUMBER + r"\s*" + _GLUCOSE_UNIT + r"?(?![\d.])",
+    re.I
+)
+_HBA1C = re.compile(
+    r"(?:HbA1c|\bA1c\b|glycated ha?emoglobin)[^\d\n]{0,20}"
+    + _NUMBER + r"\s*(%|mmol\s*/\s*mol)?",
+    re.I
+)
+_BLOOD_PRESSURE = re.compile(
+    r"(?:\bBP\b|blood pressure)[^\d\n]{0,20}(\d{2,3})\s*/\s*(\d{2,3})",
+    re.I
+)
+_TROPONIN = re.compile(
+    r"(?:troponin|\btrop\s*[IT]\b|hs-?cTn[IT]?)[^\d\n]{0,25}"
+    + _NUMBER + r"\s*(ng\s*/\s*ml|ng\s*/\s*l|pg\s*/\s*ml|[uµ]g\s*/\s*l)?",
+    re.I
+)
+
+MEASUREMENTS = [
+    "glucose_mg_dl",
+    "hba1c_pct",
+    "bp_systolic",
+    "bp_diastolic",
+    "troponin_ng_l",
+    "troponin_unit_unknown",
+]
+
+
+def _unit(raw) -> str:
+    return re.sub(r"\s+", "", raw or "").lower()
+
+
+def extract_lab_values(text: str) -> Dict[str, float]:
+    """
+    Numeric measurements found in one report (missing ones omitted).
+    """
+
+    values: Dict[str, List[float]] = {m: [] for m in MEASUREMENTS}
+
+    for m in _GLUCOSE.finditer(text):
+        unit = _unit(m.group(1) or m.group(4))
+        if not unit and not m.group(2):
+            continue   # no separator and no unit: not a glucose reading
+        value = float(m.group(3))
+        if unit == "mmol/l" or (not unit and value < 35):
+            value *= 18.0
+        values["glucose_mg_dl"].append(value)
+
+    for m in _HBA1C.finditer(text):
+        value = float(m.group(1))
+        if _unit(m.group(2)) == "mmol/mol" or (not m.group(2) and value > 20):
+            value = value / 10.929 + 2.15
+        values["hba1c_pct"].append(value)
+
+    for m in _BLOOD_PRESSURE.finditer(text):
+        values["bp_systolic"].append(float(m.group(1)))
+        values["bp_diastolic"].append(float(m.group(2)))
+
+    for m in _TROPONIN.finditer(text):
+        value = float(m.group(1))
+        unit = _unit(m.group(2))
+        if not unit:
+            values["troponin_unit_unknown"].append(value)
+            continue
+        if unit in ("ng/ml", "ug/l", "µg/l"):
+            value *= 1000.0
+        values["troponin_ng_l"].append(value)
+
+    return {k: max(v) for k, v in values.items() if v}
+
+
+# =====================================================
+# COLUMNAR BATCH
+# =====================================================
+@dataclass
+class LabBatch:
+    """
+    One float64 column per measurement; row i = report i.
+    """
+
+    columns: Dict[str, np.ndarray]
+    size: int
+
+    def __getitem__(self, measurement: str) -> np.ndarray:
+        return self.columns[measurement]
+
+    def measured(self, measurement: str) -> np.ndarray:
+        return ~np.isnan(self.columns[measurement])
+
+
+def extract_lab_batch(texts: Iterable[str]) -> LabBatch:
+    """
+    Extract measurements from many reports into columnar arrays.
+    """
+
+    rows = [extract_lab_values(t or "") for t in texts]
+    columns = {
+        m: np.fromiter((r.get(m, np.nan) for r in rows), dtype=np.float64, count=len(rows))
+        for m in MEASUREMENTS
+    }
+    return LabBatch(columns=columns, size=len(rows))
+
+
+# =====================================================
+# CLINICAL THRESHOLD RULES
+# =====================================================
+TROPONIN_RULE_IN_NG_L = 52.0
+GLUCOSE_DIABETIC_MG_DL = 200.0
+HBA1C_DIABETIC_PCT = 6.5
+SYSTOLIC_HYPERTENSIVE = 140.0
+DIASTOLIC_HYPERTENSIVE = 90.0
+
+
+def evaluate_rules(batch: LabBatch) -> np.ndarray:
+    """
+    Condition suggested by lab values for every report in the batch.
+
+    Rules are checked in order of clinical urgency; NaN comparisons
+    are False, so missing values never trigger a rule.
+
+    Returns:
+        np.ndarray: object array of problem names ("" = no rule hit)
+    """
+
+    with np.errstate(invalid="ignore"):
+        conditions = [
+            batch["troponin_ng_l"] >= TROPONIN_RULE_IN_NG_L,
+            (batch["hba1c_pct"] >= HBA1C_DIABETIC_PCT)
+            | (batch["glucose_mg_dl"] >= GLUCOSE_DIABETIC_MG_DL),
+            (batch["bp_systolic"] >= SYSTOLIC_HYPERTENSIVE)
+            | (batch["bp_diastolic"] >= DIASTOLIC_HYPERTENSIVE),
+        ]
+
+    choices = [
+        "Acute Myocardial Infarction",
+        "Diabetes Mellitus",
+        "Hypertension",
+    ]
+
+    return np.select(conditions, np.array(choices, dtype=object), default="")
@@ -1,8 +1,22 @@
+import time
+from functools import lru_cache
+from typing import Iterator, Optional, Tuple
+
 import streamlit as st
 from groq import Groq
+
+from backend.llm_metrics import get_llm_metrics
+from backend.llm_router import Route, route
+from backend.prompts import estimate_tokens
+
+
+@lru_cache(maxsize=1)
 def get_groq_client() -> Groq:
     """
     Create and return Groq client using Streamlit secrets.
+
+    The client (and its connection pool) is created once per
+    process and shared by all sessions.
     """
     api_key = st.secrets.get("GROQ_API_KEY")
 
@@ -13,31 +27,175 @@ def get_groq_client() -> Groq:
         )
 
     return Groq(api_key=api_key)
-def call_llm(prompt: str) -> str:
+
+
+def _completion_args(prompt: str, json_mode: bool, model: str, max_tokens: int) -> dict:
+    """
+    Shared request arguments for blocking and streamed completions.
+    """
+    args = {
+        "model": model,
+        "messages": [
+            {
+                "role": "system",
+                "content": "You are a medical decision-support assistant."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        "temperature": 0.3,
+        "max_tokens": max_tokens
+    }
+    if json_mode:
+        args["response_format"] = {"type": "json_object"}
+    return args
+
+
+def _budget_error(chosen: Route) -> Optional[str]:
+    """
+    "LLM_ERROR: ..." when a token / cost budget blocks this call.
+    """
+    reason = get_llm_metrics().budget_exceeded(chosen.prompt_tokens + chosen.max_tokens)
+    if reason:
+        return f"LLM_ERROR: LLM budget exceeded ({reason}). Using rule-based results."
+    return None
+
+
+def _usage_tokens(usage, prompt: str, text: str) -> Tuple[int, int]:
+    """
+    (prompt, completion) tokens from an API usage object, estimated
+    locally when the API did not report usage.
+    """
+    if usage is not None:
+        return usage.prompt_tokens or 0, usage.completion_tokens or 0
+    return estimate_tokens(prompt), estimate_tokens(text)
+
+
+def call_llm(prompt: str, json_mode: bool = False, task: str = "default") -> str:
     """
     Send prompt to Groq LLM and return generated text.
+
+    json_mode asks the API to constrain output to a JSON object.
+    task ("extraction" or "default") lets llm_router pick the
+    model and max_tokens; on an API error the next model in the
+    route is tried. Usage, latency and cost are recorded in
+    llm_metrics; calls over budget return "LLM_ERROR: ..." without
+    contacting the API.
     """
-    try:
-        client = get_groq_client()
-
-        completion = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a medical decision-support assistant."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.3,
-            max_tokens=800
-        )
-        return completion.choices[0].message.content.strip()
-    except Exception as e:
-        return (
-            "LLM_ERROR: AI service temporarily unavailable. "
-            f"Details: {str(e)}"
-        )
+    chosen = route(prompt, task)
+    blocked = _budget_error(chosen)
+    if blocked:
+        return blocked
+
+    error = None
+    for model in chosen.models:
+        started = time.perf_counter()
+        try:
+            client = get_groq_client()
+
+            completion = client.chat.completions.create(
+                **_completion_args(prompt, json_mode, model, chosen.max_tokens)
+            )
+            text = completion.choices[0].message.content.strip()
+            prompt_tokens, completion_tokens = _usage_tokens(
+                getattr(completion, "usage", None), prompt, text
+            )
+            get_llm_metrics().record(
+                model, prompt_tokens, completion_tokens, time.perf_counter() - started
+            )
+            return text
+        except Exception as e:
+            get_llm_metrics().record(model, 0, 0, time.perf_counter() - started, ok=False)
+            error = e
+
+    return (
+        "LLM_ERROR: AI service temporarily unavailable. "
+        f"Details: {str(error)}"
+    )
+
+
+class LlmStreamError(RuntimeError):
+    """
+    Raised by stream_llm when no complete response can be produced
+    (budget exceeded, every model failed, or the stream broke after
+    output had started).
+
+    partial holds the text already yielded ("" if none), so callers
+    can tell a truncated response from a complete one.
+    """
+
+    def __init__(self, message: str, partial: str = ""):
+        super().__init__(message)
+        self.partial = partial
+
+
+def stream_llm(prompt: str, json_mode: bool = False, task: str = "default") -> Iterator[str]:
+    """
+    Stream generated text from Groq as it is produced.
+
+    Yields text deltas. Closing the generator early (e.g. once the
+    caller has everything it needs) closes the HTTP stream, which
+    stops generation and output-token billing. On failure
+    LlmStreamError is raised; error text is never yielded as
+    content, because it would be mistaken for (and appended to)
+    partial output.
+
+    The model comes from llm_router; a failing model is replaced by
+    the next one in the route only while nothing has been yielded.
+    Usage comes from the final chunk when the API reports it;
+    otherwise (e.g. closed early) it is estimated from the text seen.
+    """
+    chosen = route(prompt, task)
+    blocked = _budget_error(chosen)
+    if blocked:
+        raise LlmStreamError(blocked)
+
+    error = None
+    parts = []
+    for model in chosen.models:
+        started = time.perf_counter()
+        stream = None
+        usage = None
+        parts = []
+        ok = True
+        try:
+            client = get_groq_client()
+            stream = client.chat.completions.create(
+                stream=True,
+                **_completion_args(prompt, json_mode, model, chosen.max_tokens)
+            )
+            for chunk in stream:
+                x_groq = getattr(chunk, "x_groq", None)
+                if x_groq is not None and getattr(x_groq, "usage", None) is not None:
+                    usage = x_groq.usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+            return
+        except Exception as e:
+            ok = False
+            error = e
+            if parts:
+                break
+        finally:
+            if stream is not None:
+                close = getattr(stream, "close", None)
+                if close:
+                    close()
+            prompt_tokens, completion_tokens = (
+                _usage_tokens(usage, prompt, "".join(parts)) if ok else (0, 0)
+            )
+            get_llm_metrics().record(
+                model, prompt_tokens, completion_tokens, time.perf_counter() - started, ok=ok
+            )
+
+    raise LlmStreamError(
+        "LLM_ERROR: AI service temporarily unavailable. "
+        f"Details: {str(error)}",
+        partial="".join(parts),
+    )
@@ -1,16 +1,48 @@
+import contextvars
 import json
-from backend.llm_client import call_llm
+import re
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
+from backend.llm_client import LlmStreamError, call_llm, stream_llm
+from backend.prompts import (
+    DEFAULT_REPORT_TOKEN_BUDGET,
+    PromptStats,
+    log_prompt_stats,
+    select_report_text,
+    split_into_chunks,
+)
+from backend.extractor import (
+    extract_patient_details,
+    extract_chief_complaint,
+    extract_final_diagnosis,
+    extract_ecg_findings,
+    extract_risk_factors,
+)
 
-def extract_clinical_info(report_text: str) -> dict:
-    """
-    Uses LLM to extract structured clinical information
-    from raw diagnosis report text.
 
-    Returns a SAFE dictionary (never breaks Streamlit UI).
+FIELDS = [
+    "patient_name",
+    "age",
+    "gender",
+    "chief_complaint",
+    "key_findings",
+    "risk_factors",
+    "final_diagnosis",
+]
+
+NOT_MENTIONED = "Not mentioned"
+
+
+def build_extraction_prompt(report_text: str, fields: List[str] = FIELDS) -> str:
     """
+    Build the extraction prompt for the requested fields only.
+    """
+
+    field_list = "\n".join(f"- {f}" for f in fields)
+    json_format = ",\n".join(f'  "{f}": ""' for f in fields)
 
-    prompt = f"""
+    return f"""
 You are a senior medical data extraction expert.
 
 Your task:
@@ -20,13 +52,7 @@ If something is not explicitly present, return "Not mentioned".
 Return STRICT JSON ONLY. No explanations.
 
 Fields to extract:
-- patient_name
-- age
-- gender
-- chief_complaint
-- key_findings
-- risk_factors
-- final_diagnosis
+{field_list}
 
 IMPORTANT RULES:
 - Read carefully like a doctor
@@ -40,29 +66,66 @@ IMPORTANT RULES:
 
 JSON OUTPUT FORMAT:
 {{
-  "patient_name": "",
-  "age": "",
-  "gender": "",
-  "chief_complaint": "",
-  "key_findings": "",
-  "risk_factors": "",
-  "final_diagnosis": ""
+{json_format}
 }}
 """
 
+
+def parse_llm_json(response: str) -> dict:
+    """
+    Extract the JSON object from an LLM response.
+
+    Raises:
+        ValueError if no JSON object is present.
+    """
+
+    json_start = response.find("{")
+    json_end = response.rfind("}") + 1
+
+    if json_start == -1 or json_end == 0:
+        raise ValueError("Invalid JSON from LLM")
+
+    return json.loads(response[json_start:json_end])
+
+
+def build_budgeted_prompt(
+    report_text: str,
+    fields: List[str] = FIELDS,
+    token_budget: int = DEFAULT_REPORT_TOKEN_BUDGET
+) -> Tuple[str, PromptStats]:
+    """
+    Extraction prompt restricted to relevant report sections
+    within `token_budget` estimated tokens of report text.
+    """
+
+    selected, stats = select_report_text(report_text, token_budget)
+    return build_extraction_prompt(selected, fields), stats
+
+
+def extract_clinical_info(
+    report_text: str,
+    token_budget: int = DEFAULT_REPORT_TOKEN_BUDGET
+) -> dict:
+    """
+    Uses LLM to extract structured clinical information
+    from raw diagnosis report text.
+
+    Only relevant report sections are sent, capped at
+    `token_budget` estimated tokens; savings are logged.
+
+    Returns a SAFE dictionary (never breaks Streamlit UI).
+    """
+
+    prompt, stats = build_budgeted_prompt(report_text, token_budget=token_budget)
+    log_prompt_stats("extract_clinical_info", stats)
+
     try:
-        response = call_llm(prompt)
+        response = call_llm(prompt, task="extraction")
 
         # -------------------------------
         # Extract JSON safely
         # -------------------------------
-        json_start = response.find("{")
-        json_end = response.rfind("}") + 1
-
-        if json_start == -1 or json_end == -1:
-            raise ValueError("Invalid JSON from LLM")
-
-        extracted = json.loads(response[json_start:json_end])
+        extracted = parse_llm_json(response)
 
         # -------------------------------
         # Ensure all required keys exist
@@ -71,15 +134,363 @@ JSON OUTPUT FORMAT:
 
     except Exception as e:
         # Fallback — never break UI
-        return {
-            "patient_name": "Not mentioned",
-            "age": "Not mentioned",
-            "gender": "Not mentioned",
-            "chief_complaint": "Not mentioned",
-            "key_findings": "Not mentioned",
-            "risk_factors": "Not mentioned",
-            "final_diagnosis": "Not mentioned",
-        }
+        return normalize_output({})
+
+
+# =====================================================
+# HYBRID EXTRACTION (REGEX FIRST, LLM FOR GAPS ONLY)
+# =====================================================
+def extract_clinical_info_regex(report_text: str) -> dict:
+    """
+    Fast regex pass mapped onto the LLM extraction schema.
+    """
+
+    details = extract_patient_details(report_text)
+
+    return normalize_output({
+        "patient_name": details["name"],
+        "age": details["age"],
+        "gender": details["gender"],
+        "chief_complaint": extract_chief_complaint(report_text),
+        "key_findings": extract_ecg_findings(report_text),
+        "risk_factors": extract_risk_factors(report_text),
+        "final_diagnosis": extract_final_diagnosis(report_text),
+    })
+
+
+def missing_fields(extracted: Dict[str, str]) -> List[str]:
+    """
+    Fields the regex pass could not find.
+    """
+
+    return [f for f in FIELDS if extracted.get(f, NOT_MENTIONED) == NOT_MENTIONED]
+
+
+def fill_missing_fields(
+    report_text: str,
+    extracted: Dict[str, str],
+    token_budget: int = DEFAULT_REPORT_TOKEN_BUDGET
+) -> dict:
+    """
+    Ask the LLM for the missing fields only and merge them in.
+
+    Fields the regex pass found are never overwritten. Any LLM
+    failure keeps the regex result as-is.
+    """
+
+    fields = missing_fields(extracted)
+    if not fields:
+        return dict(extracted)
+
+    merged = dict(extracted)
+    prompt, stats = build_budgeted_prompt(report_text, fields, token_budget)
+    log_prompt_stats("fill_missing_fields", stats)
+
+    try:
+        response = call_llm(prompt, task="extraction")
+        filled = parse_llm_json(response)
+    except Exception:
+        return merged
+
+    for field in fields:
+        value = filled.get(field)
+        value = str(value).strip() if value is not None else ""
+        if value:
+            merged[field] = value
+
+    return merged
+
+
+def extract_clinical_info_hybrid(report_text: str) -> dict:
+    """
+    Regex extraction first; the LLM is only called (with a reduced
+    prompt) for fields that came back "Not mentioned".
+
+    Returns a SAFE dictionary (never breaks Streamlit UI).
+    """
+
+    return fill_missing_fields(report_text, extract_clinical_info_regex(report_text))
+
+
+def start_hybrid_extraction(
+    report_text: str,
+    executor: Executor
+) -> Tuple[dict, Optional[Future]]:
+    """
+    Non-blocking hybrid extraction.
+
+    Returns the regex result immediately so the UI can render it,
+    plus a Future resolving to the completed dict (None when the
+    regex pass already found every field and no LLM call is needed).
+    """
+
+    extracted = extract_clinical_info_regex(report_text)
+
+    if not missing_fields(extracted):
+        return extracted, None
+
+    return extracted, executor.submit(
+        contextvars.copy_context().run, fill_missing_fields, report_text, extracted
+    )
+
+
+# =====================================================
+# MAP-REDUCE EXTRACTION (REPORTS LARGER THAN THE CONTEXT)
+# =====================================================
+MAX_CHUNK_WORKERS = 4
+
+# Fields whose chunk values are combined rather than picked
+_COMBINED_FIELDS = ("key_findings", "risk_factors")
+
+_FINAL_DIAGNOSIS_HEADER = re.compile(r"final diagnosis", re.I)
+_DIAGNOSIS_HEADER = re.compile(r"^\s*(diagnosis|impression|conclusion)\b", re.I | re.M)
+
+
+def _extract_chunk(chunk: str, llm: Callable[[str], str]) -> dict:
+    try:
+        return normalize_output(parse_llm_json(llm(build_extraction_prompt(chunk))))
+    except Exception:
+        return normalize_output({})
+
+
+def _diagnosis_rank(chunk: str) -> int:
+    """
+    0 = explicit FINAL DIAGNOSIS, 1 = diagnosis/impression header, 2 = other.
+    """
+
+    if _FINAL_DIAGNOSIS_HEADER.search(chunk):
+        return 0
+    if _DIAGNOSIS_HEADER.search(chunk):
+        return 1
+    return 2
+
+
+def merge_chunk_results(chunks: List[str], results: List[dict]) -> dict:
+    """
+    Deterministically merge per-chunk extractions.
+
+    - final_diagnosis: from the best-ranked chunk (explicit FINAL
+      DIAGNOSIS first), later chunks winning ties since discharge
+      bundles end with the final diagnosis
+    - key_findings / risk_factors: distinct values joined in order
+    - everything else: first chunk that mentions it
+    """
+
+    merged = normalize_output({})
+
+    for field in FIELDS:
+        values = [
+            (i, r[field]) for i, r in enumerate(results)
+            if r[field] != NOT_MENTIONED
+        ]
+        if not values:
+            continue
+
+        if field == "final_diagnosis":
+            _, merged[field] = min(
+                values, key=lambda item: (_diagnosis_rank(chunks[item[0]]), -item[0])
+            )
+        elif field in _COMBINED_FIELDS:
+            distinct = []
+            for _, value in values:
+                if value.lower() not in (d.lower() for d in distinct):
+                    distinct.append(value)
+            merged[field] = "; ".join(distinct)
+        else:
+            merged[field] = values[0][1]
+
+    return merged
+
+
+def extract_clinical_info_chunked(
+    report_text: str,
+    chunk_tokens: int = DEFAULT_REPORT_TOKEN_BUDGET,
+    overlap_tokens: int = 150,
+    max_workers: int = MAX_CHUNK_WORKERS,
+    llm: Optional[Callable[[str], str]] = None
+) -> dict:
+    """
+    Map-reduce extraction for reports larger than the model context.
+
+    The report is split into overlapping chunks, each chunk is
+    extracted concurrently (at most `max_workers` LLM calls in
+    flight) and the results are merged deterministically.
+
+    Args:
+        report_text (str): Full report text
+        chunk_tokens (int): Estimated tokens per chunk
+        overlap_tokens (int): Tokens shared by neighbouring chunks
+        max_workers (int): Concurrency bound for LLM calls
+        llm (callable): prompt -> response; defaults to call_llm
+
+    Returns a SAFE dictionary (never breaks Streamlit UI).
+    """
+
+    llm = llm or (lambda p: call_llm(p, task="extraction"))
+    chunks = split_into_chunks(report_text, chunk_tokens, overlap_tokens)
+
+    if not chunks:
+        return normalize_output({})
+
+    if len(chunks) == 1:
+        return _extract_chunk(chunks[0], llm)
+
+    workers = max(1, min(max_workers, len(chunks)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(contextvars.copy_context().run, _extract_chunk, chunk, llm)
+            for chunk in chunks
+        ]
+        results = [f.result() for f in futures]
+
+    return merge_chunk_results(chunks, results)
+
+
+# =====================================================
+# STREAMED EXTRACTION (STOP AS SOON AS ALL KEYS ARRIVE)
+# =====================================================
+class StreamingJsonObject:
+    """
+    Incremental scanner for the first top-level JSON object in a
+    text stream.
+
+    feed() returns True once the object is closed or every expected
+    top-level key has a complete value, so the caller can stop
+    reading (and generating) right away.
+    """
+
+    def __init__(self, expected_keys: Iterable[str]):
+        self.expected = set(expected_keys)
+        self.completed = set()
+        self.closed = False
+
+        self._buf: List[str] = []
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string: List[str] = []
+        self._expect_key = True
+        self._key: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.closed or (self._started and self.expected <= self.completed)
+
+    def feed(self, text: str) -> bool:
+        for ch in text:
+            if self.done:
+                break
+
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+                    self._buf.append(ch)
+                continue
+
+            self._buf.append(ch)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._end_string()
+                    continue
+                self._string.append(ch)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string = []
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._complete_value()
+                    self.closed = True
+            elif self._depth == 1:
+                if ch == ":":
+                    self._expect_key = False
+                elif ch == ",":
+                    self._complete_value()
+
+        return self.done
+
+    def _end_string(self) -> None:
+        if self._depth != 1:
+            return
+        if self._expect_key:
+            self._key = json.loads('"' + "".join(self._string) + '"')
+        else:
+            self._complete_value()
+
+    def _complete_value(self) -> None:
+        if self._key is not None and not self._expect_key:
+            self.completed.add(self._key)
+        self._key = None
+        self._expect_key = True
+
+    def text(self) -> str:
+        """
+        JSON text scanned so far, closed if it stopped early.
+        """
+        if not self._started:
+            raise ValueError("Invalid JSON from LLM")
+
+        text = "".join(self._buf)
+        return text if self.closed else text.rstrip().rstrip(",") + "}"
+
+
+def extract_clinical_info_streaming(
+    report_text: str,
+    token_budget: int = DEFAULT_REPORT_TOKEN_BUDGET,
+    stream: Optional[Callable[[str], Iterable[str]]] = None
+) -> dict:
+    """
+    Streamed JSON-mode extraction that stops generation as soon as
+    all seven fields are complete, instead of waiting for the full
+    completion and any trailing chatter.
+
+    Args:
+        report_text (str): Full report text
+        token_budget (int): Report token budget for the prompt
+        stream (callable): prompt -> iterable of text deltas;
+            defaults to stream_llm in JSON mode
+
+    A stream that fails (LlmStreamError), even after partial output,
+    gives the all-"Not mentioned" result rather than half-parsed JSON.
+
+    Returns a SAFE dictionary (never breaks Streamlit UI).
+    """
+
+    stream = stream or (lambda p: stream_llm(p, json_mode=True, task="extraction"))
+    prompt, stats = build_budgeted_prompt(report_text, token_budget=token_budget)
+    log_prompt_stats("extract_clinical_info_streaming", stats)
+
+    scanner = StreamingJsonObject(FIELDS)
+    deltas = stream(prompt)
+
+    try:
+        for delta in deltas:
+            if scanner.feed(delta):
+                break
+    except LlmStreamError:
+        # Fallback — never break UI
+        return normalize_output({})
+    finally:
+        close = getattr(deltas, "close", None)
+        if close:
+            close()
+
+    try:
+        return normalize_output(json.loads(scanner.text()))
+    except Exception:
+        return normalize_output({})
 
 
 def normalize_output(data: dict) -> dict:
@@ -88,20 +499,11 @@ def normalize_output(data: dict) -> dict:
     never break the Streamlit UI.
     """
 
-    keys = [
-        "patient_name",
-        "age",
-        "gender",
-        "chief_complaint",
-        "key_findings",
-        "risk_factors",
-        "final_diagnosis",
-    ]
-
     normalized = {}
 
-    for key in keys:
-        value = data.get(key, "").strip()
-        normalized[key] = value if value else "Not mentioned"
+    for key in FIELDS:
+        value = data.get(key)
+        value = str(value).strip() if value is not None else ""
+        normalized[key] = value if value else NOT_MENTIONED
 
     return normalized
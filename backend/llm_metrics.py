@@ -0,0 +1,288 @@
+"""
+llm_metrics.py
+
+ROLE
+----
+Token, cost and latency accounting for every LLM call, plus budgets.
+
+call_llm / stream_llm report each call (model, prompt / completion
+tokens, latency, cost, success) to the shared LlmMetrics, which keeps:
+- process totals
+- per-minute counters for the last WINDOW_MINUTES minutes
+- per-report totals   (report_scope(report_id), e.g. the PDF hash)
+- per-session totals  (session_scope(session_id))
+
+Report / session ids travel in contextvars, so calls made on worker
+threads count toward the right report as long as the work is
+submitted with a copied context (deadline.run_with_timeout does this).
+
+BUDGETS
+-------
+All disabled (None) unless configured via configure_budgets() or the
+environment:
+
+    LLM_SESSION_TOKEN_BUDGET      tokens per session
+    LLM_GLOBAL_TOKENS_PER_MINUTE  tokens per minute, all sessions
+    LLM_GLOBAL_COST_BUDGET_USD    total spend since process start
+
+When a budget would be exceeded call_llm returns "LLM_ERROR: ..."
+(stream_llm raises LlmStreamError) without calling the API, and
+callers take their rule-based path.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+from backend.llm_router import MODEL_PROFILES
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+WINDOW_MINUTES = 60
+MAX_TRACKED_REPORTS = 1000
+MAX_TRACKED_SESSIONS = 1000
+
+_REPORT_ID: contextvars.ContextVar = contextvars.ContextVar("llm_report_id", default=None)
+_SESSION_ID: contextvars.ContextVar = contextvars.ContextVar("llm_session_id", default=None)
+
+
+def _env_number(name: str, cast):
+    value = os.environ.get(name)
+    return cast(value) if value else None
+
+
+@dataclass
+class Budgets:
+    session_tokens: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+    cost_usd: Optional[float] = None
+
+
+_BUDGETS = Budgets(
+    session_tokens=_env_number("LLM_SESSION_TOKEN_BUDGET", int),
+    tokens_per_minute=_env_number("LLM_GLOBAL_TOKENS_PER_MINUTE", int),
+    cost_usd=_env_number("LLM_GLOBAL_COST_BUDGET_USD", float),
+)
+
+
+def configure_budgets(
+    session_tokens: Optional[int] = None,
+    tokens_per_minute: Optional[int] = None,
+    cost_usd: Optional[float] = None
+) -> Budgets:
+    """
+    Replace all budgets (None disables that budget).
+    """
+    global _BUDGETS
+    _BUDGETS = Budgets(session_tokens, tokens_per_minute, cost_usd)
+    return _BUDGETS
+
+
+def call_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """
+    USD cost of one call, priced from llm_router.MODEL_PROFILES
+    (unknown models cost 0).
+    """
+    profile = MODEL_PROFILES.get(model)
+    if profile is None:
+        return 0.0
+    return (
+        prompt_tokens * profile.price_in_per_mtok
+        + completion_tokens * profile.price_out_per_mtok
+    ) / 1_000_000
+
+
+# =====================================================
+# AGGREGATION
+# =====================================================
+@dataclass
+class Usage:
+    calls: int = 0
+    errors: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    latency_s: float = 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, prompt_tokens: int, completion_tokens: int, cost: float, latency: float, ok: bool) -> None:
+        self.calls += 1
+        self.errors += 0 if ok else 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cost_usd += cost
+        self.latency_s += latency
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["total_tokens"] = self.total_tokens
+        data["cost_usd"] = round(self.cost_usd, 6)
+        data["latency_s"] = round(self.latency_s, 4)
+        data["avg_latency_s"] = round(self.latency_s / self.calls, 4) if self.calls else 0.0
+        return data
+
+
+class LlmMetrics:
+    """
+    Thread-safe aggregate of LLM usage.
+    """
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.totals = Usage()
+        self.by_model: Dict[str, Usage] = {}
+        self._minutes: deque = deque()          # (minute, Usage), oldest first
+        self._reports: "OrderedDict[str, Usage]" = OrderedDict()
+        self._sessions: "OrderedDict[str, Usage]" = OrderedDict()
+        self.blocked = 0
+
+    def _minute_bucket(self, now: float) -> Usage:
+        minute = int(now // 60)
+        if not self._minutes or self._minutes[-1][0] != minute:
+            self._minutes.append((minute, Usage()))
+        while self._minutes[0][0] <= minute - WINDOW_MINUTES:
+            self._minutes.popleft()
+        return self._minutes[-1][1]
+
+    @staticmethod
+    def _keyed(table: OrderedDict, key: str, limit: int) -> Usage:
+        usage = table.get(key)
+        if usage is None:
+            usage = table[key] = Usage()
+            while len(table) > limit:
+                table.popitem(last=False)
+        else:
+            table.move_to_end(key)
+        return usage
+
+    def record(
+        self,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        latency_s: float,
+        ok: bool = True
+    ) -> float:
+        """
+        Record one call; returns its cost in USD.
+        """
+
+        cost = call_cost(model, prompt_tokens, completion_tokens)
+        report_id, session_id = _REPORT_ID.get(), _SESSION_ID.get()
+        args = (prompt_tokens, completion_tokens, cost, latency_s, ok)
+
+        with self._lock:
+            self.totals.add(*args)
+            self.by_model.setdefault(model, Usage()).add(*args)
+            self._minute_bucket(self._clock()).add(*args)
+            if report_id is not None:
+                self._keyed(self._reports, report_id, MAX_TRACKED_REPORTS).add(*args)
+            if session_id is not None:
+                self._keyed(self._sessions, session_id, MAX_TRACKED_SESSIONS).add(*args)
+        return cost
+
+    # ---------------- BUDGETS ----------------
+    def tokens_this_minute(self) -> int:
+        with self._lock:
+            return self._minute_bucket(self._clock()).total_tokens
+
+    def budget_exceeded(self, estimated_tokens: int = 0) -> Optional[str]:
+        """
+        Reason string if a call of ~estimated_tokens would exceed a
+        budget, else None. Blocked calls are counted.
+        """
+
+        budgets = _BUDGETS
+        session_id = _SESSION_ID.get()
+        reason = None
+
+        with self._lock:
+            if budgets.cost_usd is not None and self.totals.cost_usd >= budgets.cost_usd:
+                reason = f"global cost budget ${budgets.cost_usd:.2f} reached"
+            elif budgets.tokens_per_minute is not None:
+                used = self._minute_bucket(self._clock()).total_tokens
+                if used + estimated_tokens > budgets.tokens_per_minute:
+                    reason = f"global budget of {budgets.tokens_per_minute} tokens/minute reached"
+            if reason is None and budgets.session_tokens is not None and session_id is not None:
+                session = self._sessions.get(session_id)
+                used = session.total_tokens if session else 0
+                if used + estimated_tokens > budgets.session_tokens:
+                    reason = f"session budget of {budgets.session_tokens} tokens reached"
+            if reason is not None:
+                self.blocked += 1
+
+        return reason
+
+    # ---------------- REPORTING ----------------
+    def report_totals(self, report_id: str) -> Optional[dict]:
+        with self._lock:
+            usage = self._reports.get(report_id)
+            return usage.to_dict() if usage else None
+
+    def session_totals(self, session_id: str) -> Optional[dict]:
+        with self._lock:
+            usage = self._sessions.get(session_id)
+            return usage.to_dict() if usage else None
+
+    def snapshot(self) -> dict:
+        """
+        JSON-ready view: totals, per model, per minute, budgets.
+        """
+
+        with self._lock:
+            self._minute_bucket(self._clock())
+            return {
+                "totals": self.totals.to_dict(),
+                "by_model": {m: u.to_dict() for m, u in self.by_model.items()},
+                "per_minute": [
+                    dict(u.to_dict(), minute_start=minute * 60)
+                    for minute, u in self._minutes
+                    if u.calls
+                ],
+                "blocked_calls": self.blocked,
+                "budgets": asdict(_BUDGETS),
+            }
+
+
+_METRICS = LlmMetrics()
+
+
+def get_llm_metrics() -> LlmMetrics:
+    return _METRICS
+
+
+# =====================================================
+# CONTEXT SCOPES
+# =====================================================
+@contextmanager
+def report_scope(report_id: str):
+    """
+    Attribute LLM calls inside the block to one report.
+    """
+    token = _REPORT_ID.set(report_id)
+    try:
+        yield
+    finally:
+        _REPORT_ID.reset(token)
+
+
+@contextmanager
+def session_scope(session_id: str):
+    """
+    Attribute LLM calls inside the block to one user session.
+    """
+    token = _SESSION_ID.set(session_id)
+    try:
+        yield
+    finally:
+        _SESSION_ID.reset(token)
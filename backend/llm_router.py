@@ -0,0 +1,132 @@
+"""
+llm_router.py
+
+ROLE
+----
+Choose the model and max_tokens for each LLM call.
+
+call_llm / stream_llm ask route(prompt, task) for a Route: an ordered
+model chain (primary first, then fallbacks tried on API errors) and
+an output token cap sized for the task.
+
+ROUTING RULES
+-------------
+- Easy calls go to the cheapest, fastest model that fits:
+  short prompts, and extraction prompts whose report has detectable
+  section headers (the regex-friendly, well-structured case).
+- Hard calls go to the most capable model first:
+  prompts over the task's hard_prompt_tokens, or extraction prompts
+  with no recognizable report structure.
+- Models whose context window cannot hold prompt + output are skipped.
+
+MODEL_PROFILES is the single source of model facts (context length,
+typical latency, price); llm_metrics prices calls from it.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, NamedTuple
+
+from backend.prompts import estimate_tokens, find_relevant_spans
+
+
+# =====================================================
+# MODEL REGISTRY
+# =====================================================
+@dataclass(frozen=True)
+class ModelProfile:
+    name: str
+    context_tokens: int
+    latency_s: float             # typical end-to-end latency for ~500 output tokens
+    price_in_per_mtok: float     # USD per 1M prompt tokens
+    price_out_per_mtok: float    # USD per 1M completion tokens
+    quality: int                 # higher = better on hard / messy inputs
+
+
+MODEL_PROFILES: Dict[str, ModelProfile] = {
+    "llama-3.1-8b-instant": ModelProfile(
+        name="llama-3.1-8b-instant",
+        context_tokens=131_072,
+        latency_s=0.6,
+        price_in_per_mtok=0.05,
+        price_out_per_mtok=0.08,
+        quality=1,
+    ),
+    "llama-3.3-70b-versatile": ModelProfile(
+        name="llama-3.3-70b-versatile",
+        context_tokens=131_072,
+        latency_s=1.8,
+        price_in_per_mtok=0.59,
+        price_out_per_mtok=0.79,
+        quality=3,
+    ),
+}
+
+
+def register_model(profile: ModelProfile) -> None:
+    MODEL_PROFILES[profile.name] = profile
+
+
+# =====================================================
+# TASK PROFILES
+# =====================================================
+@dataclass(frozen=True)
+class TaskProfile:
+    max_tokens: int             # output cap
+    hard_prompt_tokens: int     # longer prompts count as hard
+    needs_structure: bool       # unstructured input counts as hard
+
+
+TASK_PROFILES: Dict[str, TaskProfile] = {
+    # Seven short JSON fields
+    "extraction": TaskProfile(max_tokens=400, hard_prompt_tokens=3000, needs_structure=True),
+    # Any other call; unknown task names fall back to it
+    "default": TaskProfile(max_tokens=800, hard_prompt_tokens=3000, needs_structure=False),
+}
+
+
+class Route(NamedTuple):
+    models: List[str]    # primary first, then fallbacks
+    max_tokens: int
+    hard: bool
+    prompt_tokens: int
+
+
+def is_hard(prompt: str, task: str = "default") -> bool:
+    profile = TASK_PROFILES.get(task, TASK_PROFILES["default"])
+    if estimate_tokens(prompt) > profile.hard_prompt_tokens:
+        return True
+    return profile.needs_structure and not find_relevant_spans(prompt)
+
+
+def route(prompt: str, task: str = "default") -> Route:
+    """
+    Pick the model chain and output cap for one call.
+
+    Args:
+        prompt (str): Full prompt text
+        task (str): key of TASK_PROFILES ("extraction" or "default";
+            unknown names use "default")
+
+    Returns:
+        Route: models (primary + fallbacks), max_tokens, hard flag and
+        estimated prompt tokens
+    """
+
+    profile = TASK_PROFILES.get(task, TASK_PROFILES["default"])
+    prompt_tokens = estimate_tokens(prompt)
+    hard = is_hard(prompt, task)
+
+    fitting = [
+        m for m in MODEL_PROFILES.values()
+        if m.context_tokens >= prompt_tokens + profile.max_tokens
+    ] or list(MODEL_PROFILES.values())
+
+    def price(m: ModelProfile) -> float:
+        return prompt_tokens * m.price_in_per_mtok + profile.max_tokens * m.price_out_per_mtok
+
+    if hard:
+        ordered = sorted(fitting, key=lambda m: (-m.quality, m.latency_s))
+    else:
+        ordered = sorted(fitting, key=lambda m: (price(m), m.latency_s))
+
+    return Route([m.name for m in ordered], profile.max_tokens, hard, prompt_tokens)
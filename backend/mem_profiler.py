@@ -0,0 +1,172 @@
+"""
+mem_profiler.py
+
+ROLE
+----
+Opt-in tracemalloc memory profiling for long-lived Streamlit workers.
+
+- stage(name)   : allocation diff around one pipeline stage
+- request()     : growth between consecutive requests
+- memory_report : top allocation sites, recent stage diffs and
+                  request-to-request growth (shown in the app sidebar)
+
+Enable with MEMORY_PROFILING=1 (or enable_profiling()). When
+disabled, stage() / request() return a shared no-op context manager,
+so the hooks cost one attribute check.
+"""
+
+import os
+import threading
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import List, Optional
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+TRACE_FRAMES = 5
+TOP_SITES = 10
+KEEP_REPORTS = 20
+
+_NULL = nullcontext()
+_ENABLED = False
+
+_lock = threading.Lock()
+_stage_reports: deque = deque(maxlen=KEEP_REPORTS)
+_request_reports: deque = deque(maxlen=KEEP_REPORTS)
+_last_request_snapshot: Optional[tracemalloc.Snapshot] = None
+
+_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+]
+
+
+def enable_profiling(frames: int = TRACE_FRAMES) -> None:
+    global _ENABLED
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    _ENABLED = True
+
+
+def disable_profiling() -> None:
+    global _ENABLED, _last_request_snapshot
+    _ENABLED = False
+    _last_request_snapshot = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def is_enabled() -> bool:
+    return _ENABLED
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(_FILTERS)
+
+
+def _top_diff(after, before, limit: int = TOP_SITES) -> List[dict]:
+    stats = after.compare_to(before, "lineno")
+    return [
+        {
+            "site": str(stat.traceback[0]),
+            "size_diff_kb": round(stat.size_diff / 1024, 1),
+            "count_diff": stat.count_diff,
+        }
+        for stat in stats[:limit]
+        if stat.size_diff
+    ]
+
+
+# =====================================================
+# HOOKS
+# =====================================================
+def stage(name: str):
+    """
+    Context manager recording allocations made during a stage.
+    """
+
+    if not _ENABLED:
+        return _NULL
+    return _profile_stage(name)
+
+
+@contextmanager
+def _profile_stage(name: str):
+    before = _snapshot()
+    try:
+        yield
+    finally:
+        after = _snapshot()
+        with _lock:
+            _stage_reports.append({
+                "stage": name,
+                "thread": threading.current_thread().name,
+                "net_kb": round(
+                    sum(s.size_diff for s in after.compare_to(before, "filename")) / 1024, 1
+                ),
+                "top": _top_diff(after, before, limit=5),
+            })
+
+
+def request():
+    """
+    Context manager recording memory growth since the previous request.
+    """
+
+    if not _ENABLED:
+        return _NULL
+    return _profile_request()
+
+
+@contextmanager
+def _profile_request():
+    global _last_request_snapshot
+    try:
+        yield
+    finally:
+        after = _snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        with _lock:
+            previous = _last_request_snapshot
+            _last_request_snapshot = after
+            _request_reports.append({
+                "traced_kb": round(current / 1024, 1),
+                "peak_kb": round(peak / 1024, 1),
+                "growth_top": _top_diff(after, previous) if previous else [],
+            })
+
+
+# =====================================================
+# REPORT
+# =====================================================
+def memory_report() -> dict:
+    """
+    Current profiling state for the debug sidebar.
+    """
+
+    if not _ENABLED:
+        return {"enabled": False}
+
+    current, peak = tracemalloc.get_traced_memory()
+    top = _snapshot().statistics("lineno")[:TOP_SITES]
+
+    with _lock:
+        return {
+            "enabled": True,
+            "traced_kb": round(current / 1024, 1),
+            "peak_kb": round(peak / 1024, 1),
+            "top_sites": [
+                {"site": str(s.traceback[0]), "size_kb": round(s.size / 1024, 1), "count": s.count}
+                for s in top
+            ],
+            "stages": list(_stage_reports),
+            "requests": list(_request_reports),
+        }
+
+
+if os.environ.get("MEMORY_PROFILING", "").lower() in ("1", "true", "yes"):
+    enable_profiling()
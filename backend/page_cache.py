@@ -0,0 +1,239 @@
+"""
+page_cache.py
+
+ROLE
+----
+Per-page cache for PDF text extraction.
+
+PURPOSE
+-------
+Clinicians often re-upload the same report bundle with a few pages
+added. Each page is identified by a hash of its content stream (and
+resources), so only new or changed pages need to be parsed again.
+
+TIERS
+-----
+- In-memory LRU (bounded number of pages)
+- Optional disk tier (one small text file per page hash)
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+DEFAULT_MAX_PAGES = 4096
+DEFAULT_DISK_DIR: Optional[str] = None   # e.g. "data/page_cache"
+
+
+# =====================================================
+# PAGE HASHING
+# =====================================================
+def _hash_object(h, obj, memo: Dict[tuple, bytes], active: set) -> None:
+    """
+    Feed a PDF object into the hash.
+
+    Indirect objects are hashed once per document: their digest is
+    memoized by (idnum, generation) in `memo`, so resources shared by
+    every page (fonts, logos, form XObjects) are walked only once.
+    Cycles (the /Parent chain etc.) are cut by `active`.
+    """
+
+    ref = obj if hasattr(obj, "idnum") else getattr(obj, "indirect_reference", None)
+    if hasattr(obj, "get_object") and ref is not None and hasattr(ref, "idnum"):
+        key = (ref.idnum, ref.generation)
+        digest = memo.get(key)
+        if digest is None:
+            if key in active:
+                h.update(b"R%d" % ref.idnum)
+                return
+            active.add(key)
+            sub = hashlib.sha256()
+            _hash_direct(sub, obj.get_object(), memo, active)
+            active.discard(key)
+            digest = memo[key] = sub.digest()
+        h.update(b"R")
+        h.update(digest)
+        return
+
+    if hasattr(obj, "get_object"):
+        obj = obj.get_object()
+    _hash_direct(h, obj, memo, active)
+
+
+def _hash_direct(h, obj, memo: Dict[tuple, bytes], active: set) -> None:
+    """
+    Dicts by sorted key, arrays in order, streams by their raw
+    (still encoded) data AND dictionary. The dictionary carries
+    /Filter and /DecodeParms, so nothing is decompressed.
+    """
+
+    if hasattr(obj, "get_data"):
+        h.update(b"stream")
+        data = getattr(obj, "_data", None)
+        if data is None:
+            try:
+                data = obj.get_data()
+            except Exception:
+                data = b""
+        h.update(len(data).to_bytes(8, "big"))
+        h.update(data)
+
+    if isinstance(obj, dict):
+        h.update(b"{")
+        for name in sorted(obj.keys()):
+            if name == "/Parent":
+                continue
+            h.update(str(name).encode("utf-8"))
+            _hash_object(h, obj[name], memo, active)
+        h.update(b"}")
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"[")
+        for item in obj:
+            _hash_object(h, item, memo, active)
+        h.update(b"]")
+    elif not hasattr(obj, "get_data"):
+        h.update(repr(obj).encode("utf-8"))
+
+
+def page_hash(page, memo: Optional[Dict[tuple, bytes]] = None) -> str:
+    """
+    Stable hash of everything that determines a page's text.
+
+    Covers the content stream plus the whole resolved /Resources
+    tree, recursively: fonts (including /ToUnicode maps and embedded
+    font programs) and Form XObjects with their own resources. Text
+    drawn through /Do therefore changes the hash. Streams are hashed
+    as stored, never decompressed.
+
+    Args:
+        page: pypdf PageObject
+        memo: Digests of indirect objects already hashed; pass the
+              same dict for every page of one document
+
+    Returns:
+        str: Hex digest identifying the page content
+    """
+
+    if memo is None:
+        memo = {}
+    h = hashlib.sha256()
+
+    contents = page.get("/Contents")
+    if contents is not None:
+        _hash_object(h, contents, memo, set())
+
+    h.update(b"/Rotate" + repr(page.get("/Rotate", 0)).encode("utf-8"))
+
+    resources = page.get("/Resources")
+    if resources is not None:
+        _hash_object(h, resources, memo, set())
+
+    return h.hexdigest()
+
+
+# =====================================================
+# CACHE
+# =====================================================
+class PageTextCache:
+    """
+    Thread-safe LRU of page hash -> extracted text,
+    optionally backed by a directory on disk.
+    """
+
+    def __init__(self, max_pages: int = DEFAULT_MAX_PAGES, disk_dir: Optional[str] = None):
+        self.max_pages = max_pages
+        self.disk_dir = disk_dir
+        self.hits = 0
+        self.misses = 0
+
+        self._pages: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], key + ".txt")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            text = self._pages.get(key)
+            if text is not None:
+                self._pages.move_to_end(key)
+                self.hits += 1
+                return text
+
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(key), "r", encoding="utf-8") as f:
+                    text = f.read()
+            except OSError:
+                text = None
+            if text is not None:
+                self._remember(key, text)
+                with self._lock:
+                    self.hits += 1
+                return text
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, text: str) -> None:
+        self._remember(key, text)
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(tmp, path)
+            except OSError:
+                pass   # disk tier is best-effort
+
+    def _remember(self, key: str, text: str) -> None:
+        with self._lock:
+            self._pages[key] = text
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pages.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+
+_CACHE: Optional[PageTextCache] = None
+
+
+def configure_page_cache(
+    max_pages: int = DEFAULT_MAX_PAGES,
+    disk_dir: Optional[str] = DEFAULT_DISK_DIR
+) -> PageTextCache:
+    """
+    Replace the shared cache (e.g. to enable the disk tier).
+    """
+    global _CACHE
+    _CACHE = PageTextCache(max_pages=max_pages, disk_dir=disk_dir)
+    return _CACHE
+
+
+def get_page_cache() -> PageTextCache:
+    """
+    Return the shared page cache, creating it on first use.
+    """
+    if _CACHE is None:
+        return configure_page_cache()
+    return _CACHE
@@ -12,9 +12,13 @@ Generate a professional treatment plan PDF including:
 - Appointment recommendation
 - Disclaimer
 
-Compatible with planner.py output structure.
+Compatible with planner.py output structure. Layout is rendered
+from the format-neutral model in report_model.py.
 """
 
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
 from reportlab.platypus import (
     SimpleDocTemplate,
     Paragraph,
@@ -26,7 +30,40 @@ from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER
 from reportlab.lib import colors
-from datetime import datetime
+
+from backend.report_model import (
+    ItemGroup,
+    KeyValues,
+    ReportDocument,
+    TextBlock,
+    build_report_document,
+)
+
+
+@lru_cache(maxsize=1)
+def _styles() -> dict:
+    """
+    ReportLab styles, created once per process.
+    """
+
+    styles = getSampleStyleSheet()
+
+    return {
+        "title": ParagraphStyle(
+            "TitleStyle",
+            parent=styles["Heading1"],
+            alignment=TA_CENTER,
+            textColor=colors.HexColor("#003366"),
+        ),
+        "section": ParagraphStyle(
+            "SectionStyle",
+            parent=styles["Heading2"],
+            textColor=colors.HexColor("#003366"),
+        ),
+        "group": styles["Heading3"],
+        "normal": styles["Normal"],
+        "italic": styles["Italic"],
+    }
 
 
 def build_treatment_plan_pdf(
@@ -48,6 +85,17 @@ def build_treatment_plan_pdf(
         str: generated PDF filename
     """
 
+    return render_pdf(build_report_document(patient, summary, plan), file_name)
+
+
+def render_pdf(document: ReportDocument, file_name: str) -> str:
+    """
+    Render a report model to PDF.
+
+    Returns:
+        str: generated PDF filename
+    """
+
     # ---------------- Document setup ----------------
     doc = SimpleDocTemplate(
         file_name,
@@ -58,118 +106,64 @@ def build_treatment_plan_pdf(
         bottomMargin=36,
     )
 
-    styles = getSampleStyleSheet()
+    styles = _styles()
+    normal = styles["normal"]
     elements = []
 
-    title_style = ParagraphStyle(
-        "TitleStyle",
-        parent=styles["Heading1"],
-        alignment=TA_CENTER,
-        textColor=colors.HexColor("#003366"),
-    )
-    section_style = ParagraphStyle(
-        "SectionStyle",
-        parent=styles["Heading2"],
-        textColor=colors.HexColor("#003366"),
-    )
-    normal = styles["Normal"]
-    italic = styles["Italic"]
-
     # ---------------- Title ----------------
-    elements.append(Paragraph("AI-Assisted Treatment Plan Report", title_style))
+    elements.append(Paragraph(escape(document.title), styles["title"]))
     elements.append(Spacer(1, 8))
     elements.append(
         Paragraph(
-            f"<b>Generated on:</b> {datetime.now().strftime('%d %B %Y, %I:%M %p')}",
+            f"<b>Generated on:</b> {document.generated_on.strftime('%d %B %Y, %I:%M %p')}",
             normal,
         )
     )
     elements.append(Spacer(1, 16))
 
-    # ---------------- Patient details ----------------
-    elements.append(Paragraph("Patient Details", section_style))
-    elements.append(Spacer(1, 8))
+    # ---------------- Sections ----------------
+    for section in document.sections:
+        elements.append(Paragraph(escape(section.title), styles["section"]))
+        first = section.blocks[0] if section.blocks else None
+        elements.append(Spacer(1, 6 if isinstance(first, TextBlock) else 8))
 
-    patient_table = Table(
-        [
-            ["Name", patient.get("name", "Not mentioned")],
-            ["Age", patient.get("age", "Not mentioned")],
-            ["Gender", patient.get("gender", "Not mentioned")],
-        ],
-        colWidths=[120, 350],
-    )
-    patient_table.setStyle(
-        TableStyle(
-            [
-                ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-                ("BACKGROUND", (0, 0), (0, -1), colors.whitesmoke),
-                ("FONT", (0, 0), (-1, -1), "Helvetica"),
-            ]
-        )
-    )
-    elements.append(patient_table)
-    elements.append(Spacer(1, 14))
-
-    # ---------------- Diagnostic summary ----------------
-    elements.append(Paragraph("Clinical Summary", section_style))
-    elements.append(Spacer(1, 6))
-    elements.append(
-        Paragraph(summary.get("chief_complaint", "Not mentioned"), normal)
-    )
-    elements.append(Spacer(1, 10))
-
-    elements.append(Paragraph("Final Diagnostic Impression", section_style))
-    elements.append(Spacer(1, 6))
-    elements.append(
-        Paragraph(plan.get("identified_problem", "Not mentioned"), normal)
-    )
-    elements.append(Spacer(1, 14))
-
-    # ---------------- Treatment plan ----------------
-    elements.append(Paragraph("Treatment Plan", section_style))
-    elements.append(Spacer(1, 8))
+        for block in section.blocks:
+            elements.extend(_render_block(block, styles))
 
-    treatment_sections = plan["treatment_plan"]["treatment_sections"]
-    for section, items in treatment_sections.items():
-        elements.append(
-            Paragraph(section.replace("_", " ").title(), styles["Heading3"])
-        )
-        for item in items:
-            elements.append(Paragraph(f"- {item}", normal))
-        elements.append(Spacer(1, 6))
+        elements.append(Spacer(1, 14))
 
-    elements.append(Spacer(1, 14))
+    # ---------------- Build PDF ----------------
+    doc.build(elements)
+    return file_name
 
-    # ---------------- Cost estimation ----------------
-    elements.append(Paragraph("Estimated Treatment Cost", section_style))
-    elements.append(Spacer(1, 8))
-    for k, v in plan["estimated_cost"].items():
-        elements.append(
-            Paragraph(f"<b>{k.replace('_', ' ').title()}:</b> {v}", normal)
-        )
-    elements.append(Spacer(1, 14))
 
-    # ---------------- Appointment recommendation ----------------
-    elements.append(Paragraph("Appointment Recommendation", section_style))
-    elements.append(Spacer(1, 8))
-    for k, v in plan["appointment"].items():
-        elements.append(
-            Paragraph(f"<b>{k.replace('_', ' ').title()}:</b> {v}", normal)
-        )
-    elements.append(Spacer(1, 18))
+def _render_block(block, styles: dict) -> list:
+    normal = styles["normal"]
 
-    # ---------------- Disclaimer ----------------
-    elements.append(Paragraph("Disclaimer", section_style))
-    elements.append(Spacer(1, 6))
-    elements.append(
-        Paragraph(
-            "This report is generated by an AI-assisted clinical decision support system. "
-            "It is intended for informational and support purposes only. Final diagnosis "
-            "and treatment decisions must be made by a licensed medical professional.",
-            italic,
+    if isinstance(block, KeyValues) and block.as_table:
+        table = Table([list(row) for row in block.rows], colWidths=[120, 350])
+        table.setStyle(
+            TableStyle(
+                [
+                    ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+                    ("BACKGROUND", (0, 0), (0, -1), colors.whitesmoke),
+                    ("FONT", (0, 0), (-1, -1), "Helvetica"),
+                ]
+            )
         )
-    )
-
-    # ---------------- Build PDF ----------------
-    doc.build(elements)
-    return file_name
+        return [table]
+
+    if isinstance(block, KeyValues):
+        return [
+            Paragraph(f"<b>{escape(label)}:</b> {escape(value)}", normal)
+            for label, value in block.rows
+        ]
+
+    if isinstance(block, ItemGroup):
+        flowables = [Paragraph(escape(block.title), styles["group"])]
+        flowables += [Paragraph(f"- {escape(item)}", normal) for item in block.items]
+        flowables.append(Spacer(1, 6))
+        return flowables
+
+    style = styles["italic"] if block.italic else normal
+    return [Paragraph(escape(block.text), style)]
@@ -0,0 +1,167 @@
+"""
+pdf_engines.py
+
+ROLE
+----
+Pluggable PDF text extraction engines.
+
+ENGINES
+-------
+- "pypdf"      : fast, pure Python (default)
+- "pdfplumber" : pdfminer-based, better reading order on complex pages
+- "layout"     : pdfplumber with layout preservation (slowest,
+                 keeps column / table alignment). Opt-in only: no
+                 built-in chain uses it; enable it per document type
+                 with set_engine_chain("lab_report", ("pdfplumber", "layout"))
+
+SELECTION
+---------
+Each document type maps to an ordered engine chain. The fast engine
+runs first; later engines are only tried when the clinical section
+headers are not found in the text (see extractor.extract_text).
+Engines whose library is not installed are skipped, and an engine
+that fails on a document is skipped for that document.
+"""
+
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+ENGINE_CHAINS: Dict[str, Tuple[str, ...]] = {
+    "default": ("pypdf", "pdfplumber"),
+    "discharge_summary": ("pypdf", "pdfplumber"),
+    "lab_report": ("pdfplumber", "pypdf"),
+}
+
+
+# =====================================================
+# ENGINE INTERFACE
+# =====================================================
+class EngineDocument:
+    """
+    One opened PDF for one engine. Pages are extracted on demand.
+    """
+
+    def page_text(self, index: int) -> str:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class PdfTextEngine:
+    """
+    Base class for text engines.
+
+    open() receives both the seekable PDF stream and the pypdf
+    reader the extractor already built (for page hashing), so
+    engines built on pypdf do not parse the document twice.
+    """
+
+    name = ""
+
+    def available(self) -> bool:
+        return True
+
+    def open(self, stream: BinaryIO, reader) -> EngineDocument:
+        raise NotImplementedError
+
+
+# =====================================================
+# PYPDF
+# =====================================================
+class _PypdfDocument(EngineDocument):
+    def __init__(self, reader):
+        self.reader = reader
+
+    def page_text(self, index: int) -> str:
+        return self.reader.pages[index].extract_text() or ""
+
+
+class PypdfEngine(PdfTextEngine):
+    name = "pypdf"
+
+    def open(self, stream: BinaryIO, reader) -> EngineDocument:
+        return _PypdfDocument(reader)
+
+
+# =====================================================
+# PDFPLUMBER / PDFMINER
+# =====================================================
+class _PlumberDocument(EngineDocument):
+    def __init__(self, stream: BinaryIO, layout: bool):
+        import pdfplumber
+
+        stream.seek(0)
+        self.pdf = pdfplumber.open(stream)
+        self.layout = layout
+
+    def page_text(self, index: int) -> str:
+        page = self.pdf.pages[index]
+        text = page.extract_text(layout=self.layout) or ""
+        page.close()   # release cached layout objects
+        return text
+
+    def close(self) -> None:
+        self.pdf.close()
+
+
+class PdfplumberEngine(PdfTextEngine):
+    name = "pdfplumber"
+    layout = False
+
+    def available(self) -> bool:
+        try:
+            import pdfplumber  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def open(self, stream: BinaryIO, reader) -> EngineDocument:
+        return _PlumberDocument(stream, layout=self.layout)
+
+
+class LayoutEngine(PdfplumberEngine):
+    name = "layout"
+    layout = True
+
+
+# =====================================================
+# REGISTRY
+# =====================================================
+ENGINES: Dict[str, PdfTextEngine] = {
+    engine.name: engine
+    for engine in (PypdfEngine(), PdfplumberEngine(), LayoutEngine())
+}
+
+
+def register_engine(engine: PdfTextEngine) -> None:
+    ENGINES[engine.name] = engine
+
+
+def set_engine_chain(document_type: str, names: Tuple[str, ...]) -> None:
+    """
+    Configure the engine chain of a document type (e.g. to opt in
+    to the "layout" engine).
+    """
+    unknown = [n for n in names if n not in ENGINES]
+    if unknown:
+        raise ValueError(f"Unknown PDF engines: {', '.join(unknown)}")
+    ENGINE_CHAINS[document_type] = tuple(names)
+
+
+def engine_chain(document_type: Optional[str] = None) -> List[PdfTextEngine]:
+    """
+    Available engines to try, in order, for a document type.
+    Unknown types use the "default" chain; pypdf is always the
+    last resort.
+    """
+
+    names = ENGINE_CHAINS.get(document_type or "default", ENGINE_CHAINS["default"])
+    chain = [ENGINES[n] for n in names if n in ENGINES and ENGINES[n].available()]
+
+    if not chain:
+        chain = [ENGINES["pypdf"]]
+
+    return chain
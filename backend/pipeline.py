@@ -0,0 +1,194 @@
+"""
+pipeline.py
+
+ROLE
+----
+Headless end-to-end pipeline used by app.py:
+
+    process_pdf → add_to_rag → query_rag → generate_full_care_plan
+
+Every stage runs under a slice of one request Deadline. A stage that
+overruns, or an optional stage (rag_write, rag_query, care_plan) that
+raises, is replaced by a documented degraded result and the request
+carries on:
+
+STAGE        DEGRADED RESULT
+-----        ---------------
+extraction   patient / summary fields marked "Pending", no text;
+             the care plan falls back to a general evaluation plan
+rag_write    report is not added to the knowledge base
+rag_query    no RAG context (empty context_docs)
+care_plan    static general-evaluation plan (minimal_care_plan); the
+             timed-out planner is NOT re-run, keeping latency bounded
+
+Scanned-PDF / upload errors (ValueError) are NOT degraded; they
+propagate so the UI can show them.
+
+When the request journal is enabled (journal.py) each run is
+appended to it in anonymized form. Stages are wrapped in the opt-in
+memory profiler hooks (mem_profiler.py).
+"""
+
+import logging
+import time
+from typing import Optional
+
+from backend.deadline import DEFAULT_REQUEST_BUDGET_S, Deadline, StageTimeout, run_with_timeout
+from backend.extractor import PdfSource, open_pdf_source, process_pdf
+from backend.journal import get_journal, record_request, sha256_of_stream
+from backend import mem_profiler
+from backend.planner import generate_full_care_plan
+from backend.rag import add_to_rag, query_rag
+
+logger = logging.getLogger(__name__)
+
+PENDING = "Pending"
+
+# Stages whose failures (not just timeouts) degrade instead of failing
+OPTIONAL_STAGES = ("rag_write", "rag_query", "care_plan")
+
+
+def pending_extraction() -> dict:
+    """
+    Placeholder extraction when the PDF could not be read in time.
+    """
+
+    return {
+        "text": "",
+        "details": {"name": PENDING, "age": PENDING, "gender": PENDING},
+        "summary_data": {
+            "chief_complaint": PENDING,
+            "final_diagnosis": PENDING,
+            "ecg_findings": PENDING,
+            "risk_factors": PENDING,
+            "clinical_summary": "",
+        },
+    }
+
+
+def minimal_care_plan(problem: str = "") -> dict:
+    """
+    Static plan used when the care_plan stage times out or fails.
+
+    Built without calling the planner, so it returns immediately.
+    """
+
+    return {
+        "identified_problem": problem or "General Medical Condition",
+        "diagnosis_code": None,
+        "treatment_plan": {
+            "Immediate Care": [
+                "Conduct comprehensive clinical evaluation",
+                "Review all available diagnostic investigations",
+            ],
+            "Follow Up": [
+                "Detailed treatment plan to be prepared by the treating physician",
+            ],
+        },
+        "estimated_cost": {
+            "consultation": "₹500 – ₹1,000",
+            "investigations": "₹1,000 – ₹2,500",
+            "notes": "Accurate cost will be determined after clinical evaluation.",
+        },
+        "appointment": {
+            "urgency": "To be assessed",
+            "specialist": "General Physician",
+            "recommended_timeline": "As advised by the treating physician",
+            "follow_up_frequency": "As advised",
+        },
+    }
+
+
+def run_pipeline(
+    source: PdfSource,
+    budget_s: float = DEFAULT_REQUEST_BUDGET_S,
+    location=None,
+    deadline: Optional[Deadline] = None,
+    pdf_sha256: Optional[str] = None
+) -> dict:
+    """
+    Run the full pipeline on one PDF within a time budget.
+
+    Args:
+        source: PDF bytes, path or binary file object
+        budget_s (float): total request budget in seconds
+        location (tuple): optional patient (latitude, longitude)
+        deadline (Deadline): use an existing deadline instead
+        pdf_sha256 (str): content hash, if the caller already has it
+
+    Returns:
+        dict: {"extraction", "context_docs", "plan",
+               "degraded": [stage, ...], "timings": {stage: seconds}}
+
+    Raises:
+        ValueError for scanned / unreadable PDFs.
+    """
+
+    deadline = deadline or Deadline(budget_s)
+    degraded = []
+    timings = {}
+
+    def stage(name, fn, fallback, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            with mem_profiler.stage(name):
+                return run_with_timeout(fn, deadline.stage_timeout(name), *args, **kwargs)
+        except StageTimeout:
+            degraded.append(name)
+            return fallback()
+        except Exception:
+            # Extraction errors (e.g. scanned PDF ValueError) reach the UI
+            if name not in OPTIONAL_STAGES:
+                raise
+            logger.exception("pipeline stage %s failed; using degraded result", name)
+            degraded.append(name)
+            return fallback()
+        finally:
+            timings[name] = time.perf_counter() - started
+
+    # 1️⃣ Extraction
+    extraction = stage("extraction", process_pdf, pending_extraction, source)
+    # PDF parsing vs structured extraction (what tools/replay.py re-times)
+    for part, seconds in extraction.get("timings", {}).items():
+        timings[f"extraction_{part}"] = seconds
+    patient = extraction["details"]
+    summary = extraction["summary_data"]
+    diagnosis = summary.get("final_diagnosis", "")
+    if diagnosis == PENDING:
+        diagnosis = ""
+        summary_for_plan = dict(summary, final_diagnosis="")
+    else:
+        summary_for_plan = summary
+
+    # 2️⃣ Knowledge base (optional)
+    if extraction["text"]:
+        stage("rag_write", add_to_rag, lambda: None, extraction["text"], diagnosis)
+
+    # 3️⃣ Retrieval (optional)
+    context_docs = stage("rag_query", query_rag, list, diagnosis)
+
+    # 4️⃣ Care plan
+    plan = stage(
+        "care_plan",
+        generate_full_care_plan,
+        lambda: minimal_care_plan(diagnosis),
+        patient=patient,
+        summary=summary_for_plan,
+        context_docs=context_docs,
+        location=location,
+    )
+
+    if get_journal() is not None:
+        # An abandoned extraction may still be reading the stream
+        if pdf_sha256 is None and "extraction" not in degraded:
+            with open_pdf_source(source) as stream:
+                pdf_sha256 = sha256_of_stream(stream)
+        record_request(pdf_sha256, extraction, plan, degraded, timings)
+
+    return {
+        "extraction": extraction,
+        "context_docs": context_docs,
+        "plan": plan,
+        "degraded": degraded,
+        "timings": timings,
+    }
@@ -15,9 +15,13 @@ RESPONSIBILITIES
 This file DOES NOT handle UI or extraction.
 """
 
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
 from backend.treatment_llm import generate_treatment_plan_llm
 from backend.cost_estimator import estimate_cost
 from backend.appointment_planner import recommend_appointment
+from backend.lab_values import extract_lab_batch, evaluate_rules
+from backend.icd10 import normalize_diagnosis
 
 
 # =====================================================
@@ -28,21 +32,60 @@ def infer_medical_problem(summary: dict) -> str:
     Infer disease from extracted clinical summary.
     """
 
-    diagnosis = summary.get("final_diagnosis", "").strip()
-    text = summary.get("clinical_summary", "").lower()
+    return infer_medical_problems([summary])[0]
+
+
+def infer_medical_problems(summaries: List[dict]) -> List[str]:
+    """
+    Infer diseases for a batch of clinical summaries.
+
+    Order of evidence:
+    1. Explicit final diagnosis
+    2. Lab values (thresholds evaluated for the whole batch at once)
+    3. Conditions named in the text
+    """
+
+    texts = [s.get("clinical_summary", "") for s in summaries]
+    labs = extract_lab_batch(texts)
+    lab_problems = evaluate_rules(labs)
+
+    glucose_measured = labs.measured("glucose_mg_dl") | labs.measured("hba1c_pct")
+    bp_measured = labs.measured("bp_systolic")
+
+    problems = []
+    for i, summary in enumerate(summaries):
+        diagnosis = summary.get("final_diagnosis", "").strip()
+
+        # Prefer explicit diagnosis
+        if diagnosis and diagnosis.lower() != "not mentioned":
+            problems.append(diagnosis)
+        elif lab_problems[i]:
+            problems.append(str(lab_problems[i]))
+        else:
+            problems.append(_named_condition(
+                texts[i].lower(),
+                glucose_measured=bool(glucose_measured[i]),
+                bp_measured=bool(bp_measured[i]),
+            ))
+
+    return problems
 
-    # Prefer explicit diagnosis
-    if diagnosis and diagnosis.lower() != "not mentioned":
-        return diagnosis
 
-    # Heuristic inference if diagnosis missing
-    if "glucose" in text or "diabetes" in text:
+def _named_condition(text: str, glucose_measured: bool, bp_measured: bool) -> str:
+    """
+    Heuristic inference if diagnosis missing and no lab rule fired.
+
+    Measurement words ("glucose", "blood pressure") only count when
+    no value was read, since a measured normal value is not disease.
+    """
+
+    if "diabetes" in text or ("glucose" in text and not glucose_measured):
         return "Diabetes Mellitus"
 
     if "st elevation" in text or "stemi" in text or "myocardial" in text:
         return "Acute Myocardial Infarction"
 
-    if "blood pressure" in text or "hypertension" in text:
+    if "hypertension" in text or ("blood pressure" in text and not bp_measured):
         return "Hypertension"
 
     if "infection" in text or "fever" in text:
@@ -51,16 +94,60 @@ def infer_medical_problem(summary: dict) -> str:
     return "General Medical Condition"
 
 
+# =====================================================
+# CANONICAL CONDITION (GROUPING / SHARDING KEY)
+# =====================================================
+CANONICAL_CONDITIONS = [
+    ("myocardial_infarction", ["stemi", "myocardial", "heart attack", "acute coronary"]),
+    ("diabetes", ["diabetes", "hyperglycemia"]),
+    ("hypertension", ["hypertension", "high blood pressure"]),
+    ("infection", ["infection", "sepsis", "fever"]),
+]
+
+
+def canonical_condition(problem: str) -> str:
+    """
+    Map a free-text problem to a small, stable condition key
+    ("diabetes", "hypertension", ...; "general" otherwise).
+    """
+
+    p = (problem or "").lower()
+
+    for key, keywords in CANONICAL_CONDITIONS:
+        if any(k in p for k in keywords):
+            return key
+
+    return "general"
+
+
+def diagnosis_code(problem: str) -> Optional[dict]:
+    """
+    ICD-10 code for the identified problem:
+    {"code","name","confidence","method"}, or None when the table
+    has no match (or is unavailable).
+    """
+
+    try:
+        match = normalize_diagnosis(problem or "")
+    except OSError:
+        return None
+    return match._asdict() if match else None
+
+
 # =====================================================
 # FULL CARE PLAN GENERATOR
 # =====================================================
 def generate_full_care_plan(
     patient: dict,
     summary: dict,
-    context_docs: list
+    context_docs: list,
+    location=None
 ) -> dict:
     """
     Generate the complete care plan pipeline.
+
+    location: optional patient (latitude, longitude) used to attach
+    the nearest matching hospitals to the appointment recommendation.
     """
 
     # 1️⃣ Identify medical problem
@@ -77,11 +164,63 @@ def generate_full_care_plan(
     estimated_cost = estimate_cost(problem)
 
     # 4️⃣ Recommend appointment
-    appointment = recommend_appointment(problem)
+    appointment = recommend_appointment(problem, location=location)
 
     return {
         "identified_problem": problem,
+        "diagnosis_code": diagnosis_code(problem),
         "treatment_plan": treatment_plan,
         "estimated_cost": estimated_cost,
         "appointment": appointment
     }
+
+
+# =====================================================
+# BATCH CARE PLAN GENERATOR (COHORT REPORTS)
+# =====================================================
+def generate_full_care_plan_many(records: Iterable[dict]) -> Iterator[dict]:
+    """
+    Generate care plans for many patients, computing treatment,
+    cost and appointment once per unique problem.
+
+    All summaries are classified together (lab rules vectorized),
+    then results are streamed back in input order. Patients with
+    the same problem (and location) share the same plan objects,
+    so treat yielded plans as read-only.
+
+    Args:
+        records: dicts with "patient", "summary" and optionally
+            "context_docs" and "location"
+
+    Yields:
+        dict: Same structure as generate_full_care_plan()
+    """
+
+    records = list(records)
+    problems = infer_medical_problems([r.get("summary", {}) for r in records])
+
+    shared: Dict[Tuple, Tuple[dict, dict, dict]] = {}
+
+    for record, problem in zip(records, problems):
+        key = (problem, record.get("location"))
+
+        if key not in shared:
+            shared[key] = (
+                generate_treatment_plan_llm(
+                    patient=record.get("patient", {}),
+                    problem=problem,
+                    context_docs=record.get("context_docs", [])
+                ),
+                estimate_cost(problem),
+                recommend_appointment(problem, location=record.get("location")),
+            )
+
+        treatment_plan, estimated_cost, appointment = shared[key]
+
+        yield {
+            "identified_problem": problem,
+            "diagnosis_code": diagnosis_code(problem),
+            "treatment_plan": treatment_plan,
+            "estimated_cost": estimated_cost,
+            "appointment": appointment
+        }
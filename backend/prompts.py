@@ -0,0 +1,288 @@
+"""
+prompts.py
+
+ROLE
+----
+Token-budget-aware preparation of report text for LLM prompts.
+
+FEATURES
+--------
+- Detects clinical section headers (chief complaint, diagnosis,
+  impression, ECG, risk factors, findings)
+- Keeps only the relevant spans plus the patient header block
+- Estimates tokens locally (no tokenizer download / API call)
+- Truncates deterministically to a configurable budget
+- Reports how many tokens were saved per prompt
+- Splits very long reports into overlapping token-sized chunks
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+DEFAULT_REPORT_TOKEN_BUDGET = 1500
+
+# Characters kept from the top of the report (name / age / gender)
+HEADER_BLOCK_CHARS = 400
+
+# Lower number = kept first when the budget is tight
+RELEVANT_SECTIONS = [
+    (1, "final_diagnosis", r"final diagnosis|diagnosis|impression|conclusion"),
+    (2, "chief_complaint", r"chief complaints?|presenting complaints?"),
+    (3, "ecg", r"ecg findings|ecg interpretation|ecg"),
+    (4, "risk_factors", r"risk factors|past history|comorbidities"),
+    (5, "findings", r"key findings|findings|investigations|lab results"),
+]
+
+# Any "Some Header:" or ALL-CAPS line ends the previous section
+_ANY_HEADER = re.compile(
+    r"^[ \t]*(?:[A-Za-z][A-Za-z /&()-]{1,40}[ \t]*:|[A-Z][A-Z /&()-]{3,40}[ \t]*$)",
+    re.M
+)
+
+_RELEVANT_HEADERS = [
+    (priority, name, re.compile(rf"^[ \t]*(?:{pattern})\b[ \t]*[:\-]?", re.I | re.M))
+    for priority, name, pattern in RELEVANT_SECTIONS
+]
+
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+# =====================================================
+# TOKEN ESTIMATION
+# =====================================================
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap local token estimate.
+
+    Counts words and punctuation, adding one token per 6 extra
+    characters of long words (sub-word splits), which tracks
+    Llama-style BPE tokenizers closely enough for budgeting.
+    """
+
+    if not text:
+        return 0
+
+    tokens = 0
+    for piece in _TOKEN_PIECES.findall(text):
+        tokens += 1 + max(0, len(piece) - 6) // 6
+    return tokens
+
+
+# =====================================================
+# SECTION DETECTION
+# =====================================================
+@dataclass
+class PromptStats:
+    original_tokens: int
+    used_tokens: int
+    sections: List[str] = field(default_factory=list)
+    truncated: bool = False
+
+    @property
+    def saved_tokens(self) -> int:
+        return max(0, self.original_tokens - self.used_tokens)
+
+
+def find_relevant_spans(text: str) -> List[Tuple[int, str, int, int]]:
+    """
+    Locate relevant sections in the report.
+
+    Returns:
+        list: (priority, section_name, start, end) tuples, where a
+        section runs from its header to the next header-like line
+    """
+
+    boundaries = sorted({m.start() for m in _ANY_HEADER.finditer(text)} | {len(text)})
+
+    spans = []
+    seen = set()
+    for priority, name, pattern in _RELEVANT_HEADERS:
+        for m in pattern.finditer(text):
+            start = m.start()
+            if start in seen:
+                continue
+            seen.add(start)
+            end = next((b for b in boundaries if b > start), len(text))
+            spans.append((priority, name, start, end))
+
+    return spans
+
+
+def _truncate_to_tokens(text: str, budget: int) -> str:
+    """
+    Cut text to roughly `budget` tokens on a whitespace boundary.
+    """
+
+    if estimate_tokens(text) <= budget:
+        return text
+
+    pieces = list(_TOKEN_PIECES.finditer(text))
+    used = 0
+    cut = 0
+    for m in pieces:
+        cost = 1 + max(0, len(m.group()) - 6) // 6
+        if used + cost > budget:
+            break
+        used += cost
+        cut = m.end()
+
+    return text[:cut].rstrip()
+
+
+# =====================================================
+# PROMPT BUILDER
+# =====================================================
+def select_report_text(
+    report_text: str,
+    token_budget: int = DEFAULT_REPORT_TOKEN_BUDGET
+) -> Tuple[str, PromptStats]:
+    """
+    Reduce report text to the relevant sections within a token budget.
+
+    The patient header block is always kept first, then relevant
+    sections in priority order (diagnosis before complaint before
+    ECG, ...). Sections are emitted in document order. When no
+    section headers are detected the report is simply truncated.
+
+    Args:
+        report_text (str): Full extracted report text
+        token_budget (int): Maximum estimated tokens of report text
+
+    Returns:
+        (str, PromptStats): Text to embed in the prompt and savings
+    """
+
+    original_tokens = estimate_tokens(report_text)
+    spans = find_relevant_spans(report_text)
+
+    if not spans:
+        selected = _truncate_to_tokens(report_text, token_budget)
+        stats = PromptStats(
+            original_tokens=original_tokens,
+            used_tokens=estimate_tokens(selected),
+            sections=["full_text"],
+            truncated=selected != report_text,
+        )
+        return selected, stats
+
+    header_end = min(HEADER_BLOCK_CHARS, min(start for _, _, start, _ in spans))
+    candidates = sorted(spans)
+    if header_end > 0:
+        candidates.insert(0, (0, "patient_header", 0, header_end))
+
+    remaining = token_budget
+    chosen = []
+    truncated = False
+
+    for _, name, start, end in candidates:
+        if remaining <= 0:
+            truncated = True
+            break
+
+        chunk = report_text[start:end].strip()
+        if not chunk:
+            continue
+
+        cost = estimate_tokens(chunk)
+        if cost > remaining:
+            chunk = _truncate_to_tokens(chunk, remaining)
+            cost = estimate_tokens(chunk)
+            truncated = True
+
+        chosen.append((start, name, chunk))
+        remaining -= cost
+
+    chosen.sort()
+    selected = "\n...\n".join(chunk for _, _, chunk in chosen)
+
+    stats = PromptStats(
+        original_tokens=original_tokens,
+        used_tokens=estimate_tokens(selected),
+        sections=[name for _, name, _ in chosen],
+        truncated=truncated,
+    )
+    return selected, stats
+
+
+def log_prompt_stats(label: str, stats: PromptStats) -> None:
+    logger.info(
+        "%s prompt: %d/%d report tokens used, %d saved (sections=%s, truncated=%s)",
+        label,
+        stats.used_tokens,
+        stats.original_tokens,
+        stats.saved_tokens,
+        ",".join(stats.sections),
+        stats.truncated,
+    )
+
+
+# =====================================================
+# CHUNKING (MAP-REDUCE EXTRACTION)
+# =====================================================
+def split_into_chunks(
+    text: str,
+    chunk_tokens: int = DEFAULT_REPORT_TOKEN_BUDGET,
+    overlap_tokens: int = 150
+) -> List[str]:
+    """
+    Split text into overlapping chunks of about `chunk_tokens`.
+
+    Chunks are cut on token boundaries and, where possible, moved
+    back to the nearest preceding line break so section headers
+    are not split. Consecutive chunks share `overlap_tokens`.
+    """
+
+    if chunk_tokens <= 0:
+        raise ValueError("chunk_tokens must be positive")
+
+    overlap_tokens = max(0, min(overlap_tokens, chunk_tokens // 2))
+
+    pieces = []
+    for m in _TOKEN_PIECES.finditer(text):
+        pieces.append((m.start(), m.end(), 1 + max(0, len(m.group()) - 6) // 6))
+
+    if sum(cost for _, _, cost in pieces) <= chunk_tokens:
+        return [text] if text.strip() else []
+
+    chunks = []
+    first = 0
+    while first < len(pieces):
+        used = 0
+        last = first
+        while last < len(pieces) and used + pieces[last][2] <= chunk_tokens:
+            used += pieces[last][2]
+            last += 1
+        last = max(last, first + 1)
+
+        start = pieces[first][0]
+        end = pieces[last - 1][1] if last >= len(pieces) else pieces[last][0]
+
+        # Prefer ending on a line break inside the last quarter
+        if last < len(pieces):
+            newline = text.rfind("\n", start, end)
+            if newline > start + (end - start) * 3 // 4:
+                end = newline
+                while last > first + 1 and pieces[last - 1][0] >= end:
+                    last -= 1
+
+        chunks.append(text[start:end].strip())
+
+        if last >= len(pieces):
+            break
+
+        # Step back by the overlap for the next chunk
+        back = 0
+        next_first = last
+        while next_first > first + 1 and back + pieces[next_first - 1][2] <= overlap_tokens:
+            back += pieces[next_first - 1][2]
+            next_first -= 1
+        first = next_first
+
+    return [c for c in chunks if c]
@@ -7,24 +7,747 @@ Lightweight Retrieval-Augmented Generation (RAG) module.
 
 PURPOSE
 -------
-- Store previously processed medical reports in memory
-- Retrieve relevant past cases based on diagnosis
+- Store previously processed medical reports as overlapping passages
+- Partition the store into shards by canonical condition
+- Retrieve the most relevant passages for a diagnosis
 - Improve treatment plan consistency
 
 NOTE
 ----
-This is an in-memory RAG:
-✔ Works perfectly on Streamlit Cloud
+This is a file-backed passage store:
+✔ Full reports are indexed (no 3000-character cut-off)
+✔ Passage text lives in one append-only file that is memory-mapped,
+  the in-memory index only keeps (offset, length) references
+✔ One shard per canonical condition (data/rag/<condition>/); a query
+  only touches its own shard unless that shard is too small
+✔ Shards load lazily and independently, so a worker can be limited
+  to the partitions it serves (configure_shards)
+✔ Safe for concurrent Streamlit sessions: writers group-commit and
+  publish immutable snapshots; readers never take a lock
+✔ Safe for several worker processes: writes are append-only under an
+  exclusive file lock
+✔ Each segment has an inverted term index, persisted and memory-mapped
+  next to passages.idx, so a search scores passages without decoding
+  them and decodes only the top_k; a restart re-tokenizes nothing
+✔ Writes and queries route through the same shard_for()
 ✔ No external database needed
-✔ Resets automatically on app restart (acceptable for demo/project)
 """
 
-from typing import List, Dict
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import re
+from array import array
+import threading
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:   # Windows: thread-level locking only
+    fcntl = None
+
+from backend.prompts import split_into_chunks
+from backend.planner import canonical_condition, infer_medical_problem
 
 # =====================================================
-# IN-MEMORY KNOWLEDGE BASE
+# CONFIGURATION
 # =====================================================
-_KNOWLEDGE_BASE: List[Dict[str, str]] = []
+RAG_DIR = os.path.join("data", "rag")
+
+PASSAGE_TOKENS = 200
+PASSAGE_OVERLAP_TOKENS = 40
+
+# Shards with fewer passages than this also search the other shards
+MIN_SHARD_PASSAGES = 20
+
+# Heterogeneous shard: results must still match the diagnosis text
+GENERAL_SHARD = "general"
+
+_TERM = re.compile(r"[a-z0-9]{3,}")
+
+
+# =====================================================
+# ON-DISK POSTINGS
+# =====================================================
+_POSTINGS_MAGIC = b"RAGPOST1"
+
+# report_start, report_end, passages, terms, postings
+_POSTINGS_HEADER = 5
+
+# term key → (passage indices within the segment, term counts)
+TermIndex = Dict[int, Tuple[array, array]]
+
+
+def _term_key(term: str) -> int:
+    """
+    Stable 64-bit key of a term (the built-in hash is salted per process).
+    """
+    return int.from_bytes(
+        hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+def _index_terms(texts: Iterable[str]) -> TermIndex:
+    """
+    Inverted index of passage texts (whole terms, lowercased).
+    """
+    index: TermIndex = {}
+    for i, text in enumerate(texts):
+        for term, count in Counter(_TERM.findall(text.lower())).items():
+            key = _term_key(term)
+            entry = index.get(key)
+            if entry is None:
+                entry = index[key] = (array("i"), array("i"))
+            entry[0].append(i)
+            entry[1].append(count)
+    return index
+
+
+class _Postings:
+    """
+    Memory-mapped inverted index of one segment.
+
+    File layout (native byte order): magic, header, sorted term keys
+    (uint64), start of each term's postings (int64, one extra end
+    entry), passage indices (int32) and term counts (int32). Lookups
+    binary-search the keys; nothing but the map lives on the heap.
+    """
+
+    __slots__ = ("report_start", "report_end", "passages", "keys", "starts", "ids", "counts")
+
+    def __init__(self, buf: mmap.mmap):
+        view = memoryview(buf)
+        pos = len(_POSTINGS_MAGIC)
+        header = view[pos:pos + 8 * _POSTINGS_HEADER].cast("q")
+        self.report_start, self.report_end, self.passages, terms, postings = header
+        pos += 8 * _POSTINGS_HEADER
+
+        self.keys = view[pos:pos + 8 * terms].cast("Q")
+        pos += 8 * terms
+        self.starts = view[pos:pos + 8 * (terms + 1)].cast("q")
+        pos += 8 * (terms + 1)
+        self.ids = view[pos:pos + 4 * postings].cast("i")
+        pos += 4 * postings
+        self.counts = view[pos:pos + 4 * postings].cast("i")
+
+    def get(self, term: str) -> Optional[Tuple[memoryview, memoryview]]:
+        key = _term_key(term)
+        i = bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return None
+        start, end = self.starts[i], self.starts[i + 1]
+        return self.ids[start:end], self.counts[start:end]
+
+    def items(self) -> Iterable[Tuple[int, memoryview, memoryview]]:
+        for i, key in enumerate(self.keys):
+            start, end = self.starts[i], self.starts[i + 1]
+            yield key, self.ids[start:end], self.counts[start:end]
+
+
+def _open_postings(path: str) -> Optional[_Postings]:
+    """
+    Map a postings file; None if it is missing or not a postings file.
+    """
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(_POSTINGS_MAGIC)) != _POSTINGS_MAGIC:
+                return None
+            return _Postings(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_postings(
+    path: str,
+    report_start: int,
+    report_end: int,
+    passages: int,
+    index: TermIndex
+) -> _Postings:
+    """
+    Persist a segment's inverted index (atomically replaced) and map it.
+    """
+    keys = array("Q", sorted(index))
+    starts, ids, counts = array("q", [0]), array("i"), array("i")
+    for key in keys:
+        entry_ids, entry_counts = index[key]
+        ids.extend(entry_ids)
+        counts.extend(entry_counts)
+        starts.append(len(ids))
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_POSTINGS_MAGIC)
+        array("q", (report_start, report_end, passages, len(keys), len(ids))).tofile(f)
+        keys.tofile(f)
+        starts.tofile(f)
+        ids.tofile(f)
+        counts.tofile(f)
+    os.replace(tmp_path, path)
+
+    return _open_postings(path)
+
+
+# =====================================================
+# IMMUTABLE SNAPSHOTS
+# =====================================================
+class _Segment(NamedTuple):
+    """
+    One published batch of reports. Never mutated after creation.
+    """
+    report_base: int
+    diagnoses: Tuple[str, ...]
+    report_ids: array
+    offsets: array
+    lengths: array
+    postings: _Postings
+
+
+class _Snapshot(NamedTuple):
+    """
+    Everything a reader needs, published with a single assignment.
+    """
+    segments: Tuple[_Segment, ...]
+    text_map: Optional[mmap.mmap]
+    text_size: int
+    passages: int
+    reports: int
+    reports_bytes: int   # size of reports.jsonl this snapshot reflects
+
+
+_EMPTY_SNAPSHOT = _Snapshot((), None, 0, 0, 0, 0)
+
+
+@contextmanager
+def _process_lock(path: str):
+    """
+    Exclusive lock shared by every process writing one store
+    (no-op where fcntl is unavailable).
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a+b") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+# =====================================================
+# PASSAGE STORE
+# =====================================================
+class PassageStore:
+    """
+    Append-only passage store backed by these files:
+
+    - passages.txt : UTF-8 passage text, appended
+    - passages.idx : int64 triples (report_id, offset, length)
+    - reports.jsonl: one {"diagnosis": ...} line per report
+    - postings/    : one memory-mapped inverted index per segment,
+                     named by the report range it covers
+
+    Concurrency (Streamlit runs each session in its own thread):
+    readers take the current immutable snapshot and never lock.
+    Writers queue their reports; whichever writer holds the write
+    lock drains the whole queue as one batch (group commit),
+    appends it to disk and publishes a new snapshot atomically.
+
+    Several processes may share a store: writes and loads happen
+    under an exclusive file lock (.write.lock) and only ever append.
+    A writer that finds reports.jsonl changed by another process
+    reloads before appending, so report ids and offsets never
+    collide. Files are appended text → reports → index → postings;
+    an interrupted write leaves unreferenced text or a report without
+    passages, torn tails are trimmed by the next writer, and reports
+    without a postings file are indexed by the next load.
+
+    Reading never creates the store directory; the first write does.
+    """
+
+    # Segments are merged once a store has more than this many
+    MAX_SEGMENTS = 32
+
+    _ENTRY_BYTES = 3 * array("q").itemsize
+
+    def __init__(self, directory: str = RAG_DIR):
+        self.directory = directory
+        self.text_path = os.path.join(directory, "passages.txt")
+        self.index_path = os.path.join(directory, "passages.idx")
+        self.reports_path = os.path.join(directory, "reports.jsonl")
+        self.postings_dir = os.path.join(directory, "postings")
+        self.lock_path = os.path.join(directory, ".write.lock")
+
+        self._snapshot = _EMPTY_SNAPSHOT
+        self._pending: List[Tuple[str, List[str]]] = []
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+        if os.path.isdir(directory):
+            with _process_lock(self.lock_path):
+                self._load()
+
+    # -------------------------------
+    # Persistence
+    # -------------------------------
+    def _load(self) -> None:
+        """
+        Read the store from disk. Caller holds the process lock.
+        """
+
+        diagnoses = []
+        reports_bytes = 0
+        if os.path.exists(self.reports_path):
+            with open(self.reports_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break   # torn last line of an interrupted write
+                    reports_bytes += len(line)
+                    if line.strip():
+                        diagnoses.append(json.loads(line)["diagnosis"])
+
+        entries = []
+        if os.path.exists(self.index_path):
+            raw = array("q")
+            with open(self.index_path, "rb") as f:
+                data = f.read()
+            raw.frombytes(data[: len(data) - len(data) % self._ENTRY_BYTES])
+
+            # Drop entries of a report whose write was interrupted
+            entries = [
+                (raw[i], raw[i + 1], raw[i + 2])
+                for i in range(0, len(raw), 3) if raw[i] < len(diagnoses)
+            ]
+
+        text_size = max((o + n for _, o, n in entries), default=0)
+        text_map = self._open_map(text_size)
+
+        segments = []
+        ranges = self._segment_ranges(len(diagnoses))
+        starts = [start for start, _ in ranges]
+        grouped = [(array("q"), array("q"), array("q")) for _ in ranges]
+        for report_id, offset, length in entries:
+            report_ids, offsets, lengths = grouped[bisect_left(starts, report_id + 1) - 1]
+            report_ids.append(report_id)
+            offsets.append(offset)
+            lengths.append(length)
+
+        for (start, end), (report_ids, offsets, lengths) in zip(ranges, grouped):
+            postings = _open_postings(self._postings_path(start, end))
+            if postings is None or postings.passages != len(offsets):
+                os.makedirs(self.postings_dir, exist_ok=True)
+                postings = _write_postings(
+                    self._postings_path(start, end),
+                    start,
+                    end,
+                    len(offsets),
+                    _index_terms(
+                        text_map[o:o + n].decode("utf-8", errors="ignore")
+                        for o, n in zip(offsets, lengths)
+                    ),
+                )
+            segments.append(
+                _Segment(start, tuple(diagnoses[start:end]), report_ids, offsets, lengths, postings)
+            )
+
+        self._remove_stale_postings(ranges)
+
+        self._snapshot = _Snapshot(
+            segments=tuple(segments),
+            text_map=text_map,
+            text_size=text_size,
+            passages=len(entries),
+            reports=len(diagnoses),
+            reports_bytes=reports_bytes,
+        )
+
+    def _postings_path(self, report_start: int, report_end: int) -> str:
+        return os.path.join(self.postings_dir, f"{report_start:012d}-{report_end:012d}.post")
+
+    def _postings_files(self) -> List[Tuple[int, int]]:
+        """
+        Report ranges of the postings files on disk.
+        """
+        if not os.path.isdir(self.postings_dir):
+            return []
+        ranges = []
+        for name in os.listdir(self.postings_dir):
+            stem, ext = os.path.splitext(name)
+            start, _, end = stem.partition("-")
+            if ext == ".post" and start.isdigit() and end.isdigit():
+                ranges.append((int(start), int(end)))
+        return ranges
+
+    def _segment_ranges(self, reports: int) -> List[Tuple[int, int]]:
+        """
+        Cover reports [0, reports) with the widest postings files on
+        disk; whatever they do not cover becomes one segment to index.
+        """
+        ends: Dict[int, int] = {}
+        for start, end in self._postings_files():
+            if end <= reports:
+                ends[start] = max(end, ends.get(start, end))
+
+        ranges = []
+        start = 0
+        while start < reports:
+            end = ends.get(start, reports)
+            ranges.append((start, end))
+            start = end
+        return ranges
+
+    def _remove_stale_postings(self, ranges: List[Tuple[int, int]]) -> None:
+        """
+        Delete postings files replaced by a merge. Caller holds the
+        process lock; maps held by other snapshots stay valid.
+        """
+        live = set(ranges)
+        covered = ranges[-1][1] if ranges else 0
+        for start, end in self._postings_files():
+            if (start, end) not in live and end <= covered:
+                try:
+                    os.remove(self._postings_path(start, end))
+                except OSError:
+                    pass   # still mapped (Windows); removed by a later load
+
+    def _open_map(self, size: int) -> Optional[mmap.mmap]:
+        if size == 0:
+            return None
+        with open(self.text_path, "rb") as f:
+            return mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+
+    def _trim_torn_tails(self) -> None:
+        """
+        Cut partial records left by an interrupted writer so appends
+        start on a record boundary. Caller holds the process lock.
+        """
+        if os.path.exists(self.index_path):
+            size = os.path.getsize(self.index_path)
+            if size % self._ENTRY_BYTES:
+                with open(self.index_path, "r+b") as f:
+                    f.truncate(size - size % self._ENTRY_BYTES)
+
+        if os.path.exists(self.reports_path) and os.path.getsize(self.reports_path):
+            with open(self.reports_path, "r+b") as f:
+                data = f.read()
+                if not data.endswith(b"\n"):
+                    f.truncate(data.rfind(b"\n") + 1)
+
+    # -------------------------------
+    # Writing
+    # -------------------------------
+    def add(self, text: str, diagnosis: str) -> int:
+        """
+        Split a report into passages and store them.
+
+        Returns:
+            int: Number of passages queued for this report
+        """
+
+        return self.add_many([(text, diagnosis)])
+
+    def add_many(self, reports: Iterable[Tuple[str, str]]) -> int:
+        """
+        Store several (text, diagnosis) reports as one batch.
+
+        Passage splitting happens outside any lock. The call returns
+        once its reports are visible to readers (either written by
+        this thread or by a concurrent writer's batch).
+        """
+
+        batch = []
+        for text, diagnosis in reports:
+            passages = split_into_chunks(text, PASSAGE_TOKENS, PASSAGE_OVERLAP_TOKENS)
+            if passages:
+                batch.append((diagnosis, passages))
+
+        if not batch:
+            return 0
+
+        with self._pending_lock:
+            self._pending.extend(batch)
+
+        with self._write_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, []
+            if pending:
+                os.makedirs(self.postings_dir, exist_ok=True)
+                with _process_lock(self.lock_path):
+                    self._write_batch(pending)
+
+        return sum(len(passages) for _, passages in batch)
+
+    def _write_batch(self, batch: List[Tuple[str, List[str]]]) -> None:
+        """
+        Append a batch to disk and publish a new snapshot.
+        Caller holds the write lock and the process lock.
+        """
+
+        self._trim_torn_tails()
+
+        reports_on_disk = (
+            os.path.getsize(self.reports_path) if os.path.exists(self.reports_path) else 0
+        )
+        if reports_on_disk != self._snapshot.reports_bytes:
+            self._load()   # another process appended reports
+
+        snap = self._snapshot
+        text_end = os.path.getsize(self.text_path) if os.path.exists(self.text_path) else 0
+
+        report_ids, offsets, lengths = array("q"), array("q"), array("q")
+        entries = array("q")
+        blob = bytearray()
+        texts = []
+        report_end = snap.reports + len(batch)
+
+        for n, (diagnosis, passages) in enumerate(batch):
+            report_id = snap.reports + n
+            for passage in passages:
+                encoded = passage.encode("utf-8")
+                offset = text_end + len(blob)
+                entries.extend((report_id, offset, len(encoded)))
+                report_ids.append(report_id)
+                offsets.append(offset)
+                lengths.append(len(encoded))
+                blob.extend(encoded)
+                texts.append(passage)
+
+        reports_blob = "".join(
+            json.dumps({"diagnosis": diagnosis}) + "\n" for diagnosis, _ in batch
+        ).encode("utf-8")
+
+        with open(self.text_path, "ab") as f:
+            f.write(blob)
+        with open(self.reports_path, "ab") as f:
+            f.write(reports_blob)
+        with open(self.index_path, "ab") as f:
+            entries.tofile(f)
+
+        postings = _write_postings(
+            self._postings_path(snap.reports, report_end),
+            snap.reports,
+            report_end,
+            len(offsets),
+            _index_terms(texts),
+        )
+        segment = _Segment(
+            snap.reports,
+            tuple(diagnosis for diagnosis, _ in batch),
+            report_ids,
+            offsets,
+            lengths,
+            postings,
+        )
+        segments = snap.segments + (segment,)
+        if len(segments) > self.MAX_SEGMENTS:
+            segments = (self._merge_segments(segments),)
+            self._remove_stale_postings([(0, report_end)])
+
+        text_size = text_end + len(blob)
+
+        # Old maps stay valid for readers still holding the old
+        # snapshot; they are released when no snapshot refers to them
+        self._snapshot = _Snapshot(
+            segments=segments,
+            text_map=self._open_map(text_size),
+            text_size=text_size,
+            passages=snap.passages + len(offsets),
+            reports=report_end,
+            reports_bytes=snap.reports_bytes + len(reports_blob),
+        )
+
+    def _merge_segments(self, segments: Tuple[_Segment, ...]) -> _Segment:
+        """
+        Combine segments into one, persisting the merged postings.
+        Caller holds the process lock.
+        """
+
+        diagnoses: List[str] = []
+        report_ids, offsets, lengths = array("q"), array("q"), array("q")
+        index: TermIndex = {}
+
+        for segment in segments:
+            shift = len(offsets)
+            for key, ids, counts in segment.postings.items():
+                entry = index.get(key)
+                if entry is None:
+                    entry = index[key] = (array("i"), array("i"))
+                entry[0].extend(i + shift for i in ids)
+                entry[1].extend(counts)
+            diagnoses.extend(segment.diagnoses)
+            report_ids.extend(segment.report_ids)
+            offsets.extend(segment.offsets)
+            lengths.extend(segment.lengths)
+
+        report_start = segments[0].report_base
+        report_end = report_start + len(diagnoses)
+        postings = _write_postings(
+            self._postings_path(report_start, report_end),
+            report_start,
+            report_end,
+            len(offsets),
+            index,
+        )
+        return _Segment(report_start, tuple(diagnoses), report_ids, offsets, lengths, postings)
+
+    # -------------------------------
+    # Reading (lock-free)
+    # -------------------------------
+    def search(
+        self,
+        query: str,
+        top_k: int = 3,
+        match_diagnosis: bool = True
+    ) -> List[Tuple[int, int, str]]:
+        """
+        Best passages for the query as (score, passage_id, text).
+
+        Passages are ranked by how often query terms occur in them
+        (whole terms, from each segment's inverted index); ties and
+        any remaining slots go to the most recently added passages.
+        Only the returned passages are decoded. With match_diagnosis
+        only reports whose diagnosis contains the query are
+        considered.
+        """
+
+        snap = self._snapshot
+        if snap.text_map is None or top_k <= 0:
+            return []
+
+        terms = set(_TERM.findall(query.lower()))
+        hits = []        # (score, passage_id, segment, local index)
+        allowed = []     # per segment: report ids or None
+        passage_base = 0
+
+        for segment in snap.segments:
+            reports = None
+            if match_diagnosis:
+                reports = {
+                    segment.report_base + i
+                    for i, d in enumerate(segment.diagnoses) if query in d
+                }
+            allowed.append((segment, passage_base, reports))
+
+            scores: Dict[int, int] = {}
+            for term in terms:
+                entry = segment.postings.get(term)
+                if entry is None:
+                    continue
+                for i, count in zip(*entry):
+                    if reports is None or segment.report_ids[i] in reports:
+                        scores[i] = scores.get(i, 0) + count
+
+            hits.extend(
+                (score, passage_base + i, segment, i) for i, score in scores.items()
+            )
+            passage_base += len(segment.offsets)
+
+        best = heapq.nlargest(top_k, hits, key=lambda h: (h[0], h[1]))
+
+        # Unscored passages, newest first, fill the remaining slots
+        if len(best) < top_k:
+            taken = {h[1] for h in best}
+            for segment, base, reports in reversed(allowed):
+                for i in range(len(segment.offsets) - 1, -1, -1):
+                    if len(best) >= top_k:
+                        break
+                    if base + i in taken:
+                        continue
+                    if reports is None or segment.report_ids[i] in reports:
+                        best.append((0, base + i, segment, i))
+
+        results = []
+        for score, passage_id, segment, i in best:
+            start = segment.offsets[i]
+            text = snap.text_map[start:start + segment.lengths[i]].decode(
+                "utf-8", errors="ignore"
+            )
+            results.append((score, passage_id, text))
+        return results
+
+    def query(self, query: str, top_k: int = 3) -> List[str]:
+        """
+        Best passages from reports whose diagnosis matches the query.
+        """
+
+        return [text for _, _, text in self.search(query, top_k)]
+
+    def __len__(self) -> int:
+        return self._snapshot.passages
+
+
+# =====================================================
+# CONDITION SHARDS
+# =====================================================
+# Replaced (never mutated) under _SHARDS_LOCK so readers need no lock
+_SHARDS: Dict[str, PassageStore] = {}
+_SHARDS_LOCK = threading.Lock()
+_SERVED_SHARDS: Optional[set] = None
+
+
+def configure_shards(served: Optional[Iterable[str]] = None) -> None:
+    """
+    Restrict this worker to a subset of shards (None = all shards).
+
+    Shards outside the set are never loaded, including by the
+    cross-shard fallback.
+    """
+    global _SERVED_SHARDS, _SHARDS
+    with _SHARDS_LOCK:
+        _SERVED_SHARDS = set(served) if served is not None else None
+        _SHARDS = {name: shard for name, shard in _SHARDS.items() if _serves(name)}
+
+
+def _serves(name: str) -> bool:
+    return _SERVED_SHARDS is None or name in _SERVED_SHARDS
+
+
+def available_shards() -> List[str]:
+    """
+    Shards present on disk (or loaded) that this worker serves.
+    """
+    names = set(_SHARDS)
+    if os.path.isdir(RAG_DIR):
+        names.update(
+            d for d in os.listdir(RAG_DIR)
+            if os.path.isdir(os.path.join(RAG_DIR, d))
+        )
+    return sorted(n for n in names if _serves(n))
+
+
+def get_shard(name: str) -> PassageStore:
+    """
+    Return a condition shard, loading it from disk on first use.
+    """
+    global _SHARDS
+    shard = _SHARDS.get(name)
+    if shard is not None:
+        return shard
+
+    with _SHARDS_LOCK:
+        shard = _SHARDS.get(name)
+        if shard is None:
+            shard = PassageStore(os.path.join(RAG_DIR, name))
+            _SHARDS = dict(_SHARDS, **{name: shard})
+    return shard
+
+
+def shard_for(diagnosis: str, text: str = "") -> str:
+    """
+    Shard key for a report: the canonical condition of the problem
+    planner.infer_medical_problem would identify.
+    """
+    problem = infer_medical_problem({
+        "final_diagnosis": diagnosis or "",
+        "clinical_summary": text[:2000],
+    })
+    return canonical_condition(problem)
 
 
 # =====================================================
@@ -42,10 +765,23 @@ def add_to_rag(text: str, diagnosis: str) -> None:
     if not text:
         return
 
-    _KNOWLEDGE_BASE.append({
-        "diagnosis": (diagnosis or "").lower(),
-        "text": text[:3000]   # limit size for safety/performance
-    })
+    get_shard(shard_for(diagnosis, text)).add(text, (diagnosis or "").lower())
+
+
+def add_many_to_rag(reports: Iterable[Tuple[str, str]]) -> None:
+    """
+    Add several (text, diagnosis) reports, one batch per shard.
+    """
+
+    by_shard: Dict[str, List[Tuple[str, str]]] = {}
+    for text, diagnosis in reports:
+        if text:
+            by_shard.setdefault(shard_for(diagnosis, text), []).append(
+                (text, (diagnosis or "").lower())
+            )
+
+    for name, batch in by_shard.items():
+        get_shard(name).add_many(batch)
 
 
 # =====================================================
@@ -53,25 +789,38 @@ def add_to_rag(text: str, diagnosis: str) -> None:
 # =====================================================
 def query_rag(query: str, top_k: int = 3) -> List[str]:
     """
-    Retrieve relevant report snippets based on diagnosis.
+    Retrieve relevant report passages based on diagnosis.
+
+    Only the shard the query routes to (shard_for, the same routing
+    add_to_rag uses) is searched, unless it holds fewer than
+    MIN_SHARD_PASSAGES passages.
 
     Args:
         query (str): Diagnosis / condition to search for
-        top_k (int): Number of similar reports to return
+        top_k (int): Number of passages to return
 
     Returns:
-        List[str]: Relevant report text snippets
+        List[str]: Relevant report passages
     """
 
     if not query:
         return []
 
     query = query.lower()
-    matches = []
+    name = shard_for(query)
+
+    results = []
+    shard_size = 0
+    if _serves(name):
+        shard = get_shard(name)
+        shard_size = len(shard)
+        results = shard.search(query, top_k, match_diagnosis=name == GENERAL_SHARD)
 
-    for item in _KNOWLEDGE_BASE:
-        if query in item["diagnosis"]:
-            matches.append(item["text"])
+    # Cross-shard fallback for small (or unserved) shards
+    if shard_size < MIN_SHARD_PASSAGES and len(results) < top_k:
+        for other in available_shards():
+            if other != name:
+                results.extend(get_shard(other).search(query, top_k))
+        results.sort(key=lambda r: r[0], reverse=True)
 
-    # Return most recent matches
-    return matches[-top_k:]
+    return [text for _, _, text in results[:top_k]]
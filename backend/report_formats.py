@@ -0,0 +1,64 @@
+"""
+report_formats.py
+
+ROLE
+----
+Produce several report formats from ONE report model.
+
+The (patient, summary, plan) -> ReportDocument step runs once; the
+PDF, DOCX and JSON renderers then run concurrently on the shared,
+read-only model.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable
+
+from backend.report_model import ReportDocument, build_report_document, render_json
+from backend.pdf_builder import render_pdf
+from backend.docx_builder import render_docx
+
+RENDERERS: Dict[str, Callable[[ReportDocument, str], str]] = {
+    "pdf": render_pdf,
+    "docx": render_docx,
+    "json": render_json,
+}
+
+
+def build_report_files(
+    patient: dict,
+    summary: dict,
+    plan: dict,
+    formats: Iterable[str] = ("pdf", "docx", "json"),
+    base_name: str = "AI_Treatment_Plan_Report",
+) -> Dict[str, str]:
+    """
+    Render the treatment plan report in several formats.
+
+    Args:
+        patient (dict): {"name","age","gender"}
+        summary (dict): {"chief_complaint","final_diagnosis",...}
+        plan (dict): output from generate_full_care_plan()
+        formats: any of "pdf", "docx", "json"
+        base_name (str): output filename without extension
+
+    Returns:
+        dict: format -> generated filename
+    """
+
+    formats = list(dict.fromkeys(formats))
+    unknown = [f for f in formats if f not in RENDERERS]
+    if unknown:
+        raise ValueError(f"Unsupported report format(s): {', '.join(unknown)}")
+
+    document = build_report_document(patient, summary, plan)
+
+    if len(formats) == 1:
+        fmt = formats[0]
+        return {fmt: RENDERERS[fmt](document, f"{base_name}.{fmt}")}
+
+    with ThreadPoolExecutor(max_workers=len(formats)) as pool:
+        futures = {
+            fmt: pool.submit(RENDERERS[fmt], document, f"{base_name}.{fmt}")
+            for fmt in formats
+        }
+        return {fmt: future.result() for fmt, future in futures.items()}
@@ -0,0 +1,172 @@
+"""
+report_model.py
+
+ROLE
+----
+Format-neutral treatment plan report.
+
+The document is built ONCE from (patient, summary, plan) and then
+handed to lightweight renderers:
+- PDF  : pdf_builder.render_pdf
+- DOCX : docx_builder.render_docx
+- JSON : render_json (below)
+
+All text in the model is plain text; renderers handle escaping and
+layout for their own format.
+"""
+
+import json
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import List, Optional, Tuple, Union
+
+DISCLAIMER = (
+    "This report is generated by an AI-assisted clinical decision support system. "
+    "It is intended for informational and support purposes only. Final diagnosis "
+    "and treatment decisions must be made by a licensed medical professional."
+)
+
+
+# =====================================================
+# DOCUMENT MODEL
+# =====================================================
+@dataclass
+class KeyValues:
+    """Label / value pairs, shown as a table when as_table is set."""
+    rows: List[Tuple[str, str]]
+    as_table: bool = False
+    kind: str = "key_values"
+
+
+@dataclass
+class TextBlock:
+    """A paragraph of plain text."""
+    text: str
+    italic: bool = False
+    kind: str = "text"
+
+
+@dataclass
+class ItemGroup:
+    """A titled list of items (e.g. one treatment plan section)."""
+    title: str
+    items: List[str]
+    kind: str = "item_group"
+
+
+Block = Union[KeyValues, TextBlock, ItemGroup]
+
+
+@dataclass
+class Section:
+    title: str
+    blocks: List[Block] = field(default_factory=list)
+
+
+@dataclass
+class ReportDocument:
+    title: str
+    generated_on: datetime
+    sections: List[Section]
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["generated_on"] = self.generated_on.isoformat(timespec="seconds")
+        return data
+
+
+# =====================================================
+# BUILDER
+# =====================================================
+def _label(key: str) -> str:
+    return key.replace("_", " ").title()
+
+
+def treatment_sections(plan: dict) -> dict:
+    """
+    Treatment plan sections, whether the plan nests them under
+    "treatment_sections" or returns them directly.
+    """
+
+    treatment = plan.get("treatment_plan") or {}
+    return treatment.get("treatment_sections", treatment)
+
+
+def _diagnosis_blocks(plan: dict) -> List[Block]:
+    blocks: List[Block] = [TextBlock(plan.get("identified_problem", "Not mentioned"))]
+    code = plan.get("diagnosis_code")
+    if code:
+        blocks.append(KeyValues([("ICD-10", f"{code['code']} — {code['name']}")]))
+    return blocks
+
+
+def build_report_document(
+    patient: dict,
+    summary: dict,
+    plan: dict,
+    generated_on: Optional[datetime] = None
+) -> ReportDocument:
+    """
+    Build the report model from the pipeline outputs.
+
+    Args:
+        patient (dict): {"name","age","gender"}
+        summary (dict): {"chief_complaint","final_diagnosis",...}
+        plan (dict): output from generate_full_care_plan()
+        generated_on (datetime): timestamp shown on the report
+
+    Returns:
+        ReportDocument: format-neutral report
+    """
+
+    sections = [
+        Section("Patient Details", [
+            KeyValues(
+                [
+                    ("Name", str(patient.get("name", "Not mentioned"))),
+                    ("Age", str(patient.get("age", "Not mentioned"))),
+                    ("Gender", str(patient.get("gender", "Not mentioned"))),
+                ],
+                as_table=True,
+            )
+        ]),
+        Section("Clinical Summary", [
+            TextBlock(summary.get("chief_complaint", "Not mentioned"))
+        ]),
+        Section("Final Diagnostic Impression", _diagnosis_blocks(plan)),
+        Section("Treatment Plan", [
+            ItemGroup(_label(name), list(items))
+            for name, items in treatment_sections(plan).items()
+        ]),
+        Section("Estimated Treatment Cost", [
+            KeyValues([(_label(k), str(v)) for k, v in plan["estimated_cost"].items()])
+        ]),
+        Section("Appointment Recommendation", [
+            KeyValues([(_label(k), str(v)) for k, v in plan["appointment"].items()])
+        ]),
+        Section("Disclaimer", [
+            TextBlock(DISCLAIMER, italic=True)
+        ]),
+    ]
+
+    return ReportDocument(
+        title="AI-Assisted Treatment Plan Report",
+        generated_on=generated_on or datetime.now(),
+        sections=sections,
+    )
+
+
+# =====================================================
+# JSON RENDERER
+# =====================================================
+def render_json(document: ReportDocument, file_name: str) -> str:
+    """
+    Write the report model as JSON.
+
+    Returns:
+        str: generated JSON filename
+    """
+
+    with open(file_name, "w", encoding="utf-8") as f:
+        json.dump(document.to_dict(), f, ensure_ascii=False, indent=2)
+    return file_name
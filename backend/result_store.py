@@ -0,0 +1,309 @@
+"""
+result_store.py
+
+ROLE
+----
+Persistent store of analyzed reports, keyed by PDF content hash.
+
+Each row holds the extraction output, identified problem and care
+plan of one PDF, so reopening a report is a single indexed read
+instead of re-parsing and re-planning.
+
+STORAGE
+-------
+Disabled unless the RESULT_STORE_PATH environment variable is set (or
+configure_result_store() is called), e.g. data/results.db.
+
+SQLite database in WAL mode:
+readers never block the writer, and each thread reads through its own
+connection. Writes are buffered and committed in one transaction per
+batch: by save() once FLUSH_EVERY rows are pending, and by a
+background daemon thread at most FLUSH_INTERVAL_S seconds after the
+last flush, so a quiet process still persists its rows. Rows waiting
+in the buffer are already visible to lookup(); the other reads flush
+first.
+
+Indexes: patient name, diagnosis (both case-insensitive) and
+creation time.
+
+NOTE
+----
+Degraded pipeline runs are not stored, so the next upload of the same
+PDF gets a full analysis. The raw report text is not stored either
+(stored extractions come back with "text" empty). Rows written by an
+older RESULT_VERSION are ignored by lookup(), so a changed extractor
+or planner re-analyzes instead of serving stale plans.
+"""
+
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+DEFAULT_DB_PATH = os.path.join("data", "results.db")
+
+# Bump whenever extraction or planning output changes shape or content
+RESULT_VERSION = 1
+
+FLUSH_EVERY = 20          # rows
+FLUSH_INTERVAL_S = 2.0    # seconds since last flush
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    pdf_sha256   TEXT PRIMARY KEY,
+    version      INTEGER NOT NULL DEFAULT 0,
+    patient_name TEXT,
+    diagnosis    TEXT,
+    problem      TEXT,
+    created_at   REAL NOT NULL,
+    extraction   TEXT NOT NULL,
+    plan         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_patient ON results (patient_name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_results_diagnosis ON results (diagnosis COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_results_created ON results (created_at);
+"""
+
+_COLUMNS = "pdf_sha256, version, patient_name, diagnosis, problem, created_at, extraction, plan"
+
+# Extraction keys never persisted (raw report text is PHI)
+_UNSTORED_KEYS = ("text",)
+
+
+def _row_to_result(row: tuple) -> dict:
+    pdf_sha256, version, patient_name, diagnosis, problem, created_at, extraction, plan = row
+    extraction = json.loads(extraction)
+    extraction["text"] = ""
+    return {
+        "pdf_sha256": pdf_sha256,
+        "version": version,
+        "patient_name": patient_name,
+        "diagnosis": diagnosis,
+        "problem": problem,
+        "created_at": created_at,
+        "extraction": extraction,
+        "plan": json.loads(plan),
+    }
+
+
+# =====================================================
+# STORE
+# =====================================================
+class ResultStore:
+    """
+    Thread-safe SQLite result store with batched writes.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending: Dict[str, tuple] = {}
+        self._last_flush = time.monotonic()
+
+        self._writer = self._connect(check_same_thread=False)
+        self._migrate()
+        self._writer.executescript(_SCHEMA)
+
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._flush_loop, name="result-store-flush", daemon=True
+        )
+        self._flusher.start()
+
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=check_same_thread)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _migrate(self) -> None:
+        """
+        Add the version column to databases created before it existed.
+        """
+        columns = {row[1] for row in self._writer.execute("PRAGMA table_info(results)")}
+        if columns and "version" not in columns:
+            with self._writer:
+                self._writer.execute(
+                    "ALTER TABLE results ADD COLUMN version INTEGER NOT NULL DEFAULT 0"
+                )
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    # ---------------- WRITES ----------------
+    def save(self, pdf_sha256: str, extraction: dict, plan: dict) -> None:
+        """
+        Queue one analyzed report (replaces an earlier row).
+        """
+
+        summary = extraction.get("summary_data", {})
+        stored = {k: v for k, v in extraction.items() if k not in _UNSTORED_KEYS}
+        row = (
+            pdf_sha256,
+            RESULT_VERSION,
+            str(extraction.get("details", {}).get("name", "")),
+            str(summary.get("final_diagnosis", "")),
+            str(plan.get("identified_problem", "")),
+            time.time(),
+            json.dumps(stored, ensure_ascii=False),
+            json.dumps(plan, ensure_ascii=False),
+        )
+
+        with self._lock:
+            self._pending[pdf_sha256] = row
+            if len(self._pending) >= FLUSH_EVERY:
+                try:
+                    self._flush_locked()
+                except sqlite3.Error:
+                    # Rows stay pending; the next flush retries them
+                    logger.exception("result store flush failed")
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_loop(self) -> None:
+        while not self._closed.wait(FLUSH_INTERVAL_S / 2):
+            with self._lock:
+                due = (
+                    self._pending
+                    and time.monotonic() - self._last_flush >= FLUSH_INTERVAL_S
+                )
+                if not due:
+                    continue
+                try:
+                    self._flush_locked()
+                except sqlite3.Error:
+                    # Rows stay pending; the next flush retries them
+                    logger.exception("result store flush failed")
+
+    def close(self) -> None:
+        """
+        Stop the background flusher and write pending rows.
+        """
+        self._closed.set()
+        self.flush()
+
+    def _flush_locked(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+
+        rows = list(self._pending.values())
+        with self._writer:
+            self._writer.executemany(
+                f"INSERT OR REPLACE INTO results ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        self._pending = {}
+
+    # ---------------- READS ----------------
+    def lookup(self, pdf_sha256: str) -> Optional[dict]:
+        """
+        Stored result for a PDF hash, or None (also for rows written
+        by another RESULT_VERSION).
+
+        Returns:
+            dict: {"pdf_sha256","version","patient_name","diagnosis",
+                   "problem","created_at","extraction","plan"}
+        """
+
+        row = self._pending.get(pdf_sha256)
+        if row is None:
+            row = self._reader().execute(
+                f"SELECT {_COLUMNS} FROM results WHERE pdf_sha256 = ? AND version = ?",
+                (pdf_sha256, RESULT_VERSION),
+            ).fetchone()
+        return _row_to_result(row) if row else None
+
+    def _query(self, where: str, args: tuple, limit: int) -> List[dict]:
+        self.flush()
+        rows = self._reader().execute(
+            f"SELECT {_COLUMNS} FROM results {where} ORDER BY created_at DESC LIMIT ?",
+            args + (limit,),
+        ).fetchall()
+        return [_row_to_result(row) for row in rows]
+
+    def find_by_patient(self, name: str, limit: int = 20) -> List[dict]:
+        return self._query("WHERE patient_name = ? COLLATE NOCASE", (name,), limit)
+
+    def find_by_diagnosis(self, diagnosis: str, limit: int = 20) -> List[dict]:
+        return self._query("WHERE diagnosis = ? COLLATE NOCASE", (diagnosis,), limit)
+
+    def recent(self, limit: int = 20, since: Optional[float] = None) -> List[dict]:
+        if since is None:
+            return self._query("", (), limit)
+        return self._query("WHERE created_at >= ?", (since,), limit)
+
+    def iter_results(self, since: Optional[float] = None, chunk: int = 1000) -> Iterator[dict]:
+        """
+        Stream all stored results in creation order, `chunk` rows
+        at a time (used by bulk exports).
+        """
+
+        self.flush()
+        cursor = self._reader().execute(
+            f"SELECT {_COLUMNS} FROM results WHERE created_at >= ? ORDER BY created_at",
+            (since or 0.0,),
+        )
+        while True:
+            rows = cursor.fetchmany(chunk)
+            if not rows:
+                return
+            for row in rows:
+                yield _row_to_result(row)
+
+    def __len__(self) -> int:
+        self.flush()
+        return self._reader().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+_STORE: Optional[ResultStore] = None
+_CONFIGURED = False
+_STORE_LOCK = threading.RLock()
+
+
+def configure_result_store(path: Optional[str]) -> Optional[ResultStore]:
+    """
+    Use the database at `path` (None disables the store).
+    """
+    global _STORE, _CONFIGURED
+    with _STORE_LOCK:
+        if _STORE is not None:
+            _STORE.close()
+        _STORE = ResultStore(path) if path else None
+        _CONFIGURED = True
+        return _STORE
+
+
+def get_result_store() -> Optional[ResultStore]:
+    """
+    Shared store, opened on first use from RESULT_STORE_PATH
+    (None when it is unset or empty).
+    """
+    if not _CONFIGURED:
+        with _STORE_LOCK:
+            if not _CONFIGURED:
+                configure_result_store(os.environ.get("RESULT_STORE_PATH") or None)
+    return _STORE
+
+
+atexit.register(lambda: _STORE.close() if _STORE is not None else None)
@@ -0,0 +1,298 @@
+"""
+timeline.py
+
+ROLE
+----
+Incremental multi-document patient timeline.
+
+A patient's reports arrive over time. Each document is extracted ONCE
+(keyed by PDF content hash) and merged field by field into a single
+view of the patient:
+
+- newest document with a meaningful value wins ("Not mentioned" /
+  "Pending" never overwrite real values)
+- every merged field remembers which document it came from
+- adding or removing a document only re-merges the fields that
+  document touches
+
+Problem and care plan are recomputed only when their inputs change:
+- infer_medical_problem  ← final_diagnosis, clinical_summary
+- generate_full_care_plan ← identified problem, patient details,
+  RAG context for the final diagnosis (and location)
+
+When the new document's own pipeline plan already has the merged
+problem and was made for the timeline's location, that plan is
+reused as-is. Per-upload cost therefore stays
+constant as the record grows.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from backend.planner import generate_full_care_plan, infer_medical_problem
+from backend.rag import query_rag
+
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+DETAIL_FIELDS = ("name", "age", "gender")
+SUMMARY_FIELDS = (
+    "chief_complaint",
+    "final_diagnosis",
+    "ecg_findings",
+    "risk_factors",
+    "clinical_summary",
+)
+
+# Fields infer_medical_problem reads
+PROBLEM_INPUTS = {"final_diagnosis", "clinical_summary"}
+
+# Fields generate_full_care_plan reads besides the problem: the patient
+# details and the diagnosis its RAG context is retrieved for
+PLAN_INPUTS = PROBLEM_INPUTS | set(DETAIL_FIELDS)
+
+_NOT_MEANINGFUL = {"", "not mentioned", "pending"}
+
+
+def is_meaningful(value) -> bool:
+    return str(value or "").strip().lower() not in _NOT_MEANINGFUL
+
+
+# =====================================================
+# TIMELINE MODEL
+# =====================================================
+@dataclass
+class FieldValue:
+    value: str
+    source: Optional[str]   # pdf_sha256 of the contributing document
+
+
+@dataclass
+class TimelineDocument:
+    pdf_sha256: str
+    file_name: str
+    added_at: float
+    details: dict
+    summary: dict
+    degraded: List[str] = field(default_factory=list)
+
+    def value(self, name: str):
+        if name in DETAIL_FIELDS:
+            return self.details.get(name)
+        return self.summary.get(name)
+
+
+class PatientTimeline:
+    """
+    Documents of one patient merged into a single patient / summary
+    view, with an incrementally maintained problem and care plan.
+    """
+
+    def __init__(self, location=None):
+        self.location = location
+        self.documents: "OrderedDict[str, TimelineDocument]" = OrderedDict()
+        self.fields: Dict[str, FieldValue] = {
+            name: FieldValue("Not mentioned", None)
+            for name in DETAIL_FIELDS + SUMMARY_FIELDS
+        }
+        self.problem: Optional[str] = None
+        self.plan: Optional[dict] = None
+        self.recomputed = {"problem": 0, "care_plan": 0}
+
+    def __contains__(self, pdf_sha256: str) -> bool:
+        return pdf_sha256 in self.documents
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def needs_analysis(self, pdf_sha256: str) -> bool:
+        """
+        True for documents not yet merged, or merged from a degraded
+        pipeline run (they are analyzed again on the next rerun).
+        """
+        doc = self.documents.get(pdf_sha256)
+        return doc is None or bool(doc.degraded)
+
+    # ---------------- MERGED VIEW ----------------
+    @property
+    def patient(self) -> dict:
+        return {name: self.fields[name].value for name in DETAIL_FIELDS}
+
+    @property
+    def summary(self) -> dict:
+        return {name: self.fields[name].value for name in SUMMARY_FIELDS}
+
+    def provenance(self) -> Dict[str, str]:
+        """
+        Field → file name of the document it was taken from.
+        """
+        return {
+            name: self.documents[fv.source].file_name
+            for name, fv in self.fields.items()
+            if fv.source in self.documents
+        }
+
+    def distinct_values(self, name: str) -> List[str]:
+        """
+        Meaningful values of one field across documents (e.g. to warn
+        when reports of different patients were mixed).
+        """
+        seen = OrderedDict()
+        for doc in self.documents.values():
+            value = doc.value(name)
+            if is_meaningful(value):
+                seen.setdefault(str(value).strip().lower(), str(value).strip())
+        return list(seen.values())
+
+    # ---------------- UPDATES ----------------
+    def add_document(
+        self,
+        pdf_sha256: str,
+        extraction: dict,
+        plan: Optional[dict] = None,
+        file_name: str = "",
+        degraded: Optional[List[str]] = None,
+        plan_location=None
+    ) -> Set[str]:
+        """
+        Merge one extracted document (no-op if already present,
+        unless the present copy came from a degraded run: it is then
+        replaced, with a single refresh).
+
+        Args:
+            pdf_sha256 (str): content hash of the PDF
+            extraction (dict): process_pdf() / run_pipeline() extraction
+            plan (dict): that document's own care plan, reused when the
+                merged problem matches it
+            file_name (str): shown in provenance
+            degraded (list): degraded pipeline stages, for display
+            plan_location (tuple): location `plan` was generated for;
+                the plan is only reused when it equals self.location
+
+        Returns:
+            set: merged fields whose value changed
+        """
+
+        if not self.needs_analysis(pdf_sha256):
+            return set()
+        self.documents.pop(pdf_sha256, None)
+
+        doc = TimelineDocument(
+            pdf_sha256=pdf_sha256,
+            file_name=file_name or pdf_sha256[:12],
+            added_at=time.time(),
+            details=dict(extraction.get("details", {})),
+            summary={
+                k: v for k, v in extraction.get("summary_data", {}).items()
+                if k in SUMMARY_FIELDS
+            },
+            degraded=list(degraded or []),
+        )
+        self.documents[pdf_sha256] = doc
+
+        # Newest document: it wins wherever it has a meaningful value
+        changed = set()
+        for name, current in self.fields.items():
+            value = doc.value(name)
+            if is_meaningful(value) and value != current.value:
+                self.fields[name] = FieldValue(value, pdf_sha256)
+                changed.add(name)
+            elif is_meaningful(value):
+                current.source = pdf_sha256
+            elif current.source == pdf_sha256:
+                # Replaced degraded copy contributed a value this one lacks
+                merged = self._merge_field(name)
+                if merged.value != current.value:
+                    changed.add(name)
+                self.fields[name] = merged
+
+        self._refresh(changed, plan if plan_location == self.location else None)
+        return changed
+
+    def remove_document(self, pdf_sha256: str) -> Set[str]:
+        """
+        Drop a document, re-merging only the fields it contributed.
+
+        Returns:
+            set: merged fields whose value changed
+        """
+
+        if self.documents.pop(pdf_sha256, None) is None:
+            return set()
+
+        changed = set()
+        for name, current in self.fields.items():
+            if current.source != pdf_sha256:
+                continue
+            merged = self._merge_field(name)
+            if merged.value != current.value:
+                changed.add(name)
+            self.fields[name] = merged
+
+        self._refresh(changed, None)
+        return changed
+
+    def _merge_field(self, name: str) -> FieldValue:
+        for doc in reversed(self.documents.values()):
+            value = doc.value(name)
+            if is_meaningful(value):
+                return FieldValue(value, doc.pdf_sha256)
+        return FieldValue("Not mentioned", None)
+
+    def _refresh(self, changed: Set[str], candidate_plan: Optional[dict]) -> None:
+        """
+        Recompute problem / plan only when their inputs changed.
+        """
+
+        if not self.documents:
+            self.problem, self.plan = None, None
+            return
+
+        problem = self.problem
+        if problem is None or changed & PROBLEM_INPUTS:
+            problem = infer_medical_problem(self.summary)
+            self.recomputed["problem"] += 1
+
+        if problem == self.problem and self.plan is not None and not changed & PLAN_INPUTS:
+            return
+
+        self.problem = problem
+        if candidate_plan is not None and candidate_plan.get("identified_problem") == problem:
+            self.plan = candidate_plan
+        else:
+            self.plan = generate_full_care_plan(
+                patient=self.patient,
+                summary=self.summary,
+                context_docs=self._context_docs(),
+                location=self.location,
+            )
+            self.recomputed["care_plan"] += 1
+
+    def _context_docs(self) -> List[str]:
+        """
+        RAG passages for the merged diagnosis (the query run_pipeline
+        makes); retrieval is optional, so failures give no context.
+        """
+        diagnosis = self.fields["final_diagnosis"].value
+        if not is_meaningful(diagnosis):
+            return []
+        try:
+            return query_rag(diagnosis)
+        except Exception:
+            logger.exception("RAG query failed; planning without context")
+            return []
+
+    def set_location(self, location) -> None:
+        """
+        Change the patient location; the plan is rebuilt once.
+        """
+        if location != self.location:
+            self.location = location
+            if self.documents:
+                self.plan = None
+                self._refresh(set(), None)
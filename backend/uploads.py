@@ -0,0 +1,80 @@
+"""
+uploads.py
+
+ROLE
+----
+Bounded-memory handling of uploaded PDFs.
+
+- Uploads above MAX_UPLOAD_BYTES are rejected
+- Small uploads are read straight from the upload object (no copy)
+- Large uploads are spooled to a temporary file in fixed-size
+  chunks and memory-mapped, so the PDF readers page the document in
+  from disk instead of holding extra copies per session
+"""
+
+import mmap
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024       # keep in sync with .streamlit/config.toml
+SPILL_THRESHOLD_BYTES = 5 * 1024 * 1024
+COPY_CHUNK_BYTES = 1024 * 1024
+
+
+def upload_size(upload: BinaryIO) -> int:
+    """
+    Size of an uploaded file, without reading it.
+    """
+
+    size = getattr(upload, "size", None)
+    if size is not None:
+        return size
+
+    position = upload.tell()
+    upload.seek(0, os.SEEK_END)
+    size = upload.tell()
+    upload.seek(position)
+    return size
+
+
+@contextmanager
+def spooled_upload(
+    upload: BinaryIO,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    spill_threshold: int = SPILL_THRESHOLD_BYTES
+) -> Iterator[BinaryIO]:
+    """
+    Yield a seekable stream for an uploaded PDF.
+
+    Raises:
+        ValueError if the upload exceeds max_bytes.
+    """
+
+    size = upload_size(upload)
+    if size > max_bytes:
+        raise ValueError(
+            f"⚠️ This file is {size / (1024 * 1024):.1f} MB. "
+            f"The maximum upload size is {max_bytes // (1024 * 1024)} MB."
+        )
+
+    upload.seek(0)
+
+    if size <= spill_threshold or size == 0:
+        yield upload
+        return
+
+    with tempfile.TemporaryFile(prefix="upload_", suffix=".pdf") as spool:
+        shutil.copyfileobj(upload, spool, COPY_CHUNK_BYTES)
+        spool.flush()
+
+        mapped = mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped
+        finally:
+            mapped.close()
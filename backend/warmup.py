@@ -0,0 +1,263 @@
+"""
+warmup.py
+
+ROLE
+----
+Start-up warm-up and readiness reporting.
+
+warm_up() pays first-request costs ahead of traffic and checks the
+deployment:
+- byte-compilation of the backend package (compileall)
+- required packages importable (REQUIRED_PACKAGES, plus groq when
+  the LLM is required)
+- imports of the pipeline, report renderers and LLM modules
+- regex compilation (extraction, section detection, lab values)
+- ReportLab style setup and font loading
+- GROQ_API_KEY secret and Groq client creation (cached by llm_client)
+- RAG shard indexes, the hospital KD-tree and the ICD-10 index
+- dry run of process_pdf and build_treatment_plan_pdf on a tiny
+  embedded sample report (nothing is added to the RAG store)
+
+Readiness:
+- is_ready() / readiness() for in-process checks
+- optional HTTP probe (GET /ready → 200 or 503, GET /live → 200,
+  GET /metrics → LLM usage and stage pool saturation) started when
+  READINESS_PORT is set
+- `python -m backend.warmup` runs the warm-up in a pre-start step
+  and exits non-zero when a required step fails
+
+REQUIRED STEPS
+--------------
+The LLM client is optional by default (the app falls back to
+rule-based extraction). Set REQUIRE_LLM=1 when the deployment relies
+on the LLM path: a missing GROQ_API_KEY or groq package then fails
+readiness. A failed byte-compilation (e.g. read-only install) is
+reported but never blocks readiness.
+"""
+
+import compileall
+import importlib.util
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+SAMPLE_REPORT = [
+    "Patient Name: Warmup Sample",
+    "Age: 50",
+    "Gender: Female",
+    "",
+    "Chief Complaint: Routine evaluation of raised blood sugar",
+    "",
+    "Fasting glucose: 182 mg/dL   HbA1c: 7.4 %   BP: 132/84 mmHg",
+    "",
+    "FINAL DIAGNOSIS: Type 2 Diabetes Mellitus",
+]
+
+REQUIRED_PACKAGES = ("streamlit", "pypdf", "reportlab", "numpy")
+
+LLM_REQUIRED = os.environ.get("REQUIRE_LLM", "").lower() in ("1", "true", "yes")
+
+_READY = threading.Event()
+_STATE: Dict[str, object] = {"steps": {}, "errors": {}, "finished_at": None}
+_LOCK = threading.Lock()
+_SERVER: Optional[ThreadingHTTPServer] = None
+
+
+# =====================================================
+# WARM-UP STEPS
+# =====================================================
+def sample_pdf() -> bytes:
+    """
+    Tiny text PDF generated in memory from SAMPLE_REPORT.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    buf = io.BytesIO()
+    pdf = canvas.Canvas(buf, pagesize=A4)
+    y = 800
+    for line in SAMPLE_REPORT:
+        pdf.drawString(50, y, line)
+        y -= 16
+    pdf.save()
+    return buf.getvalue()
+
+
+def _byte_compile() -> None:
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    if not compileall.compile_dir(backend_dir, quiet=1):
+        raise RuntimeError(f"byte-compilation failed under {backend_dir}")
+
+
+def _dependencies() -> None:
+    packages = REQUIRED_PACKAGES + (("groq",) if LLM_REQUIRED else ())
+    missing = [p for p in packages if importlib.util.find_spec(p) is None]
+    if missing:
+        raise ImportError(f"missing packages: {', '.join(missing)}")
+
+
+def _imports() -> None:
+    import backend.pipeline  # noqa: F401
+    import backend.report_formats  # noqa: F401
+    import backend.llm_extractor  # noqa: F401
+
+
+def _llm_client() -> None:
+    # Raises when the GROQ_API_KEY secret is missing
+    from backend.llm_client import get_groq_client
+    get_groq_client()
+
+
+def _rag_index() -> None:
+    from backend.rag import available_shards, get_shard
+    for name in available_shards():
+        get_shard(name)
+
+
+def _hospital_index() -> None:
+    from backend.hospital_registry import get_hospital_index
+    get_hospital_index()
+
+
+def _icd10_index() -> None:
+    from backend.icd10 import get_icd10_index
+    get_icd10_index()
+
+
+def _dry_run() -> None:
+    from backend.extractor import process_pdf
+    from backend.llm_extractor import extract_clinical_info_regex
+    from backend.pdf_builder import build_treatment_plan_pdf
+    from backend.planner import generate_full_care_plan
+    from backend.prompts import select_report_text
+
+    extraction = process_pdf(sample_pdf())
+    extract_clinical_info_regex(extraction["text"])
+    select_report_text(extraction["text"])
+
+    plan = generate_full_care_plan(
+        patient=extraction["details"],
+        summary=extraction["summary_data"],
+        context_docs=[],
+    )
+
+    with tempfile.TemporaryDirectory(prefix="warmup_") as workdir:
+        build_treatment_plan_pdf(
+            extraction["details"],
+            extraction["summary_data"],
+            plan,
+            file_name=os.path.join(workdir, "warmup.pdf"),
+        )
+
+
+# (name, step, required for readiness)
+STEPS: List[Tuple[str, Callable[[], None], bool]] = [
+    ("byte_compile", _byte_compile, False),
+    ("dependencies", _dependencies, True),
+    ("imports", _imports, True),
+    ("llm_client", _llm_client, LLM_REQUIRED),   # else the app works rule-based
+    ("rag_index", _rag_index, True),
+    ("hospital_index", _hospital_index, True),
+    ("icd10_index", _icd10_index, False),  # plans omit the code without it
+    ("dry_run", _dry_run, True),
+]
+
+
+def warm_up() -> dict:
+    """
+    Run all warm-up steps once; later calls return the cached state.
+
+    Returns:
+        dict: readiness() after warm-up
+    """
+
+    with _LOCK:
+        if _STATE["finished_at"] is not None:
+            return readiness()
+
+        ok = True
+        for name, step, required in STEPS:
+            started = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                _STATE["errors"][name] = f"{type(e).__name__}: {e}"
+                ok = ok and not required
+            _STATE["steps"][name] = round(time.perf_counter() - started, 4)
+
+        _STATE["finished_at"] = time.time()
+        if ok:
+            _READY.set()
+
+    port = os.environ.get("READINESS_PORT")
+    if port:
+        start_readiness_server(int(port))
+
+    return readiness()
+
+
+# =====================================================
+# READINESS
+# =====================================================
+def is_ready() -> bool:
+    return _READY.is_set()
+
+
+def readiness() -> dict:
+    return {
+        "ready": is_ready(),
+        "steps_s": dict(_STATE["steps"]),
+        "errors": dict(_STATE["errors"]),
+        "finished_at": _STATE["finished_at"],
+    }
+
+
+class _ProbeHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") == "/live":
+            status, body = 200, {"live": True}
+        elif self.path.rstrip("/") == "/ready":
+            body = readiness()
+            status = 200 if body["ready"] else 503
+        elif self.path.rstrip("/") == "/metrics":
+            from backend.deadline import saturation
+            from backend.llm_metrics import get_llm_metrics
+            status, body = 200, {
+                "llm": get_llm_metrics().snapshot(),
+                "stage_pool": saturation(),
+            }
+        else:
+            status, body = 404, {"error": "not found"}
+
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass   # keep probe traffic out of the app logs
+
+
+def start_readiness_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """
+    Serve /ready and /live on a side port (idempotent).
+    """
+    global _SERVER
+    if _SERVER is None:
+        _SERVER = ThreadingHTTPServer((host, port), _ProbeHandler)
+        threading.Thread(target=_SERVER.serve_forever, name="readiness", daemon=True).start()
+    return _SERVER
+
+
+if __name__ == "__main__":
+    state = warm_up()
+    print(json.dumps(state, indent=2))
+    sys.exit(0 if state["ready"] else 1)
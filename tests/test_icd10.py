@@ -0,0 +1,43 @@
+"""
+Regression: negated diagnoses must not be coded
+("No evidence of myocardial infarction" is not I21).
+"""
+
+from backend.icd10 import normalize_diagnosis
+
+
+def _code(text):
+    match = normalize_diagnosis(text)
+    return match.code if match else None
+
+
+def test_negated_spans_are_not_coded():
+    assert _code("No evidence of myocardial infarction") is None
+    assert _code("Myocardial infarction ruled out") is None
+    assert _code("Negative for pneumonia") is None
+
+
+def test_negation_scope_ends_at_clause():
+    assert _code("Denies chest pain. Hypertension") == "I10"
+    assert _code("No acute MI but unstable angina") == "I20.0"
+    assert _code("T2DM, no retinopathy") == "E11.9"
+
+
+def test_code_names_containing_triggers_still_match():
+    assert _code("Type 2 diabetes mellitus without complications") == "E11.9"
+    assert _code("Myocardial infarction not ruled out") == "I21"
+
+
+def test_report_words_are_not_fuzzy_corrected_into_diseases():
+    assert _code("Impression: see notes") is None
+    assert _code("Clinical impression pending review") is None
+    assert _code("Regression") is None
+    assert _code("progression of disease") is None
+    assert _code("Hypertensive") is None
+    assert _code("Hyperglycemia") is None
+
+
+def test_single_edit_typos_still_match():
+    assert _code("Myocardial infraction") == "I21"
+    assert _code("hypertention") == "I10"
+    assert _code("Type 2 diabetis") == "E11.9"
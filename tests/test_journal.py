@@ -0,0 +1,54 @@
+"""
+Regression: journal text must be scrubbed even when the extractor did
+not find a patient name.
+"""
+
+from backend.journal import age_band, redact
+
+REPORT = """Patient Name: Mr. Ramesh Kumar   Age: 54 Years   Sex: Male
+UHID: HSP-2026-00123   Date: 12/01/2026
+Address: 14 MG Road, Bengaluru 560001
+Phone: +91 98450 12345
+Chief Complaint: 54-year-old male with chest pain. Admitted on 12 Jan 2026.
+BP 140/90 mmHg, Troponin I 2.5 ng/mL, Platelets 150000
+Final Diagnosis: Acute anterior wall STEMI
+"""
+
+
+def test_phi_scrubbed_without_extracted_name():
+    text = redact(REPORT, "Not mentioned")
+
+    for phi in ("Ramesh", "Kumar", "54", "00123", "12/01/2026", "MG Road", "98450", "12 Jan 2026"):
+        assert phi not in text
+
+    # Clinical content survives
+    assert "140/90 mmHg" in text
+    assert "Troponin I 2.5 ng/mL" in text
+    assert "Platelets 150000" in text
+    assert "Final Diagnosis: Acute anterior wall STEMI" in text
+
+
+def test_age_band():
+    assert age_band("54") == "50-59"
+    assert age_band(93) == "90+"
+    assert age_band("Not mentioned") is None
+
+
+def test_grouped_digit_ids():
+    assert redact("Aadhaar: 1234 5678 9012 verified") == "Aadhaar: [ID] verified"
+    assert redact("Aadhaar No: 1234-5678-9012") == "Aadhaar No: [ID]"
+
+
+def test_names_without_colon():
+    text = redact("Patient Mrs Lakshmi Iyer presented. Seen by Dr Arvind Kumar.\nConsultant: Meena Rao")
+
+    for phi in ("Lakshmi", "Iyer", "Arvind", "Kumar", "Meena", "Rao"):
+        assert phi not in text
+    assert redact("the patient was stable") == "the patient was stable"
+
+
+def test_age_sex_shorthand():
+    assert redact("62F with chest pain") == "[AGE] with chest pain"
+    assert redact("62 M, known diabetic") == "[AGE], known diabetic"
+    # Fahrenheit temperatures are not ages
+    assert redact("fever 101 F for 3 days") == "fever 101 F for 3 days"
@@ -0,0 +1,22 @@
+"""
+Regression: ambiguous lab text must not produce rule-triggering values.
+"""
+
+from backend.lab_values import evaluate_rules, extract_lab_batch, extract_lab_values
+
+
+def test_unitless_troponin_is_not_rescaled_or_ruled_in():
+    values = extract_lab_values("Troponin I: 0.5")
+    assert values == {"troponin_unit_unknown": 0.5}
+    assert evaluate_rules(extract_lab_batch(["Troponin I: 0.5"]))[0] == ""
+
+
+def test_troponin_with_unit_is_normalized():
+    assert extract_lab_values("Troponin I 2.5 ng/mL")["troponin_ng_l"] == 2500.0
+    assert extract_lab_values("hs-cTnT 60 ng/L")["troponin_ng_l"] == 60.0
+
+
+def test_glucose_needs_label_separator_or_unit():
+    assert extract_lab_values("Glucose tolerance test at 2 hours: 140") == {}
+    assert extract_lab_values("Fasting glucose: 182 mg/dL")["glucose_mg_dl"] == 182.0
+    assert extract_lab_values("RBS (mg/dL) - 250")["glucose_mg_dl"] == 250.0
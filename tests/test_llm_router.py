@@ -0,0 +1,29 @@
+"""
+route(): task profiles and easy / hard model ordering.
+"""
+
+from backend.llm_router import TASK_PROFILES, route
+
+CHEAP, CAPABLE = "llama-3.1-8b-instant", "llama-3.3-70b-versatile"
+
+
+def test_only_used_task_profiles():
+    assert set(TASK_PROFILES) == {"extraction", "default"}
+
+
+def test_structured_extraction_goes_to_cheap_model():
+    r = route("Chief Complaint: chest pain\nFINAL DIAGNOSIS: STEMI", "extraction")
+    assert r.models == [CHEAP, CAPABLE]
+    assert r.max_tokens == TASK_PROFILES["extraction"].max_tokens
+    assert not r.hard
+
+
+def test_unstructured_extraction_goes_to_capable_model():
+    r = route("patient felt unwell", "extraction")
+    assert r.hard and r.models[0] == CAPABLE
+
+
+def test_long_prompt_is_hard_and_unknown_task_uses_default():
+    r = route("word " * 20000, "summary")
+    assert r.hard and r.models[0] == CAPABLE
+    assert r.max_tokens == TASK_PROFILES["default"].max_tokens
@@ -0,0 +1,56 @@
+"""
+Regression: a stream that breaks mid-response must raise, not yield
+error text that callers would append to partial output.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import backend.llm_client as llm_client
+from backend.llm_client import LlmStreamError, stream_llm
+from backend.llm_extractor import FIELDS, NOT_MENTIONED, extract_clinical_info_streaming
+
+
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class _BrokenStream:
+    def __init__(self, deltas):
+        self.deltas = deltas
+
+    def __iter__(self):
+        for delta in self.deltas:
+            yield _chunk(delta)
+        raise ConnectionError("connection reset")
+
+    def close(self):
+        pass
+
+
+def _client(deltas):
+    create = lambda **kwargs: _BrokenStream(deltas)
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def test_mid_stream_error_raises_with_partial_text(monkeypatch):
+    monkeypatch.setattr(llm_client, "get_groq_client", lambda: _client(['{"chief_', 'complaint"']))
+
+    received = []
+    with pytest.raises(LlmStreamError) as info:
+        for delta in stream_llm("prompt", json_mode=True, task="extraction"):
+            received.append(delta)
+
+    assert "".join(received) == '{"chief_complaint"'
+    assert info.value.partial == '{"chief_complaint"'
+    assert not any("LLM_ERROR" in d for d in received)
+
+
+def test_streaming_extraction_falls_back_on_stream_error():
+    def stream(prompt):
+        yield '{"chief_complaint": "chest p'
+        raise LlmStreamError("LLM_ERROR: broken", partial='{"chief_complaint": "chest p')
+
+    result = extract_clinical_info_streaming("Chief Complaint: chest pain", stream=stream)
+    assert result == {field: NOT_MENTIONED for field in FIELDS}
@@ -0,0 +1,50 @@
+"""
+Regression: text drawn through Form XObjects must change the page hash,
+otherwise one patient's cached page text is served for another's PDF.
+"""
+
+import io
+
+from pypdf import PdfReader
+from reportlab.pdfgen import canvas
+
+from backend.page_cache import page_hash
+
+
+def _form_xobject_pdf(text: str) -> bytes:
+    buf = io.BytesIO()
+    pdf = canvas.Canvas(buf)
+    pdf.beginForm("F1")
+    pdf.drawString(50, 700, text)
+    pdf.endForm()
+    pdf.doForm("F1")
+    pdf.save()
+    return buf.getvalue()
+
+
+def _first_page(data: bytes):
+    return PdfReader(io.BytesIO(data)).pages[0]
+
+
+def test_form_xobject_text_changes_hash():
+    alice = _first_page(_form_xobject_pdf("Patient Name: Alice Example"))
+    bob = _first_page(_form_xobject_pdf("Patient Name: Bob Example"))
+
+    assert page_hash(alice) != page_hash(bob)
+
+
+def test_identical_form_xobject_pages_share_hash():
+    first = _first_page(_form_xobject_pdf("Patient Name: Alice Example"))
+    second = _first_page(_form_xobject_pdf("Patient Name: Alice Example"))
+
+    assert page_hash(first) == page_hash(second)
+
+
+def test_shared_memo_matches_fresh_hash_without_decoding():
+    reader = PdfReader(io.BytesIO(_form_xobject_pdf("Patient Name: Alice Example")))
+    memo = {}
+    shared = [page_hash(page, memo) for page in reader.pages]
+
+    assert memo
+    assert shared == [page_hash(page) for page in reader.pages]
+    assert reader.pages[0]["/Contents"].get_object().decoded_self is None
@@ -0,0 +1,37 @@
+"""
+Regression: stored results must not keep the raw report text, and rows
+from another RESULT_VERSION must not be served.
+"""
+
+import sqlite3
+
+from backend import result_store
+from backend.result_store import ResultStore
+
+
+def test_text_not_stored(tmp_path):
+    path = str(tmp_path / "results.db")
+    store = ResultStore(path)
+    store.save("abc", {"text": "Patient Name: Ramesh Kumar", "details": {}}, {})
+    store.close()
+
+    (extraction,) = sqlite3.connect(path).execute("SELECT extraction FROM results").fetchone()
+    assert "Ramesh" not in extraction
+    assert ResultStore(path).lookup("abc")["extraction"]["text"] == ""
+
+
+def test_other_version_ignored(tmp_path, monkeypatch):
+    path = str(tmp_path / "results.db")
+    store = ResultStore(path)
+    store.save("abc", {"details": {}}, {})
+    store.close()
+
+    monkeypatch.setattr(result_store, "RESULT_VERSION", result_store.RESULT_VERSION + 1)
+    assert ResultStore(path).lookup("abc") is None
+
+
+def test_disabled_without_path(monkeypatch):
+    monkeypatch.delenv("RESULT_STORE_PATH", raising=False)
+    monkeypatch.setattr(result_store, "_CONFIGURED", False)
+    monkeypatch.setattr(result_store, "_STORE", None)
+    assert result_store.get_result_store() is None
@@ -0,0 +1,53 @@
+"""
+Regression: a document merged from a degraded pipeline run must be
+analyzed again and replaced, not kept as "Pending" forever.
+"""
+
+import backend.timeline as timeline_module
+from backend.timeline import PatientTimeline
+
+PENDING = {"details": {"name": "Pending"}, "summary_data": {"final_diagnosis": "Pending"}}
+FULL = {"details": {"name": "Lakshmi Iyer"}, "summary_data": {"final_diagnosis": "Hypertension"}}
+
+
+def test_degraded_document_is_replaced(monkeypatch):
+    monkeypatch.setattr(timeline_module, "query_rag", lambda query: [])
+    monkeypatch.setattr(
+        timeline_module, "generate_full_care_plan", lambda **kwargs: {"identified_problem": "stub"}
+    )
+    timeline = PatientTimeline()
+
+    timeline.add_document("abc", PENDING, degraded=["extraction"])
+    assert timeline.needs_analysis("abc")
+
+    changed = timeline.add_document("abc", FULL)
+    assert {"name", "final_diagnosis"} <= changed
+    assert not timeline.needs_analysis("abc")
+    assert timeline.patient["name"] == "Lakshmi Iyer"
+    assert len(timeline) == 1
+
+    # Fully analyzed documents are not replaced
+    assert timeline.add_document("abc", PENDING) == set()
+
+
+def test_plan_rebuilt_with_rag_context_on_patient_change(monkeypatch):
+    calls = []
+    monkeypatch.setattr(timeline_module, "query_rag", lambda query: [f"passage for {query}"])
+    monkeypatch.setattr(
+        timeline_module,
+        "generate_full_care_plan",
+        lambda **kwargs: calls.append(kwargs) or {"identified_problem": "stub"},
+    )
+    timeline = PatientTimeline()
+
+    timeline.add_document("abc", FULL)
+    assert calls[-1]["context_docs"] == ["passage for Hypertension"]
+
+    # Same problem, new patient details: the plan is rebuilt
+    timeline.add_document("def", {"details": {"age": "61"}, "summary_data": {}})
+    assert len(calls) == 2
+    assert calls[-1]["patient"]["age"] == "61"
+
+    # Fields the planner does not read leave the plan alone
+    timeline.add_document("ghi", {"details": {}, "summary_data": {"ecg_findings": "Normal sinus rhythm"}})
+    assert len(calls) == 2
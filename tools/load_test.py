@@ -0,0 +1,245 @@
+"""
+load_test.py
+
+ROLE
+----
+Concurrent-session load generator for the app.py flow.
+
+Each simulated session does what one Streamlit session does
+(app.analyze_upload without the result store):
+
+    upload (spooled_upload) → run_pipeline → PatientTimeline
+    → build_treatment_plan_pdf
+
+using synthetic PDFs. call_llm is replaced by a local fake with
+configurable latency and error rate, so no API key or network is
+needed; the pipeline is rule-based today, so the fake only sees
+calls if an LLM stage is added to run_pipeline. For every concurrency level it reports throughput, latency
+percentiles, errors, degraded requests and memory growth.
+
+USAGE
+-----
+    python -m tools.load_test --concurrency 1 4 16 --requests 20 \\
+        --llm-latency 0.4 --llm-error-rate 0.05
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+import backend.llm_client as llm_client
+import backend.llm_extractor as llm_extractor
+import backend.rag as rag
+from backend.pdf_builder import build_treatment_plan_pdf
+from backend.pipeline import run_pipeline
+from backend.timeline import PatientTimeline
+from backend.uploads import spooled_upload
+
+CASES = [
+    ("Type 2 Diabetes Mellitus", "Increased thirst and frequent urination",
+     ["Fasting glucose: 212 mg/dL", "HbA1c: 8.4 %"]),
+    ("Hypertension", "Recurrent headaches",
+     ["BP: 164/102 mmHg", "Heart rate 88 bpm"]),
+    ("Acute Inferior Wall STEMI", "Severe chest pain for 2 hours",
+     ["ECG: ST elevation in II, III, aVF", "Troponin I: 2.1 ng/mL"]),
+    (None, "Fever with chills for 3 days",
+     ["Temperature 101 F", "Total leukocyte count raised"]),
+]
+
+
+# =====================================================
+# SYNTHETIC INPUTS
+# =====================================================
+def synthetic_pdf(rng: random.Random, pages: int) -> bytes:
+    diagnosis, complaint, findings = rng.choice(CASES)
+
+    lines = [
+        f"Patient Name: Test Patient {rng.randint(1, 9999)}",
+        f"Age: {rng.randint(18, 90)}",
+        f"Gender: {rng.choice(['Male', 'Female'])}",
+        "",
+        f"Chief Complaint: {complaint}",
+        "",
+        *findings,
+        "",
+    ]
+    if diagnosis:
+        lines += [f"FINAL DIAGNOSIS: {diagnosis}", ""]
+
+    buf = io.BytesIO()
+    pdf = canvas.Canvas(buf, pagesize=A4)
+    for page in range(pages):
+        y = 800
+        for line in lines if page == 0 else [f"Progress note day {page}: stable."] * 40:
+            pdf.drawString(50, y, line)
+            y -= 16
+        pdf.showPage()
+    pdf.save()
+    return buf.getvalue()
+
+
+class FakeLLM:
+    """
+    Stand-in for call_llm with configurable latency and error rate.
+    """
+
+    def __init__(self, latency_s: float, error_rate: float, seed: int = 7):
+        self.latency_s = latency_s
+        self.error_rate = error_rate
+        self.calls = 0
+        self.failures = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt: str, json_mode: bool = False, task: str = "default") -> str:
+        with self._lock:
+            self.calls += 1
+            fail = self._rng.random() < self.error_rate
+            self.failures += fail
+            delay = self._rng.uniform(0.5, 1.5) * self.latency_s
+
+        time.sleep(delay)
+        if fail:
+            return "LLM_ERROR: AI service temporarily unavailable. Details: fake error"
+
+        fields = [f for f in llm_extractor.FIELDS if f'"{f}"' in prompt]
+        return json.dumps({f: "Not mentioned" for f in fields})
+
+
+# =====================================================
+# MEASUREMENT
+# =====================================================
+def rss_mb() -> float:
+    """
+    Current resident set size (Linux), else peak RSS.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def session(pdf_bytes: bytes, workdir: str, n: int, budget_s: float) -> bool:
+    """
+    One simulated upload. Returns True when any stage degraded.
+    """
+    with spooled_upload(io.BytesIO(pdf_bytes)) as source:
+        result = run_pipeline(source, budget_s=budget_s)
+
+    timeline = PatientTimeline()
+    timeline.add_document(
+        f"load-test-{n}",
+        result["extraction"],
+        plan=result["plan"],
+        degraded=result["degraded"],
+    )
+
+    build_treatment_plan_pdf(
+        timeline.patient,
+        timeline.summary,
+        timeline.plan,
+        file_name=os.path.join(workdir, f"report_{threading.get_ident()}_{n}.pdf"),
+    )
+    return bool(result["degraded"])
+
+
+def run_level(concurrency: int, requests: int, corpus, workdir: str, budget_s: float) -> dict:
+    latencies = []
+    errors = [0]
+    degraded = [0]
+    lock = threading.Lock()
+
+    def worker(worker_id):
+        rng = random.Random(worker_id)
+        for n in range(requests):
+            started = time.perf_counter()
+            try:
+                was_degraded = session(rng.choice(corpus), workdir, n, budget_s)
+            except Exception:
+                with lock:
+                    errors[0] += 1
+                continue
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                degraded[0] += was_degraded
+
+    rss_before = rss_mb()
+    started = time.perf_counter()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    wall = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": concurrency * requests,
+        "throughput": len(latencies) / wall if wall else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "errors": errors[0],
+        "degraded": degraded[0],
+        "rss_growth_mb": rss_mb() - rss_before,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent-session load test")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=10, help="requests per session")
+    parser.add_argument("--pages", type=int, default=3, help="pages per synthetic PDF")
+    parser.add_argument("--corpus-size", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--budget", type=float, default=20.0, help="request budget (s)")
+    args = parser.parse_args()
+
+    fake = FakeLLM(args.llm_latency, args.llm_error_rate)
+    llm_client.call_llm = fake
+    llm_extractor.call_llm = fake
+
+    rng = random.Random(0)
+    corpus = [synthetic_pdf(rng, args.pages) for _ in range(args.corpus_size)]
+
+    workdir = tempfile.mkdtemp(prefix="load_test_")
+    rag.RAG_DIR = os.path.join(workdir, "rag")
+
+    print(f"{'conc':>5} {'reqs':>5} {'req/s':>7} {'p50 s':>7} {'p95 s':>7} "
+          f"{'p99 s':>7} {'errors':>6} {'degr':>5} {'rss +MB':>8}")
+    try:
+        for level in args.concurrency:
+            r = run_level(level, args.requests, corpus, workdir, args.budget)
+            print(f"{r['concurrency']:>5} {r['requests']:>5} {r['throughput']:>7.2f} "
+                  f"{r['p50']:>7.3f} {r['p95']:>7.3f} {r['p99']:>7.3f} "
+                  f"{r['errors']:>6} {r['degraded']:>5} {r['rss_growth_mb']:>8.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\nfake LLM calls: {fake.calls} (injected errors: {fake.failures})")
+
+
+if __name__ == "__main__":
+    main()
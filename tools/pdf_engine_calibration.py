@@ -0,0 +1,128 @@
+"""
+pdf_engine_calibration.py
+
+ROLE
+----
+Calibrate the PDF text engines on a sample corpus.
+
+For every available engine it measures throughput (pages/s) and
+extraction quality:
+- sections : clinical section headers detected (prompts.py)
+- fields   : regex fields found out of 7 (llm_extractor.py)
+
+Timings start before the pypdf reader is built: the extractor builds
+it for every document (page hashing), and the pypdf engine reuses it,
+so leaving it out would make pypdf look faster than it is.
+
+Suggests an engine chain (fast engine first, best-quality engine
+as fallback) for pdf_engines.ENGINE_CHAINS.
+
+USAGE
+-----
+    python -m tools.pdf_engine_calibration path/to/sample_pdfs
+"""
+
+import argparse
+import glob
+import io
+import os
+import time
+
+from pypdf import PdfReader
+
+from backend.llm_extractor import FIELDS, extract_clinical_info_regex, missing_fields
+from backend.pdf_engines import ENGINES
+from backend.prompts import find_relevant_spans
+
+
+def measure(engine, corpus):
+    pages = 0
+    seconds = 0.0
+    sections = 0
+    fields = 0
+    failures = 0
+
+    for pdf_bytes in corpus:
+        stream = io.BytesIO(pdf_bytes)
+        started = time.perf_counter()
+        try:
+            reader = PdfReader(stream)
+            document = engine.open(stream, reader)
+            try:
+                text = "\n".join(document.page_text(i) for i in range(len(reader.pages)))
+            finally:
+                document.close()
+        except Exception:
+            failures += 1
+            continue
+        seconds += time.perf_counter() - started
+        pages += len(reader.pages)
+
+        sections += len({name for _, name, _, _ in find_relevant_spans(text)})
+        fields += len(FIELDS) - len(missing_fields(extract_clinical_info_regex(text)))
+
+    documents = max(1, len(corpus) - failures)
+    return {
+        "engine": engine.name,
+        "pages_per_s": pages / seconds if seconds else 0.0,
+        "sections": sections / documents,
+        "fields": fields / documents,
+        "failures": failures,
+    }
+
+
+def suggest_chain(results, tolerance=0.95):
+    usable = [r for r in results if r["failures"] == 0]
+    if not usable:
+        return ()
+
+    def quality(r):
+        return (r["fields"], r["sections"])
+
+    best = max(usable, key=quality)
+    fastest_good = max(
+        (r for r in usable
+         if r["fields"] >= best["fields"] * tolerance
+         and r["sections"] >= best["sections"] * tolerance),
+        key=lambda r: r["pages_per_s"],
+    )
+
+    chain = [fastest_good["engine"]]
+    if best["engine"] != fastest_good["engine"]:
+        chain.append(best["engine"])
+    return tuple(chain)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Calibrate PDF text engines")
+    parser.add_argument("corpus", help="directory containing sample PDFs")
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the corpus")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.corpus, "**", "*.pdf"), recursive=True))
+    if not paths:
+        parser.error(f"no PDFs found under {args.corpus}")
+
+    corpus = []
+    for path in paths:
+        with open(path, "rb") as f:
+            corpus.append(f.read())
+    corpus = corpus * max(1, args.repeat)
+
+    results = [
+        measure(engine, corpus)
+        for engine in ENGINES.values()
+        if engine.available()
+    ]
+
+    print(f"{len(paths)} PDFs x {args.repeat} pass(es)")
+    print(f"{'engine':<12} {'pages/s':>9} {'sections':>9} {'fields':>7} {'failed':>7}")
+    for r in results:
+        print(f"{r['engine']:<12} {r['pages_per_s']:>9.1f} {r['sections']:>9.2f} "
+              f"{r['fields']:>7.2f} {r['failures']:>7}")
+
+    print(f"\nsuggested chain: {suggest_chain(results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+rag_stress.py
+
+ROLE
+----
+Multi-threaded stress benchmark for the RAG passage store.
+
+Runs reader threads calling query_rag while writer threads insert
+synthetic reports, then prints query throughput, latency percentiles,
+insert throughput and error counts.
+
+USAGE
+-----
+    python -m tools.rag_stress --readers 8 --writers 2 --seconds 5
+"""
+
+import argparse
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+
+import backend.rag as rag
+
+CONDITIONS = [
+    ("Type 2 Diabetes Mellitus", "fasting glucose 210 mg/dL, HbA1c 8.9 %, polyuria"),
+    ("Hypertension", "blood pressure 168/104 mmHg, headache, no end-organ damage"),
+    ("Acute Myocardial Infarction", "ST elevation in II III aVF, troponin raised"),
+    ("Fever under evaluation", "fever 101 F for 3 days, suspected infection"),
+]
+
+
+def synthetic_report(rng: random.Random) -> tuple:
+    diagnosis, findings = rng.choice(CONDITIONS)
+    lines = [
+        f"Patient Name: Patient {rng.randint(1, 10**6)}",
+        f"Age: {rng.randint(20, 85)}",
+        f"FINAL DIAGNOSIS: {diagnosis}",
+    ]
+    lines += [f"Day {d}: {findings}." for d in range(rng.randint(5, 40))]
+    return "\n".join(lines), diagnosis
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(readers: int, writers: int, seconds: float, seed_reports: int, batch: int) -> dict:
+    rng = random.Random(42)
+    rag.add_many_to_rag(synthetic_report(rng) for _ in range(seed_reports))
+
+    stop = threading.Event()
+    latencies = []
+    inserts = [0]
+    errors = [0]
+    lock = threading.Lock()
+
+    def reader(seed):
+        local_rng = random.Random(seed)
+        local = []
+        while not stop.is_set():
+            query = local_rng.choice(CONDITIONS)[0]
+            started = time.perf_counter()
+            try:
+                rag.query_rag(query)
+            except Exception:
+                with lock:
+                    errors[0] += 1
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    def writer(seed):
+        local_rng = random.Random(seed)
+        while not stop.is_set():
+            try:
+                rag.add_many_to_rag(synthetic_report(local_rng) for _ in range(batch))
+                with lock:
+                    inserts[0] += batch
+            except Exception:
+                with lock:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(1000 + i,)) for i in range(writers)]
+
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    return {
+        "readers": readers,
+        "writers": writers,
+        "queries_per_s": len(latencies) / seconds,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": (statistics.mean(latencies) * 1000) if latencies else 0.0,
+        "inserts_per_s": inserts[0] / seconds,
+        "errors": errors[0],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("USAGE")[0])
+    parser.add_argument("--readers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--writers", type=int, nargs="+", default=[0, 2])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--seed-reports", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=1, help="reports per insert call")
+    args = parser.parse_args()
+
+    print(f"{'readers':>7} {'writers':>7} {'q/s':>10} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'ins/s':>8} {'errors':>6}")
+
+    for writers in args.writers:
+        for readers in args.readers:
+            workdir = tempfile.mkdtemp(prefix="rag_stress_")
+            rag.RAG_DIR = workdir
+            rag.configure_shards(None)
+            rag._SHARDS = {}
+            try:
+                r = run(readers, writers, args.seconds, args.seed_reports, args.batch)
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+            print(f"{r['readers']:>7} {r['writers']:>7} {r['queries_per_s']:>10.0f} "
+                  f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+                  f"{r['inserts_per_s']:>8.0f} {r['errors']:>6}")
+
+
+if __name__ == "__main__":
+    main()
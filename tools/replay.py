@@ -0,0 +1,161 @@
+"""
+replay.py
+
+ROLE
+----
+Deterministic replay of a request journal (backend/journal.py).
+
+Each journal record is re-run from its stored, redacted text:
+
+    process_text → generate_full_care_plan → build_treatment_plan_pdf
+
+PDFs are never kept, so PDF parsing itself is not replayed. Timings
+are compared only for stages both sides measure the same way:
+
+    extraction_structured   process_text only (the journal records it
+                            separately from extraction_pdf_text)
+    care_plan, render       replay only; compared against a previous
+                            replay (--baseline)
+
+The journal's "extraction" and "care_plan" timings include PDF
+parsing and RAG context respectively, so they are not compared.
+
+Outputs (summary fields, problem) are diffed against the journal,
+and stage timings against a baseline — the journal itself or a
+previous replay written with --output.
+
+USAGE
+-----
+    python -m tools.replay logs/requests.jsonl --output run1.jsonl
+    python -m tools.replay logs/requests.jsonl --baseline run1.jsonl
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from backend.extractor import process_text
+from backend.pdf_builder import build_treatment_plan_pdf
+from backend.planner import generate_full_care_plan
+
+SUMMARY_FIELDS = ("chief_complaint", "final_diagnosis", "ecg_findings", "risk_factors")
+
+
+def read_jsonl(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def replay_record(record: dict, journal_dir: str, workdir: str) -> dict:
+    with open(os.path.join(journal_dir, record["text_ref"]), "r", encoding="utf-8") as f:
+        text = f.read()
+
+    timings = {}
+
+    started = time.perf_counter()
+    extraction = process_text(text)
+    timings["extraction_structured"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    plan = generate_full_care_plan(
+        patient=extraction["details"],
+        summary=extraction["summary_data"],
+        context_docs=[],
+    )
+    timings["care_plan"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    build_treatment_plan_pdf(
+        extraction["details"],
+        extraction["summary_data"],
+        plan,
+        file_name=os.path.join(workdir, "replay.pdf"),
+    )
+    timings["render"] = time.perf_counter() - started
+
+    return {
+        "text_sha256": record["text_sha256"],
+        "summary": {k: extraction["summary_data"].get(k) for k in SUMMARY_FIELDS},
+        "problem": plan["identified_problem"],
+        "timings": timings,
+    }
+
+
+def diff_outputs(expected: dict, actual: dict) -> list:
+    diffs = []
+    for field in SUMMARY_FIELDS:
+        if (expected.get("summary") or {}).get(field) != actual["summary"].get(field):
+            diffs.append(field)
+    if expected.get("problem") != actual["problem"]:
+        diffs.append("problem")
+    return diffs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a request journal")
+    parser.add_argument("journal", help="path to requests.jsonl")
+    parser.add_argument("--baseline", help="earlier replay output for timing comparison")
+    parser.add_argument("--output", help="write replay results (JSONL) here")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per record (min timing kept)")
+    args = parser.parse_args()
+
+    journal_dir = os.path.dirname(os.path.abspath(args.journal))
+    records = [r for r in read_jsonl(args.journal) if r.get("text_ref")]
+
+    baseline = {}
+    if args.baseline:
+        for r in read_jsonl(args.baseline):
+            baseline.setdefault(r["text_sha256"], r)
+
+    results = []
+    mismatches = 0
+
+    with tempfile.TemporaryDirectory(prefix="replay_") as workdir:
+        for record in records:
+            runs = [replay_record(record, journal_dir, workdir) for _ in range(max(1, args.repeat))]
+            result = runs[0]
+            result["timings"] = {
+                stage: min(run["timings"][stage] for run in runs)
+                for stage in result["timings"]
+            }
+
+            diffs = diff_outputs(record, result)
+            if diffs:
+                mismatches += 1
+                print(f"DIFF {record['text_sha256'][:12]}: {', '.join(diffs)}")
+            results.append(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            for r in results:
+                f.write(json.dumps(r) + "\n")
+
+    print(f"\n{len(results)} records replayed, {mismatches} with output differences")
+
+    # ---------------- Timing comparison ----------------
+    print(f"\n{'stage':<22} {'baseline ms':>12} {'replay ms':>10} {'change':>8}")
+    journal_by_text = {}
+    for rec in records:
+        journal_by_text.setdefault(rec["text_sha256"], rec)
+
+    stages = ("extraction_structured", "care_plan", "render") if baseline else ("extraction_structured",)
+    for stage in stages:
+        now, then = [], []
+        for r in results:
+            base = (baseline or journal_by_text).get(r["text_sha256"])
+            if base and stage in base.get("timings", {}):
+                now.append(r["timings"][stage])
+                then.append(base["timings"][stage])
+        if not now:
+            continue
+        new_ms = statistics.median(now) * 1000
+        old_ms = statistics.median(then) * 1000
+        change = (new_ms - old_ms) / old_ms * 100 if old_ms else 0.0
+        print(f"{stage:<22} {old_ms:>12.2f} {new_ms:>10.2f} {change:>+7.1f}%")
+
+
+if __name__ == "__main__":
+    main()